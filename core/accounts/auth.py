@@ -0,0 +1,74 @@
+"""
+بار کردن کاربر و پروفایل در یک کوئری برای هر درخواست.
+
+AuthenticationMiddleware کاربر را با backend ذخیره‌شده در session می‌خواند و روی request کش می‌کند؛
+ProfileModelBackend همان کوئری را با select_related('profile') می‌زند، پس request.user.profile
+(و get_profile/aget_profile) کوئری جدایی ندارد.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core import checks
+
+from .models import Profile
+
+
+class ProfileModelBackend(ModelBackend):
+    def get_user(self, user_id):
+        UserModel = get_user_model()
+        try:
+            user = UserModel._default_manager.select_related('profile').get(pk=user_id)
+        except UserModel.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
+
+    async def aget_user(self, user_id):
+        UserModel = get_user_model()
+        try:
+            user = await UserModel._default_manager.select_related('profile').aget(pk=user_id)
+        except UserModel.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
+
+
+def get_profile(request):
+    """پروفایل کاربر جاری (None برای مهمان)؛ اگر ردیفش نباشد ساخته می‌شود."""
+    user = request.user
+    if not user.is_authenticated:
+        return None
+    try:
+        return user.profile
+    except Profile.DoesNotExist:
+        user.profile, _ = Profile.objects.get_or_create(user=user)
+        return user.profile
+
+
+async def aget_profile(request):
+    """get_profile برای viewهای async؛ request.user را هم با کاربر واقعی جایگزین می‌کند."""
+    user = await request.auser()
+    # تمپلیت‌ها و context processorها همین شیء را ببینند، نه SimpleLazyObject
+    request.user = user
+    if not user.is_authenticated:
+        return None
+    try:
+        return user.profile
+    except Profile.DoesNotExist:
+        user.profile, _ = await Profile.objects.aget_or_create(user=user)
+        return user.profile
+
+
+@checks.register(checks.Tags.security)
+def check_session_cache(app_configs=None, **kwargs):
+    """session در کش محلی هر پروسه: خروج در یک worker در workerهای دیگر دیده نمی‌شود."""
+    if settings.SESSION_ENGINE not in ('django.contrib.sessions.backends.cache',
+                                       'django.contrib.sessions.backends.cached_db'):
+        return []
+    alias = getattr(settings, 'SESSION_CACHE_ALIAS', 'default')
+    backend = settings.CACHES.get(alias, {}).get('BACKEND', '')
+    if backend.endswith(('.LocMemCache', '.DummyCache')) and getattr(settings, 'WEB_CONCURRENCY', 1) > 1:
+        return [checks.Warning(
+            f'SESSION_ENGINE {settings.SESSION_ENGINE} uses the per-process cache {backend}.',
+            hint='Set CACHE_URL to a shared cache (e.g. redis://) or SESSION_BACKEND=db.',
+            id='accounts.W001',
+        )]
+    return []
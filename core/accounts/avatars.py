@@ -0,0 +1,160 @@
+"""
+نسخه‌های کوچک‌شدهٔ Profile.avatar (WebP + JPEG، مربعی، بدون EXIF).
+
+بعد از commit تغییر آواتار، ساخت نسخه‌ها به یک thread pool داخل همان پروسه سپرده
+می‌شود تا درخواست منتظر Pillow نماند. نتیجه در Profile.avatar_variants ذخیره می‌شود:
+
+    {"src": "avatars/me.png", "sizes": {"80": {"webp": "...", "jpeg": "..."}, ...}}
+
+اگر src با آواتار فعلی یکی نباشد نسخه‌ها کهنه‌اند و تمپلیت‌تگ `avatar` فایل اصلی را
+نشان می‌دهد. کارهای ازدست‌رفته (ری‌استارت پروسه) را `manage.py backfill_avatars` می‌سازد.
+"""
+import hashlib
+import io
+import logging
+import posixpath
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+SIZES = (40, 80, 160)
+FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+VARIANTS_DIR = 'avatars/variants'
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'AVATAR_WORKERS', 2),
+                thread_name_prefix='avatar',
+            )
+        return _executor
+
+
+def variant_name(src, size, ext):
+    # hash مسیر اصلی: me.png و me.jpg نسخه‌های هم‌نام نسازند
+    stem = posixpath.splitext(posixpath.basename(src))[0]
+    digest = hashlib.sha1(src.encode()).hexdigest()[:8]
+    return f'{VARIANTS_DIR}/{stem}-{digest}_{size}.{ext}'
+
+
+def render_variants(fp):
+    """فایل تصویر -> {(size, ext): bytes}"""
+    with Image.open(fp) as img:
+        img = ImageOps.exif_transpose(img)
+        has_alpha = img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info)
+        img = img.convert('RGBA' if has_alpha else 'RGB')
+        flat = img
+        if has_alpha:
+            # JPEG شفافیت ندارد
+            flat = Image.new('RGB', img.size, 'white')
+            flat.paste(img, mask=img.getchannel('A'))
+
+        out = {}
+        for size in SIZES:
+            for ext, (fmt, options) in FORMATS.items():
+                source = img if ext == 'webp' else flat
+                thumb = ImageOps.fit(source, (size, size), Image.LANCZOS)
+                buf = io.BytesIO()
+                # بدون exif/icc: فقط پیکسل‌ها ذخیره می‌شوند
+                thumb.save(buf, fmt, **options)
+                out[size, ext] = buf.getvalue()
+        return out
+
+
+def delete_variants(variants, storage, keep=None):
+    keep_names = {name for formats in (keep or {}).get('sizes', {}).values() for name in formats.values()}
+    for formats in (variants or {}).get('sizes', {}).values():
+        for name in formats.values():
+            if name not in keep_names:
+                storage.delete(name)
+
+
+def build_variants(profile_pk, force=False):
+    """
+    ساخت نسخه‌ها برای آواتار فعلی پروفایل. خروجی: True اگر چیزی ساخته شد.
+    """
+    Profile = apps.get_model('accounts', 'Profile')
+    profile = Profile.objects.filter(pk=profile_pk).only('avatar', 'avatar_variants').first()
+    if profile is None or not profile.avatar:
+        return False
+    src = profile.avatar.name
+    current = profile.avatar_variants or {}
+    if current.get('src') == src and not force:
+        return False
+
+    storage = profile.avatar.storage
+    with profile.avatar.open('rb') as fp:
+        rendered = render_variants(fp)
+
+    sizes = {}
+    for (size, ext), data in rendered.items():
+        name = variant_name(src, size, ext)
+        if storage.exists(name):
+            storage.delete(name)
+        sizes.setdefault(str(size), {})[ext] = storage.save(name, ContentFile(data))
+    variants = {'src': src, 'sizes': sizes}
+
+    # فقط اگر در این فاصله آواتار دوباره عوض نشده باشد
+    updated = Profile.objects.filter(pk=profile_pk, avatar=src).update(avatar_variants=variants)
+    if not updated:
+        delete_variants(variants, storage)
+        return False
+    delete_variants(current, storage, keep=variants)
+    return True
+
+
+def _run(profile_pk):
+    close_old_connections()
+    try:
+        build_variants(profile_pk)
+    except Exception:
+        logger.exception('avatar variants failed for profile %s', profile_pk)
+    finally:
+        close_old_connections()
+
+
+def schedule(profile_pk):
+    """
+    بعد از commit در پس‌زمینه اجرا می‌شود؛ با AVATAR_WORKERS=0 همان‌جا (مثلاً برای تست).
+    """
+    def submit():
+        if getattr(settings, 'AVATAR_WORKERS', 2) == 0:
+            build_variants(profile_pk)
+        else:
+            _get_executor().submit(_run, profile_pk)
+    transaction.on_commit(submit)
+
+
+def pick(variants, src, size):
+    """
+    برای نمایش در size پیکسل CSS: {'webp': [(url-name, 1), (name, 2)], 'jpeg': [...]} یا None
+    (نسخه‌ای نیست یا کهنه است).
+    """
+    if not variants or variants.get('src') != src or not variants.get('sizes'):
+        return None
+    available = sorted((int(s), formats) for s, formats in variants['sizes'].items())
+
+    def smallest_at_least(px):
+        for s, formats in available:
+            if s >= px:
+                return formats
+        return available[-1][1]
+
+    one, two = smallest_at_least(size), smallest_at_least(size * 2)
+    return {ext: [(one[ext], 1), (two[ext], 2)] for ext in FORMATS if ext in one and ext in two}
@@ -0,0 +1,8 @@
+from django.utils.functional import SimpleLazyObject
+
+from .auth import get_profile
+
+
+def profile(request):
+    """{{ profile }} در تمپلیت‌ها؛ همراه کاربر درخواست بار شده است (accounts/auth.py)."""
+    return {'profile': SimpleLazyObject(lambda: get_profile(request))}
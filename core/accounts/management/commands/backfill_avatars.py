@@ -0,0 +1,43 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from accounts import avatars
+from accounts.models import Profile
+
+
+class Command(BaseCommand):
+    help = "ساخت نسخه‌های کوچک آواتارهای موجود (یا کهنه)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='نسخه‌های موجود را هم دوباره بساز.')
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, force=False, workers=4, batch_size=500, **options):
+        profiles = (Profile.objects.exclude(avatar='').order_by('pk')
+                    .values_list('pk', 'avatar', 'avatar_variants'))
+        todo = [pk for pk, src, variants in profiles.iterator(chunk_size=batch_size)
+                if force or (variants or {}).get('src') != src]
+
+        built = failed = 0
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(self._build, pk, force): pk for pk in todo}
+            for future in as_completed(futures):
+                try:
+                    built += future.result()
+                except Exception as e:
+                    failed += 1
+                    self.stderr.write(f"profile {futures[future]}: {e}")
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(todo)} avatars checked, {built} built, {failed} failed."
+        ))
+
+    @staticmethod
+    def _build(pk, force):
+        close_old_connections()
+        try:
+            return avatars.build_variants(pk, force=force)
+        finally:
+            close_old_connections()
@@ -8,6 +8,8 @@ from django.db import models
 from django.core.validators import FileExtensionValidator
 from django.db.models.functions import Lower
 
+from . import avatars
+
 class UserManager(BaseUserManager):
     """
     Custom user model manager where email is the primary key.
@@ -96,12 +98,23 @@ class Profile(models.Model):
     )
 
 
+    # نسخه‌های کوچک‌شدهٔ آواتار؛ در پس‌زمینه ساخته می‌شود (accounts/avatars.py)
+    avatar_variants = models.JSONField(default=dict, blank=True, editable=False)
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.user.email
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # برای تشخیص تغییر آواتار در post_save
+        if 'avatar' in instance.__dict__:
+            instance._loaded_avatar = instance.__dict__['avatar'] or ''
+        return instance
+
 
 @receiver(post_save, sender=User)
 def create_user_profile(sender, instance, created, **kwargs):
@@ -109,4 +122,17 @@ def create_user_profile(sender, instance, created, **kwargs):
         Profile.objects.create(user=instance)
 
 
-
+@receiver(post_save, sender=Profile)
+def schedule_avatar_variants(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    name = instance.avatar.name or ''
+    if name == getattr(instance, '_loaded_avatar', ''):
+        return
+    instance._loaded_avatar = name
+    if name:
+        avatars.schedule(instance.pk)
+    elif instance.avatar_variants:
+        # آواتار پاک شد
+        avatars.delete_variants(instance.avatar_variants, instance.avatar.storage)
+        Profile.objects.filter(pk=instance.pk).update(avatar_variants={})
@@ -0,0 +1,34 @@
+from django import template
+from django.utils.html import format_html, format_html_join
+
+from accounts import avatars
+
+register = template.Library()
+
+
+@register.simple_tag
+def avatar(profile, size=80, css_class=''):
+    """
+    {% avatar profile 80 "h-20 w-20 rounded-full" %}
+    <picture> با WebP و JPEG در اندازهٔ مناسب (1x/2x)؛ تا وقتی نسخه‌ها ساخته نشده‌اند فایل اصلی.
+    """
+    if not profile or not profile.avatar:
+        return ''
+    storage = profile.avatar.storage
+    chosen = avatars.pick(profile.avatar_variants, profile.avatar.name, size)
+    if chosen is None:
+        return format_html('<img src="{}" alt="avatar" width="{}" height="{}" class="{} object-cover" />',
+                           profile.avatar.url, size, size, css_class)
+
+    def srcset(items):
+        return ', '.join(f'{storage.url(name)} {density}x' for name, density in items)
+
+    sources = format_html_join(
+        '', '<source type="image/{}" srcset="{}" />',
+        ((ext, srcset(items)) for ext, items in chosen.items() if ext != 'jpeg'),
+    )
+    fallback = chosen['jpeg']
+    return format_html(
+        '<picture>{}<img src="{}" srcset="{}" alt="avatar" width="{}" height="{}" class="{}" loading="lazy" /></picture>',
+        sources, storage.url(fallback[0][0]), srcset(fallback), size, size, css_class,
+    )
@@ -1,3 +1,130 @@
-from django.test import TestCase
+import io
+import shutil
+import tempfile
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.core.files.base import ContentFile
+from django.template import Context, Template
+from django.test import RequestFactory, TestCase, override_settings
+from PIL import Image
+
+from . import avatars
+from .auth import ProfileModelBackend, aget_profile, check_session_cache, get_profile
+from .models import Profile, User
+
+
+def image_file(size=(120, 60), mode='RGB', fmt='PNG', exif=None):
+    buf = io.BytesIO()
+    img = Image.new(mode, size, 'red')
+    if exif is not None:
+        img.save(buf, fmt, exif=exif)
+    else:
+        img.save(buf, fmt)
+    return ContentFile(buf.getvalue())
+
+
+class AvatarVariantTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.media = tempfile.mkdtemp()
+        cls.enterClassContext(override_settings(MEDIA_ROOT=cls.media, AVATAR_WORKERS=0))
+        cls.addClassCleanup(shutil.rmtree, cls.media, ignore_errors=True)
+
+    def setUp(self):
+        self.profile = User.objects.create_user('me@example.com', 'pw-12345!').profile
+
+    def set_avatar(self, name, file):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.profile.avatar.save(name, file)
+        self.profile = Profile.objects.get(pk=self.profile.pk)
+
+    def test_render_variants_are_square_and_without_exif(self):
+        exif = Image.Exif()
+        exif[0x0112] = 6  # orientation
+        exif[0x010F] = 'camera'
+        rendered = avatars.render_variants(image_file(fmt='JPEG', exif=exif))
+        self.assertEqual(set(rendered), {(s, ext) for s in avatars.SIZES for ext in avatars.FORMATS})
+        for (size, ext), data in rendered.items():
+            with Image.open(io.BytesIO(data)) as img:
+                self.assertEqual(img.size, (size, size))
+                self.assertEqual(img.format, avatars.FORMATS[ext][0])
+                self.assertEqual(dict(img.getexif()), {})
+
+    def test_transparent_png_is_flattened_for_jpeg(self):
+        rendered = avatars.render_variants(image_file(mode='RGBA'))
+        with Image.open(io.BytesIO(rendered[40, 'jpeg'])) as img:
+            self.assertEqual(img.mode, 'RGB')
+
+    def test_variants_follow_avatar_changes(self):
+        self.set_avatar('me.png', image_file())
+        first = self.profile.avatar_variants
+        self.assertEqual(first['src'], self.profile.avatar.name)
+        storage = self.profile.avatar.storage
+        old_names = [name for formats in first['sizes'].values() for name in formats.values()]
+        self.assertTrue(all(storage.exists(name) for name in old_names))
+
+        self.set_avatar('me.jpg', image_file(fmt='JPEG'))
+        self.assertEqual(self.profile.avatar_variants['src'], self.profile.avatar.name)
+        self.assertFalse(any(storage.exists(name) for name in old_names))
+
+        names = [n for formats in self.profile.avatar_variants['sizes'].values() for n in formats.values()]
+        self.profile.avatar = None
+        self.profile.save()
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.avatar_variants, {})
+        self.assertFalse(any(storage.exists(name) for name in names))
+
+    def test_template_tag(self):
+        template = Template('{% load avatars %}{% avatar profile 40 %}')
+        self.profile.avatar.save('me.png', image_file(), save=False)
+        self.assertIn('<img src="/media/avatars/me', template.render(Context({'profile': self.profile})))
+
+        self.set_avatar('me.png', image_file())
+        html = template.render(Context({'profile': self.profile}))
+        self.assertIn('<source type="image/webp"', html)
+        self.assertIn('_40.webp 1x', html)
+        self.assertIn('_80.jpeg 2x', html)
+
+
+class ProfileBackendTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('me@example.com', 'pw-12345!')
+
+    def test_user_and_profile_in_one_query(self):
+        backend = ProfileModelBackend()
+        request = RequestFactory().get('/')
+        with self.assertNumQueries(1):
+            request.user = backend.get_user(self.user.pk)
+            self.assertEqual(get_profile(request), self.user.profile)
+
+        self.user.is_active = False
+        self.user.save()
+        self.assertIsNone(backend.get_user(self.user.pk))
+
+    def test_async_user_and_profile_in_one_query(self):
+        backend = ProfileModelBackend()
+        request = RequestFactory().get('/')
+
+        async def auser():
+            return await backend.aget_user(self.user.pk)
+        request.auser = auser
+        with self.assertNumQueries(1):
+            profile = async_to_sync(aget_profile)(request)
+        self.assertEqual(profile.pk, self.user.profile.pk)
+        self.assertEqual(request.user.pk, self.user.pk)
+
+    def test_session_login_uses_profile_backend(self):
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.session['_auth_user_backend'], 'accounts.auth.ProfileModelBackend')
+
+    def test_local_session_cache_warning(self):
+        local = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+        with self.settings(SESSION_ENGINE='django.contrib.sessions.backends.cache', CACHES=local,
+                           WEB_CONCURRENCY=4):
+            self.assertEqual([w.id for w in check_session_cache()], ['accounts.W001'])
+        with self.settings(SESSION_ENGINE='django.contrib.sessions.backends.db', WEB_CONCURRENCY=4):
+            self.assertEqual(check_session_cache(), [])
@@ -1,3 +1,5 @@
+import copy
+
 from django.contrib.auth import login
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.auth.views import LoginView as DjangoLoginView, LogoutView as DjangoLogoutView
@@ -9,7 +11,7 @@ from django.contrib import messages
 
 from .forms import SignUpForm, EmailAuthenticationForm
 from .forms_profile import ProfileForm
-from .models import Profile
+from .auth import get_profile
 
 class SignUpView(SuccessMessageMixin, CreateView):
     template_name = "accounts/signup.html"
@@ -56,8 +58,8 @@ class ProfileUpdateView(LoginRequiredMixin, SuccessMessageMixin, UpdateView):
     success_message = "پروفایل با موفقیت ذخیره شد."
 
     def get_object(self, queryset=None):
-        profile, _ = Profile.objects.get_or_create(user=self.request.user)
-        return profile
+        # همراه کاربر درخواست بار شده؛ کپی تا فرم نامعتبر {{ profile }} ذخیره‌شده را عوض نکند
+        return copy.copy(get_profile(self.request))
 
 
 
@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+from django.core.signals import request_finished
+
+
+class CoreConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'core'
+
+    def ready(self):
+        from . import checks, dbpool  # noqa: F401  (system checks)
+        request_finished.connect(dbpool.maybe_publish, dispatch_uid='core.dbpool.publish')
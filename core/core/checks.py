@@ -0,0 +1,28 @@
+"""
+کش پیش‌فرض باید بین workerها مشترک باشد.
+
+invalidate کردن کش (Tag.objects.invalidate_usage، SavedFilter.objects.invalidate) فقط
+همان کشی را پاک می‌کند که پروسهٔ نویسنده می‌بیند؛ با locmem و چند worker بقیهٔ پروسه‌ها تا
+timeout دادهٔ قدیمی می‌دهند (تگ‌ها/فیلترهای ذخیره‌شدهٔ کهنه، ETag لیست بعد از تغییر نام تگ).
+آمار /_dbpool/ و /_perf/ هم از همین کش جمع می‌شود.
+"""
+from django.conf import settings
+from django.core import checks
+
+PER_PROCESS_BACKENDS = ('.LocMemCache', '.DummyCache')
+
+
+# فقط با check --deploy: runserver و manage.py test یک پروسه‌اند و locmem برایشان درست است
+@checks.register(checks.Tags.caches, deploy=True)
+def check_shared_cache(app_configs=None, **kwargs):
+    backend = settings.CACHES.get('default', {}).get('BACKEND', '')
+    if getattr(settings, 'WEB_CONCURRENCY', 1) <= 1:
+        return []
+    if backend.endswith(PER_PROCESS_BACKENDS):
+        return [checks.Warning(
+            f'The default cache {backend} is per process, but WEB_CONCURRENCY is '
+            f'{settings.WEB_CONCURRENCY}: cache invalidation is only seen by the worker that made the change.',
+            hint='Set CACHE_URL to a shared cache, e.g. redis://redis:6379/1 (the compose.yaml default).',
+            id='core.W002',
+        )]
+    return []
@@ -0,0 +1,116 @@
+"""
+آمار پول اتصال دیتابیس (psycopg_pool، DATABASES["default"]["OPTIONS"]["pool"]).
+
+هر پروسه پول خودش را دارد؛ آمار آن بعد از درخواست‌ها (حداکثر هر PERF_PUBLISH_INTERVAL
+ثانیه) در کش پیش‌فرض نوشته می‌شود تا endpoint کارکنان /_dbpool/ جمع همهٔ workerها را
+نشان دهد (مثل core/perf.py، فقط با کش مشترک).
+
+  saturation     اتصال‌های در حال استفاده / max_size در لحظهٔ انتشار
+  queued_ratio   سهم درخواست‌هایی که منتظر اتصال آزاد مانده‌اند
+  avg_wait_ms    میانگین انتظار همان درخواست‌ها
+  timeouts       درخواست‌هایی که بعد از DB_POOL_TIMEOUT خطا گرفته‌اند
+"""
+import os
+import socket
+import time
+
+from django.conf import settings
+from django.core import checks
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from .perf import publish_process
+
+PROCESS_KEY = f'core:dbpool:{socket.gethostname()}:{os.getpid()}'
+PROCESSES_KEY = 'core:dbpool:processes'
+
+COUNTERS = ('requests', 'queued', 'wait_ms', 'timeouts', 'connections_opened', 'connections_lost')
+
+_published_at = 0.0
+
+
+def pool_stats(alias=DEFAULT_DB_ALIAS):
+    """آمار پول همین پروسه؛ None اگر پول فعال نباشد (مثلاً SQLite یا DB_POOL=0)."""
+    pool = getattr(connections[alias], 'pool', None)
+    if pool is None:
+        return None
+    s = pool.get_stats()
+    size, available = s.get('pool_size', 0), s.get('pool_available', 0)
+    stats = {
+        'min_size': pool.min_size,
+        'max_size': pool.max_size,
+        'size': size,
+        'in_use': size - available,
+        'waiting': s.get('requests_waiting', 0),
+        'requests': s.get('requests_num', 0),
+        'queued': s.get('requests_queued', 0),
+        'wait_ms': s.get('requests_wait_ms', 0),
+        'timeouts': s.get('requests_errors', 0),
+        'connections_opened': s.get('connections_num', 0),
+        'connections_lost': s.get('connections_lost', 0),
+    }
+    return _derive(stats)
+
+
+def _derive(stats):
+    stats['saturation'] = round(stats['in_use'] / stats['max_size'], 3) if stats['max_size'] else 0
+    stats['queued_ratio'] = round(stats['queued'] / stats['requests'], 4) if stats['requests'] else 0
+    stats['avg_wait_ms'] = round(stats['wait_ms'] / stats['queued'], 2) if stats['queued'] else 0
+    return stats
+
+
+def maybe_publish(**kwargs):
+    """گیرندهٔ request_finished."""
+    global _published_at
+    interval = getattr(settings, 'PERF_PUBLISH_INTERVAL', 30)
+    now = time.monotonic()
+    if now - _published_at < interval:
+        return
+    _published_at = now
+    publish()
+
+
+def publish():
+    stats = pool_stats()
+    if stats is None:
+        return
+    stats['published_at'] = time.time()
+    publish_process(PROCESSES_KEY, PROCESS_KEY, stats)
+
+
+def report():
+    """آمار هر پروسه (آخرین انتشار؛ همین پروسه تازه) و جمع کل در برابر DB_MAX_CONNECTIONS."""
+    keys = [k for k in cache.get(PROCESSES_KEY) or () if k != PROCESS_KEY]
+    processes = cache.get_many(keys)
+    local = pool_stats()
+    if local is not None:
+        processes[PROCESS_KEY] = local
+
+    total = {name: sum(p[name] for p in processes.values())
+             for name in ('max_size', 'size', 'in_use', 'waiting', *COUNTERS)}
+    return {
+        'pool_enabled': local is not None,
+        'budget': getattr(settings, 'DB_MAX_CONNECTIONS', None),
+        'total': _derive(total),
+        'processes': processes,
+    }
+
+
+@checks.register(checks.Tags.database)
+def check_pool_budget(app_configs=None, **kwargs):
+    """سقف پول ضرب در تعداد worker نباید از DB_MAX_CONNECTIONS بیشتر شود."""
+    options = settings.DATABASES.get(DEFAULT_DB_ALIAS, {}).get('OPTIONS', {})
+    pool = options.get('pool')
+    budget = getattr(settings, 'DB_MAX_CONNECTIONS', None)
+    if not isinstance(pool, dict) or not budget:
+        return []
+    workers = getattr(settings, 'WEB_CONCURRENCY', 1)
+    needed = pool.get('max_size', 0) * workers
+    if needed > budget:
+        return [checks.Warning(
+            f'DB_POOL_MAX_SIZE ({pool["max_size"]}) x WEB_CONCURRENCY ({workers}) = {needed} '
+            f'exceeds DB_MAX_CONNECTIONS ({budget}).',
+            hint='Lower DB_POOL_MAX_SIZE or leave it unset so it is derived from the budget.',
+            id='core.W001',
+        )]
+    return []
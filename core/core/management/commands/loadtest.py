@@ -0,0 +1,163 @@
+import http.client
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from importlib import import_module
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY, get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from todos.models import Todo
+
+# دستور اجرای هر حالت؛ همان entrypoint.sh
+SERVERS = {
+    'wsgi': ['gunicorn', 'core.wsgi:application'],
+    'asgi': ['gunicorn', 'core.asgi:application', '--worker-class', 'uvicorn_worker.UvicornWorker'],
+}
+
+
+class Command(BaseCommand):
+    help = ("آزمون بار صفحه‌های اصلی با session یک کاربر؛ "
+            "با --compare هر دو حالت wsgi/asgi را پشت سر هم بالا می‌آورد و throughput را مقایسه می‌کند.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', required=True, help='ایمیل کاربر (مثلاً perf0@example.com از seed_perf).')
+        parser.add_argument('--url', default='http://localhost:8000', help='سرور در حال اجرا (بدون --compare).')
+        parser.add_argument('--path', action='append', dest='paths',
+                            help='مسیر درخواست (تکرارپذیر)؛ پیش‌فرض لیست، داشبورد و جزئیات یک تسک.')
+        parser.add_argument('--concurrency', type=int, default=20)
+        parser.add_argument('--duration', type=float, default=10, help='ثانیه برای هر حالت.')
+        parser.add_argument('--compare', action='store_true')
+        parser.add_argument('--workers', type=int, default=int(os.environ.get('WEB_CONCURRENCY', 3)))
+        parser.add_argument('--port', type=int, default=8765, help='پورت سرورهای --compare.')
+
+    def handle(self, *args, **options):
+        user = get_user_model().objects.filter(email=options['user']).first()
+        if user is None:
+            raise CommandError(f"کاربر {options['user']} وجود ندارد.")
+        cookie = f'{settings.SESSION_COOKIE_NAME}={session_for(user)}'
+        paths = options['paths'] or default_paths(user)
+
+        if not options['compare']:
+            result = run_load(options['url'], paths, cookie, options['concurrency'], options['duration'])
+            self.report({'server': result})
+            return
+
+        url = f"http://localhost:{options['port']}"
+        results = {}
+        for mode, command in SERVERS.items():
+            self.stdout.write(f"{mode}: {options['workers']} workers, {options['concurrency']} clients, "
+                              f"{options['duration']:g}s ...")
+            with Server(command, options['port'], options['workers']):
+                run_load(url, paths, cookie, options['concurrency'], 1)  # گرم کردن
+                results[mode] = run_load(url, paths, cookie, options['concurrency'], options['duration'])
+        self.report(results)
+
+    def report(self, results):
+        self.stdout.write(f"{'mode':<8} {'requests':>9} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} "
+                          f"{'p99 ms':>8} {'errors':>7}")
+        for mode, r in results.items():
+            self.stdout.write(f"{mode:<8} {r['requests']:>9} {r['rps']:>9.1f} {r['p50']:>8.1f} "
+                              f"{r['p95']:>8.1f} {r['p99']:>8.1f} {r['errors']:>7}")
+        if len(results) == 2 and results['wsgi']['rps']:
+            ratio = results['asgi']['rps'] / results['wsgi']['rps']
+            self.stdout.write(self.style.SUCCESS(f"asgi/wsgi throughput: {ratio:.2f}x"))
+
+
+def session_for(user):
+    """session معتبر بدون رمز عبور (مثل Client.force_login)."""
+    session = import_module(settings.SESSION_ENGINE).SessionStore()
+    session[SESSION_KEY] = user._meta.pk.value_to_string(user)
+    session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+    session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+    session.save()
+    return session.session_key
+
+
+def default_paths(user):
+    paths = ['/todos/', '/todos/?sort=due', '/dashboard/']
+    todo = Todo.objects.filter(profile__user=user).order_by('-pk').first()
+    if todo is not None:
+        paths.append(f'/todos/{todo.pk}/')
+    return paths
+
+
+def run_load(url, paths, cookie, concurrency, duration):
+    """concurrency thread با اتصال keep-alive؛ هر کدام مسیرها را به نوبت درخواست می‌کند."""
+    parts = urlsplit(url)
+    deadline = time.perf_counter() + duration
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+
+    def client(offset):
+        conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=30)
+        mine, failed, i = [], 0, offset
+        while time.perf_counter() < deadline:
+            path = paths[i % len(paths)]
+            i += 1
+            start = time.perf_counter()
+            try:
+                conn.request('GET', path, headers={'Cookie': cookie})
+                response = conn.getresponse()
+                response.read()
+                if response.status != 200:
+                    failed += 1
+            except (OSError, http.client.HTTPException):
+                failed += 1
+                conn.close()
+                continue
+            mine.append(time.perf_counter() - start)
+        conn.close()
+        with lock:
+            latencies.extend(mine)
+            errors[0] += failed
+
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(concurrency)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    ms = sorted(x * 1000 for x in latencies) or [0]
+    q = statistics.quantiles(ms, n=100) if len(ms) > 1 else ms * 99
+    return {
+        'requests': len(latencies),
+        'rps': len(latencies) / elapsed,
+        'p50': q[49],
+        'p95': q[94],
+        'p99': q[98],
+        'errors': errors[0],
+    }
+
+
+class Server:
+    """اجرای gunicorn در پس‌زمینه تا وقتی پورت باز شود؛ با خروج از with متوقف می‌شود."""
+
+    def __init__(self, command, port, workers):
+        self.args = [*command, '--bind', f'127.0.0.1:{port}', '--workers', str(workers), '--log-level', 'warning']
+        self.port = port
+
+    def __enter__(self):
+        self.process = subprocess.Popen(self.args, cwd=settings.BASE_DIR, stdout=sys.stderr)
+        for _ in range(300):
+            if self.process.poll() is not None:
+                raise CommandError(f"{' '.join(self.args)} exited with {self.process.returncode}")
+            try:
+                socket.create_connection(('127.0.0.1', self.port), timeout=0.2).close()
+                return self
+            except OSError:
+                time.sleep(0.1)
+        self.process.terminate()
+        raise CommandError('server did not start')
+
+    def __exit__(self, *exc):
+        self.process.terminate()
+        self.process.wait(timeout=30)
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+
+from core.perf import METRICS, clear_published, collect, summarize
+
+
+class Command(BaseCommand):
+    help = "گزارش تعداد کوئری و زمان هر view از نمونه‌های PerfMiddleware (نیازمند کش مشترک)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sort', choices=METRICS, default='total_ms',
+                            help='مرتب‌سازی بر اساس p95 این معیار.')
+        parser.add_argument('--limit', type=int, default=0)
+        parser.add_argument('--reset', action='store_true', help='بعد از گزارش نمونه‌ها را پاک کن.')
+
+    def handle(self, *args, sort='total_ms', limit=0, reset=False, **options):
+        report = summarize(collect(include_local=False))
+        if not report:
+            self.stdout.write("هیچ نمونه‌ای نیست؛ PERF_INSTRUMENTATION و CACHE_URL مشترک را بررسی کنید.")
+            return
+
+        rows = sorted(report.items(), key=lambda kv: kv[1][sort]['p95'] or 0, reverse=True)
+        if limit:
+            rows = rows[:limit]
+
+        header = f"{'view':<32} {'n':>6}" + ''.join(f" {m + ' p50/p95/p99':>26}" for m in METRICS)
+        self.stdout.write(header)
+        for view, row in rows:
+            cells = ''.join(
+                " {:>26}".format('/'.join(_fmt(row[m][f'p{p}']) for p in (50, 95, 99)))
+                for m in METRICS
+            )
+            self.stdout.write(f"{view:<32} {row['count']:>6}{cells}")
+
+        if reset:
+            clear_published()
+            self.stdout.write(self.style.SUCCESS("نمونه‌ها پاک شدند."))
+
+
+def _fmt(value):
+    if value is None:
+        return '-'
+    return f'{value:g}' if isinstance(value, int) else f'{value:.1f}'
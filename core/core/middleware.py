@@ -0,0 +1,135 @@
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from .perf import query_budget, recorder
+
+logger = logging.getLogger('core.perf')
+
+
+class PerfMiddleware:
+    """
+    تعداد کوئری، زمان SQL، زمان رندر تمپلیت و زمان کل هر درخواست به تفکیک نام URL.
+    فقط با PERF_INSTRUMENTATION=True فعال می‌شود.
+
+    زمان رندر فقط برای TemplateResponse (همهٔ CBVها) اندازه‌گیری می‌شود.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'PERF_INSTRUMENTATION', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        stats, wrapper = self._start(request)
+        start = time.perf_counter()
+        self._wrap(wrapper)
+        try:
+            response = self.get_response(request)
+        finally:
+            self._unwrap(wrapper)
+        return self._finish(request, response, stats, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        stats, wrapper = self._start(request)
+        start = time.perf_counter()
+        # اتصال‌های دیتابیس مال هر thread هستند؛ ORM async و رندر تمپلیتِ این درخواست
+        # در thread همگام همین درخواست (thread_sensitive) اجرا می‌شوند
+        await sync_to_async(self._wrap)(wrapper)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(self._unwrap)(wrapper)
+        return self._finish(request, response, stats, time.perf_counter() - start)
+
+    def _start(self, request):
+        stats = {'queries': 0, 'sql': 0.0, 'template': 0.0}
+
+        def wrapper(execute, sql, params, many, context):
+            start = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                stats['sql'] += time.perf_counter() - start
+                stats['queries'] += 1
+
+        request._perf = stats
+        return stats, wrapper
+
+    def _wrap(self, wrapper):
+        for conn in connections.all(initialized_only=False):
+            conn.execute_wrappers.append(wrapper)
+
+    def _unwrap(self, wrapper):
+        for conn in connections.all(initialized_only=False):
+            if wrapper in conn.execute_wrappers:
+                conn.execute_wrappers.remove(wrapper)
+
+    def _finish(self, request, response, stats, total):
+        match = getattr(request, 'resolver_match', None)
+        if match is None or not match.view_name:
+            return response
+        view = match.view_name
+        recorder.record(
+            view,
+            queries=stats['queries'],
+            sql_ms=round(stats['sql'] * 1000, 2),
+            template_ms=round(stats['template'] * 1000, 2),
+            total_ms=round(total * 1000, 2),
+        )
+
+        budget = query_budget(view)
+        if budget is not None and stats['queries'] > budget:
+            logger.warning('%s ran %d queries (budget %d): %s',
+                           view, stats['queries'], budget, request.get_full_path())
+        return response
+
+    def process_template_response(self, request, response):
+        stats = request._perf
+        start = time.perf_counter()
+
+        def done(rendered):
+            stats['template'] += time.perf_counter() - start
+
+        response.add_post_render_callback(done)
+        return response
+
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoise با پشتیبانی async؛ middleware همگام وسط زنجیره زیر ASGI هر درخواست
+    (و viewهای async) را به thread می‌برد.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, settings=settings):
+        super().__init__(get_response, settings)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = self.find_file(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return self.serve(static_file, request)
+        return await self.get_response(request)
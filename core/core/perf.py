@@ -0,0 +1,132 @@
+"""
+اندازه‌گیری تعداد کوئری و زمان هر view (PerfMiddleware در core/middleware.py).
+
+برای هر نام URL یک پنجرهٔ چرخشی از آخرین PERF_SAMPLE_SIZE درخواست در حافظهٔ
+همان پروسه نگه داشته می‌شود. هر پروسه نمونه‌هایش را هر PERF_PUBLISH_INTERVAL
+ثانیه در کش پیش‌فرض هم می‌نویسد تا `manage.py perfreport` و endpoint کارکنان
+گزارش همهٔ workerها را ببینند (فقط با کش مشترک مثل redis/filecache).
+"""
+import os
+import socket
+import threading
+import time
+from collections import defaultdict, deque
+
+from django.conf import settings
+from django.core.cache import cache
+
+METRICS = ('queries', 'sql_ms', 'template_ms', 'total_ms')
+PERCENTILES = (50, 95, 99)
+
+PROCESS_KEY = f'core:perf:{socket.gethostname()}:{os.getpid()}'
+PROCESSES_KEY = 'core:perf:processes'
+
+
+def sample_size():
+    return getattr(settings, 'PERF_SAMPLE_SIZE', 1000)
+
+
+def percentile(ordered, p):
+    """nearest-rank روی لیست مرتب."""
+    if not ordered:
+        return None
+    k = max(0, min(len(ordered) - 1, round(p / 100 * len(ordered) + 0.5) - 1))
+    return ordered[k]
+
+
+def summarize(samples):
+    """
+    samples: {view: {metric: [values]}} -> {view: {'count': n, metric: {'p50': .., 'p95': .., 'p99': .., 'max': ..}}}
+    """
+    report = {}
+    for view, metrics in samples.items():
+        row = {'count': len(metrics.get('total_ms') or [])}
+        for metric in METRICS:
+            ordered = sorted(metrics.get(metric) or [])
+            row[metric] = {f'p{p}': percentile(ordered, p) for p in PERCENTILES}
+            row[metric]['max'] = ordered[-1] if ordered else None
+        report[view] = row
+    return report
+
+
+def publish_process(registry_key, process_key, value):
+    """
+    نوشتن دادهٔ این پروسه (با timeout) و ثبت کلیدش در فهرست پروسه‌ها. کلید پروسه‌هایی که
+    دیگر منتشر نمی‌کنند (restart، کم شدن workerها) منقضی شده و همین‌جا از فهرست حذف می‌شود.
+    """
+    timeout = max(getattr(settings, 'PERF_PUBLISH_INTERVAL', 30) * 10, 300)
+    cache.set(process_key, value, timeout)
+    registered = set(cache.get(registry_key) or ())
+    processes = set(cache.get_many(registered)) | {process_key}
+    if processes != registered:
+        cache.set(registry_key, sorted(processes), None)
+
+
+class Recorder:
+    """نمونه‌های این پروسه؛ thread-safe."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._samples = defaultdict(lambda: {m: deque(maxlen=sample_size()) for m in METRICS})
+        self._published_at = 0.0
+
+    def record(self, view, **values):
+        with self._lock:
+            bucket = self._samples[view]
+            for metric in METRICS:
+                bucket[metric].append(values[metric])
+        self.maybe_publish()
+
+    def snapshot(self):
+        with self._lock:
+            return {view: {m: list(d) for m, d in metrics.items()} for view, metrics in self._samples.items()}
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+        cache.delete(PROCESS_KEY)
+
+    def maybe_publish(self):
+        interval = getattr(settings, 'PERF_PUBLISH_INTERVAL', 30)
+        now = time.monotonic()
+        if now - self._published_at < interval:
+            return
+        self._published_at = now
+        self.publish()
+
+    def publish(self):
+        publish_process(PROCESSES_KEY, PROCESS_KEY, self.snapshot())
+
+
+recorder = Recorder()
+
+
+def collect(include_local=True):
+    """نمونه‌های همهٔ پروسه‌هایی که در کش منتشر کرده‌اند (+ همین پروسه)."""
+    merged = defaultdict(lambda: defaultdict(list))
+    keys = list(cache.get(PROCESSES_KEY) or ())
+    if include_local:
+        # نسخهٔ تازهٔ همین پروسه به‌جای آخرین نسخهٔ منتشرشده
+        keys = [k for k in keys if k != PROCESS_KEY]
+    snapshots = list(cache.get_many(keys).values())
+    if include_local:
+        snapshots.append(recorder.snapshot())
+    for snap in snapshots:
+        for view, metrics in snap.items():
+            for metric, values in metrics.items():
+                merged[view][metric].extend(values)
+    return merged
+
+
+def clear_published():
+    keys = list(cache.get(PROCESSES_KEY) or ())
+    cache.delete_many(keys + [PROCESSES_KEY])
+    recorder.reset()
+
+
+def query_budget(view):
+    """PERF_QUERY_BUDGET: عدد (برای همهٔ viewها) یا {'todos:list': 8, '*': 20}."""
+    budget = getattr(settings, 'PERF_QUERY_BUDGET', None)
+    if isinstance(budget, dict):
+        return budget.get(view, budget.get('*'))
+    return budget
@@ -0,0 +1,163 @@
+"""
+pub/sub درون‌پروسه‌ای برای رویدادهای لحظه‌ای (SSE روی core.asgi).
+
+    broker = get_broker()
+    broker.publish('todos.42', {...})            # از هر thread (سیگنال‌ها، sync_to_async)
+    async with broker.subscribe('todos.42') as sub:
+        message = await sub.get()                 # داخل event loop
+
+backend با REALTIME_BROKER انتخاب می‌شود:
+  - core.pubsub.LocalBroker: فقط همان پروسه (runserver / یک worker)
+  - core.pubsub.PostgresBroker: NOTIFY/LISTEN روی همان PostgreSQL؛ برای چند worker/سرور.
+    هر پروسه یک اتصال LISTEN دارد و پیام‌ها را بین مشترک‌های محلی پخش می‌کند.
+
+پیام‌ها dict قابل JSON هستند و باید کوچک بمانند (سقف payload در NOTIFY حدود ۸ کیلوبایت است).
+"""
+import asyncio
+import json
+import logging
+import threading
+from collections import defaultdict
+from functools import cache
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+QUEUE_SIZE = 100
+
+# پیام جایگزین وقتی صف یک مشترک کند پر شده؛ مشترک باید وضعیت را از نو بخواند
+OVERFLOW = {'reset': True}
+
+
+class Subscription:
+    def __init__(self, broker, channel):
+        self.broker = broker
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+
+    async def get(self):
+        return await self.queue.get()
+
+    def _put(self, message):
+        # فقط داخل loop همین مشترک اجرا می‌شود
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(OVERFLOW)
+
+    async def __aenter__(self):
+        await self.broker._add(self)
+        return self
+
+    async def __aexit__(self, *exc):
+        self.broker._remove(self)
+
+
+class LocalBroker:
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, channel):
+        return Subscription(self, channel)
+
+    def publish(self, channel, message):
+        self._dispatch(channel, message)
+
+    def _dispatch(self, channel, message):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for sub in subscribers:
+            try:
+                sub.loop.call_soon_threadsafe(sub._put, message)
+            except RuntimeError:
+                # loop بسته شده؛ __aexit__ دیگر اجرا نمی‌شود
+                self._remove(sub)
+
+    async def _add(self, sub):
+        with self._lock:
+            self._subscribers[sub.channel].add(sub)
+
+    def _remove(self, sub):
+        with self._lock:
+            subscribers = self._subscribers.get(sub.channel)
+            if subscribers is not None:
+                subscribers.discard(sub)
+                if not subscribers:
+                    del self._subscribers[sub.channel]
+
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(s) for s in self._subscribers.values())
+
+
+class PostgresBroker(LocalBroker):
+    """
+    publish با pg_notify روی اتصال معمولی جنگو؛ اگر داخل تراکنش باشد با commit تحویل می‌شود.
+    اولین subscribe در هر event loop یک task شنونده (اتصال async جدا با autocommit) راه می‌اندازد.
+    """
+    pg_channel = 'realtime'
+    reconnect_delay = 2
+
+    def __init__(self, using='default'):
+        super().__init__()
+        self.using = using
+        self._listeners = {}
+
+    def publish(self, channel, message):
+        from django.db import connections
+
+        payload = json.dumps({'c': channel, 'm': message}, separators=(',', ':'))
+        with connections[self.using].cursor() as cursor:
+            cursor.execute('SELECT pg_notify(%s, %s)', [self.pg_channel, payload])
+
+    async def _add(self, sub):
+        await super()._add(sub)
+        task = self._listeners.get(sub.loop)
+        if task is None or task.done():
+            self._listeners[sub.loop] = sub.loop.create_task(self._listen())
+
+    def _conninfo(self):
+        from django.db import connections
+
+        params = connections[self.using].get_connection_params()
+        keys = ('dbname', 'user', 'password', 'host', 'port', 'sslmode', 'options')
+        return {k: params[k] for k in keys if params.get(k)}
+
+    async def _listen(self):
+        import psycopg
+
+        while True:
+            try:
+                conn = await psycopg.AsyncConnection.connect(autocommit=True, **self._conninfo())
+                async with conn:
+                    await conn.execute(f'LISTEN {self.pg_channel}')
+                    async for notify in conn.notifies():
+                        try:
+                            data = json.loads(notify.payload)
+                        except ValueError:
+                            continue
+                        self._dispatch(data['c'], data['m'])
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception('realtime listener failed; reconnecting')
+            # پیام‌های بین قطع و وصل از دست رفته‌اند
+            self._broadcast(OVERFLOW)
+            await asyncio.sleep(self.reconnect_delay)
+
+    def _broadcast(self, message):
+        with self._lock:
+            channels = list(self._subscribers)
+        for channel in channels:
+            self._dispatch(channel, message)
+
+
+@cache
+def get_broker():
+    return import_string(getattr(settings, 'REALTIME_BROKER', 'core.pubsub.LocalBroker'))()
@@ -50,12 +50,16 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
+    'core',
     'accounts',
     'django_filters',
     'todos',
 ]
 
 MIDDLEWARE = [
+    # اول لیست: زمان کل همهٔ middlewareها را هم بشمارد (core/perf.py)
+    'core.middleware.PerfMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -77,6 +81,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'accounts.context_processors.profile',
             ],
         },
     },
@@ -88,17 +93,114 @@ WSGI_APPLICATION = 'core.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.postgresql",
-        "NAME": env("POSTGRES_DB"),
-        "USER": env("POSTGRES_USER"),
-        "PASSWORD": env("POSTGRES_PASSWORD"),
-        "HOST": env("POSTGRES_HOST", default="db"),
-        "PORT": env("POSTGRES_PORT", default="5432"),
+if env("DATABASE_URL", default=""):
+    # مثلاً DATABASE_URL=sqlite:///bench.sqlite3 برای اجرای بنچمارک بدون PostgreSQL
+    DATABASES = {"default": env.db("DATABASE_URL")}
+else:
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.postgresql",
+            "NAME": env("POSTGRES_DB"),
+            "USER": env("POSTGRES_USER"),
+            "PASSWORD": env("POSTGRES_PASSWORD"),
+            "HOST": env("POSTGRES_HOST", default="db"),
+            "PORT": env("POSTGRES_PORT", default="5432"),
+        }
+    }
+
+# اتصال‌های دیتابیس: روی PostgreSQL پول اتصال psycopg 3 در هر پروسه (OPTIONS["pool"]).
+# DB_MAX_CONNECTIONS سقف کل اتصال‌های سرور وب است و بین WEB_CONCURRENCY پروسه تقسیم می‌شود
+# (برای worker یادآوری، admin و ... زیر max_connections خود PostgreSQL جا بگذارید).
+WEB_CONCURRENCY = env.int("WEB_CONCURRENCY", default=3)
+DB_MAX_CONNECTIONS = env.int("DB_MAX_CONNECTIONS", default=60)
+DB_POOL = env.bool("DB_POOL", default=True)
+DB_POOL_MIN_SIZE = env.int("DB_POOL_MIN_SIZE", default=2)
+DB_POOL_MAX_SIZE = env.int("DB_POOL_MAX_SIZE",
+                           default=max(DB_POOL_MIN_SIZE, DB_MAX_CONNECTIONS // max(WEB_CONCURRENCY, 1)))
+
+DATABASES["default"]["CONN_HEALTH_CHECKS"] = env.bool("DB_HEALTH_CHECKS", default=True)
+if DB_POOL and DATABASES["default"]["ENGINE"] == "django.db.backends.postgresql":
+    DATABASES["default"].setdefault("OPTIONS", {})["pool"] = {
+        "min_size": DB_POOL_MIN_SIZE,
+        "max_size": DB_POOL_MAX_SIZE,
+        # انتظار برای اتصال آزاد؛ بعد از آن PoolTimeout (خطای 500) به‌جای صف بی‌پایان
+        "timeout": env.float("DB_POOL_TIMEOUT", default=10),
+        "max_idle": env.float("DB_POOL_MAX_IDLE", default=600),
+        "max_lifetime": env.float("DB_POOL_MAX_LIFETIME", default=3600),
     }
+    # پول با اتصال‌های ماندگار جنگو سازگار نیست
+    DATABASES["default"]["CONN_MAX_AGE"] = 0
+else:
+    DATABASES["default"]["CONN_MAX_AGE"] = env.int("CONN_MAX_AGE", default=60)
+
+
+# Cache
+# locmem پیش‌فرض فقط برای یک پروسه (runserver/تست‌ها)؛ با چند worker کش باید مشترک باشد
+# (core/checks.py, core.W002)، مثلاً CACHE_URL=redis://redis:6379/1 که compose.yaml تنظیم می‌کند
+CACHES = {
+    "default": env.cache("CACHE_URL", default="locmemcache://"),
 }
 
+# session: db (پیش‌فرض با کش locmem)، cached_db (خواندن از کش، نوشتن در هر دو) یا cache (فقط کش؛
+# با پاک شدن کش کاربران خارج می‌شوند). cache/cached_db فقط با کش مشترک بین workerها (CACHE_URL).
+SESSION_BACKEND = env.str(
+    "SESSION_BACKEND",
+    default="db" if CACHES["default"]["BACKEND"].endswith(".LocMemCache") else "cached_db",
+)
+SESSION_ENGINE = f"django.contrib.sessions.backends.{SESSION_BACKEND}"
+
+# بخشی از ETag لیست/جزئیات تسک (todos/conditional.py)؛ با هر deploy عوض شود (مثلاً git SHA)
+# تا مرورگرها HTML تمپلیت‌های قدیمی را با 304 نگه ندارند
+HTTP_CACHE_VERSION = env.str("HTTP_CACHE_VERSION", default="")
+
+# کش fragment ردیف‌های تسک (todos/fragments.py)
+TODO_FRAGMENT_CACHE_TIMEOUT = env.int("TODO_FRAGMENT_CACHE_TIMEOUT", default=60 * 60 * 24)
+
+# کش شمارش استفادهٔ تگ‌ها (Tag.objects.usage_for)؛ با تغییر تگ/تسک باطل می‌شود
+TODO_TAG_USAGE_CACHE_TIMEOUT = env.int("TODO_TAG_USAGE_CACHE_TIMEOUT", default=60 * 60)
+
+
+# تعداد threadهای ساخت نسخه‌های آواتار در هر پروسه (accounts/avatars.py)؛ 0 = همان لحظه
+AVATAR_WORKERS = env.int("AVATAR_WORKERS", default=2)
+
+# یادآوری سررسید (manage.py run_reminders): چند دقیقه قبل از سررسید، و سررسیدهای قدیمی‌تر
+# از MAX_AGE بدون ایمیل علامت می‌خورند؛ ایمیلی که MAX_ATTEMPTS بار خطا بدهد کنار گذاشته می‌شود.
+# SITE_URL برای لینک‌های داخل ایمیل.
+TODO_REMINDER_LEAD_MINUTES = env.int("TODO_REMINDER_LEAD_MINUTES", default=60)
+TODO_REMINDER_MAX_AGE_HOURS = env.int("TODO_REMINDER_MAX_AGE_HOURS", default=24)
+TODO_REMINDER_MAX_ATTEMPTS = env.int("TODO_REMINDER_MAX_ATTEMPTS", default=3)
+SITE_URL = env.str("SITE_URL", default="http://localhost:8000")
+
+# ضمیمه‌ها (todos/attachments.py): آپلود تکه‌ای در فایل موقت، سپس انتقال به storage
+ATTACHMENT_MAX_SIZE = env.int("ATTACHMENT_MAX_SIZE", default=50 * 1024 * 1024)
+ATTACHMENT_CHUNK_SIZE = env.int("ATTACHMENT_CHUNK_SIZE", default=1024 * 1024)
+ATTACHMENT_MAX_CHUNK = env.int("ATTACHMENT_MAX_CHUNK", default=8 * 1024 * 1024)
+ATTACHMENT_UPLOAD_TEMP_DIR = env.str("ATTACHMENT_UPLOAD_TEMP_DIR", default=str(BASE_DIR / "uploads_tmp"))
+# دانلود با وب‌سرور، مثلاً X-Accel-Redirect (nginx) با PREFIX=/protected/ یا X-Sendfile؛ خالی = FileResponse
+ATTACHMENT_SENDFILE_HEADER = env.str("ATTACHMENT_SENDFILE_HEADER", default="")
+ATTACHMENT_SENDFILE_PREFIX = env.str("ATTACHMENT_SENDFILE_PREFIX", default="")
+
+# سطل زباله (todos/trash.py): حذف تسک فقط deleted_at را پر می‌کند؛ manage.py purge_trash بعد از
+# این تعداد روز حذف قطعی می‌کند و آپلودهای نیمه‌کارهٔ بی‌تحرک‌تر از EXPIRY_HOURS را دور می‌ریزد
+TODO_TRASH_RETENTION_DAYS = env.int("TODO_TRASH_RETENTION_DAYS", default=30)
+TODO_UPLOAD_EXPIRY_HOURS = env.int("TODO_UPLOAD_EXPIRY_HOURS", default=24)
+
+# آرشیو خودکار (manage.py archive_todos): تسک‌های انجام‌شده بعد از این تعداد روز به پارتیشن آرشیو
+# می‌روند (todos/archiving.py)؛ 0 = خاموش
+TODO_AUTO_ARCHIVE_DAYS = env.int("TODO_AUTO_ARCHIVE_DAYS", default=0)
+
+# رویدادهای لحظه‌ای صفحهٔ لیست (SSE، فقط زیر ASGI): core.pubsub.LocalBroker برای یک پروسه،
+# core.pubsub.PostgresBroker (NOTIFY/LISTEN) برای چند worker
+REALTIME_BROKER = env.str("REALTIME_BROKER", default="core.pubsub.LocalBroker")
+REALTIME_KEEPALIVE = env.int("REALTIME_KEEPALIVE", default=20)
+
+# اندازه‌گیری کوئری/زمان هر view (core/middleware.py)؛ گزارش: /_perf/ و manage.py perfreport
+PERF_INSTRUMENTATION = env.bool("PERF_INSTRUMENTATION", default=False)
+PERF_SAMPLE_SIZE = env.int("PERF_SAMPLE_SIZE", default=1000)
+PERF_PUBLISH_INTERVAL = env.int("PERF_PUBLISH_INTERVAL", default=30)
+# هشدار در لاگ core.perf وقتی تعداد کوئری یک view از این بیشتر شود (خالی = غیرفعال)
+PERF_QUERY_BUDGET = env.int("PERF_QUERY_BUDGET", default=None)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -136,19 +238,28 @@ USE_TZ = True
 
 STATIC_URL = "static/"
 STATIC_ROOT = BASE_DIR / "staticfiles"
+# css/app.css و fonts/ خروجی npm run build هستند (package.json، tailwind.config.js)
+STATICFILES_DIRS = [BASE_DIR / "static"]
 
 MEDIA_URL = "media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
 # برای تولید (prod)
-MIDDLEWARE.insert(1, "whitenoise.middleware.WhiteNoiseMiddleware")
+MIDDLEWARE.insert(MIDDLEWARE.index("django.middleware.security.SecurityMiddleware") + 1,
+                  "core.middleware.StaticFilesMiddleware")
+
+# نام‌های hash‌دار (app.abc123.css) که whitenoise با Cache-Control یک‌ساله و immutable می‌فرستد؛
+# فقط وقتی manifest با collectstatic ساخته می‌شود (entrypoint.sh با DJANGO_COLLECTSTATIC=1).
+# بدون آن (runserver، manage.py test با هر DEBUG) فایل‌ها مستقیم از STATICFILES_DIRS خوانده می‌شوند.
+STATIC_MANIFEST = env.bool("DJANGO_STATIC_MANIFEST", default=env.bool("DJANGO_COLLECTSTATIC", default=False))
 
 STORAGES = {
     "default": {
         "BACKEND": "django.core.files.storage.FileSystemStorage",
     },
     "staticfiles": {
-        "BACKEND": "whitenoise.storage.CompressedManifestStaticFilesStorage",
+        "BACKEND": ("whitenoise.storage.CompressedManifestStaticFilesStorage" if STATIC_MANIFEST
+                    else "django.contrib.staticfiles.storage.StaticFilesStorage"),
     },
 }
 
@@ -159,6 +270,13 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 AUTH_USER_MODEL = 'accounts.User'
 
+# کاربر و پروفایل در یک کوئری (accounts/auth.py)؛ ModelBackend برای sessionهایی که پیش از آن
+# ساخته شده‌اند (مسیر backend در session ذخیره است و بدون آن کاربر خارج می‌شود)
+AUTHENTICATION_BACKENDS = [
+    'accounts.auth.ProfileModelBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+
 
 # ورود/خروج
 LOGIN_URL = "accounts:login"
@@ -0,0 +1,40 @@
+"""
+پاسخ جریانی که زیر ASGI هم جریانی بماند (خروجی تسک‌ها، دانلود ضمیمه).
+
+StreamingHttpResponse زیر ASGI iterator همگام را با sync_to_async(list) یکجا می‌خواند: کل
+خروجی در حافظه و اولین بایت بعد از آخرین ردیف. برای درخواست ASGI همان iterator با aiter_sync
+تکه‌تکه در thread همان درخواست (thread_sensitive؛ همان اتصال دیتابیس و cursor) خوانده می‌شود.
+زیر WSGI iterator دست‌نخورده به StreamingHttpResponse می‌رسد.
+"""
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+
+
+def _take(iterator, n):
+    return list(islice(iterator, n))
+
+
+async def aiter_sync(iterator, batch=1):
+    """
+    iterator همگام (str یا bytes) -> async iterator؛ هر بار batch تکه با یک رفت‌وبرگشت به thread
+    خوانده و به‌صورت یک تکهٔ پاسخ فرستاده می‌شود. با پایان یا قطع اتصال close() همان iterator
+    صدا زده می‌شود (بستن فایل / cursor سمت سرور).
+    """
+    take = sync_to_async(_take)
+    try:
+        while parts := await take(iterator, batch):
+            yield parts[0][:0].join(parts)
+    finally:
+        close = getattr(iterator, 'close', None)
+        if close is not None:
+            await sync_to_async(close)()
+
+
+def streaming_response(request, iterator, batch=1, **kwargs):
+    """StreamingHttpResponse؛ زیر ASGI با aiter_sync."""
+    if isinstance(request, ASGIRequest):
+        iterator = aiter_sync(iter(iterator), batch)
+    return StreamingHttpResponse(iterator, **kwargs)
@@ -3,9 +3,13 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
+from .views import db_pool_report, perf_report
+
 urlpatterns = [
     path("", include("todos.urls_site", namespace="site")),
     path('admin/', admin.site.urls),
+    path('_perf/', perf_report, name='perf_report'),
+    path('_dbpool/', db_pool_report, name='db_pool_report'),
     path('accounts/', include('accounts.urls')),
     path('todos/', include('todos.urls', namespace='todos')),
 ]
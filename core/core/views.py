@@ -0,0 +1,22 @@
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse
+
+from . import dbpool
+from .perf import clear_published, collect, summarize
+
+
+@staff_member_required
+def perf_report(request):
+    """
+    گزارش p50/p95/p99 هر view (فقط کارکنان). POST با reset=1 نمونه‌ها را پاک می‌کند.
+    """
+    if request.method == 'POST' and request.POST.get('reset') == '1':
+        clear_published()
+    report = summarize(collect())
+    return JsonResponse({'views': report}, json_dumps_params={'ensure_ascii': False})
+
+
+@staff_member_required
+def db_pool_report(request):
+    """آمار پول اتصال دیتابیس همهٔ workerها (core/dbpool.py؛ فقط کارکنان)."""
+    return JsonResponse(dbpool.report())
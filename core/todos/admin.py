@@ -1,6 +1,9 @@
 from django.contrib import admin
-from .models import Tag, Todo, Attachment
+from .models import Tag, Todo, Attachment, AttachmentUpload, ProfileTodoStats, SavedFilter
 
 admin.site.register(Tag)
 admin.site.register(Todo)
 admin.site.register(Attachment)
+admin.site.register(ProfileTodoStats)
+admin.site.register(AttachmentUpload)
+admin.site.register(SavedFilter)
@@ -0,0 +1,352 @@
+"""
+JSON API نسخهٔ ۱ تسک‌ها (viewهای async روی core.asgi).
+
+احراز هویت همان session سایت است (و در نتیجه CSRF برای درخواست‌های نوشتنی لازم است).
+کار با فرم‌ها و تراکنش‌ها sync است و با sync_to_async اجرا می‌شود.
+"""
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.forms.models import model_to_dict
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.views import View
+
+from accounts.auth import aget_profile
+from core.pubsub import get_broker
+from . import attachments, events
+from .filters import filter_todos
+from .forms import TodoForm
+from .models import AttachmentUpload, Todo
+from .pagination import InvalidCursor, KeysetPaginator, approximate_count
+from .serializers import todo_to_dict
+from . import services
+from .retry import retry_on_serialization_failure
+
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+MAX_BULK_ITEMS = 500
+
+
+class ApiError(Exception):
+    def __init__(self, message, status=400, **extra):
+        super().__init__(message)
+        self.status = status
+        self.payload = {'error': message, **extra}
+
+
+class ApiView(View):
+    """
+    پایهٔ viewهای API: کاربر/پروفایل را async بار می‌کند و ApiError را به JSON تبدیل می‌کند.
+    """
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            self.profile = await aget_profile(request)
+            if self.profile is None:
+                raise ApiError('احراز هویت لازم است.', status=401)
+            return await super().dispatch(request, *args, **kwargs)
+        except ApiError as e:
+            return JsonResponse(e.payload, status=e.status, json_dumps_params={'ensure_ascii': False})
+
+    def respond(self, data, status=200):
+        return JsonResponse(data, status=status, safe=False, json_dumps_params={'ensure_ascii': False})
+
+    def get_queryset(self):
+        return Todo.objects.filter(profile=self.profile).prefetch_related('tags')
+
+    async def get_object(self, pk):
+        try:
+            return await self.get_queryset().aget(pk=pk)
+        except Todo.DoesNotExist:
+            raise ApiError('تسک پیدا نشد.', status=404)
+
+    def parse_body(self):
+        try:
+            return json.loads(self.request.body or b'null')
+        except (ValueError, UnicodeDecodeError):
+            raise ApiError('بدنهٔ درخواست JSON معتبر نیست.')
+
+    def build_form(self, payload, instance=None, partial=True):
+        """
+        TodoForm برای اعتبارسنجی؛ در ویرایش جزئی (PATCH) فیلدهای ارسال‌نشده از instance پر می‌شوند.
+        با partial=False (PUT) فقط payload خوانده می‌شود و فیلدهای ارسال‌نشده خالی/پیش‌فرض می‌شوند.
+        """
+        if not isinstance(payload, dict):
+            raise ApiError('هر آیتم باید یک شیء JSON باشد.')
+        data = {}
+        if instance is not None and partial:
+            data = model_to_dict(instance, fields=TodoForm._meta.fields)
+            data['tags'] = [t.pk for t in instance.tags.all()]
+        data.update(payload)
+        return TodoForm(data=data, instance=instance, profile=self.profile)
+
+
+class TodoCollectionApi(ApiView):
+    """GET: لیست با همان فیلترها و cursor صفحهٔ تسک‌ها — POST: ساخت یک تسک."""
+
+    def _page(self, params):
+        try:
+            size = max(1, min(int(params.get('page_size') or PAGE_SIZE), MAX_PAGE_SIZE))
+        except ValueError:
+            raise ApiError('page_size باید عدد صحیح باشد.')
+        qs = filter_todos(self.get_queryset(), params, self.profile)
+        try:
+            page = KeysetPaginator(qs, size).page(params.get('cursor'))
+        except InvalidCursor:
+            raise ApiError('cursor نامعتبر است.')
+        data = {
+            'results': [todo_to_dict(t) for t in page.object_list],
+            'next_cursor': page.next_cursor,
+            'previous_cursor': page.previous_cursor,
+        }
+        if params.get('count') == '1':
+            data['approx_count'] = approximate_count(qs)
+        return data
+
+    async def get(self, request, *args, **kwargs):
+        return self.respond(await sync_to_async(self._page)(request.GET))
+
+    def _create(self, payload):
+        form = self.build_form(payload)
+        if not form.is_valid():
+            raise ApiError('اطلاعات نامعتبر است.', errors=form.errors.get_json_data())
+        obj = form.save()
+        return todo_to_dict(self.get_queryset().get(pk=obj.pk))
+
+    async def post(self, request, *args, **kwargs):
+        payload = self.parse_body()
+        return self.respond(await sync_to_async(self._create)(payload), status=201)
+
+
+class TodoItemApi(ApiView):
+    """GET / PATCH / PUT / DELETE یک تسک."""
+
+    async def get(self, request, pk, *args, **kwargs):
+        return self.respond(todo_to_dict(await self.get_object(pk)))
+
+    def _update(self, obj, payload, partial=True):
+        form = self.build_form(payload, instance=obj, partial=partial)
+        if not form.is_valid():
+            raise ApiError('اطلاعات نامعتبر است.', errors=form.errors.get_json_data())
+        form.save()
+        return todo_to_dict(self.get_queryset().get(pk=obj.pk))
+
+    async def patch(self, request, pk, *args, **kwargs):
+        obj = await self.get_object(pk)
+        return self.respond(await sync_to_async(self._update)(obj, self.parse_body()))
+
+    async def put(self, request, pk, *args, **kwargs):
+        obj = await self.get_object(pk)
+        return self.respond(await sync_to_async(self._update)(obj, self.parse_body(), partial=False))
+
+    async def delete(self, request, pk, *args, **kwargs):
+        obj = await self.get_object(pk)
+        await sync_to_async(services.trash_todo)(obj)
+        return self.respond({'deleted': 1})
+
+
+class TodoToggleApi(ApiView):
+
+    async def post(self, request, pk, *args, **kwargs):
+        obj = await self.get_object(pk)
+        obj.is_done = not obj.is_done
+        await obj.asave()
+        return self.respond(todo_to_dict(obj))
+
+
+class TodoArchiveApi(ApiView):
+
+    async def post(self, request, pk, *args, **kwargs):
+        obj = await self.get_object(pk)
+        obj.archived = True
+        await obj.asave()
+        return self.respond(todo_to_dict(obj))
+
+
+class TodoBulkApi(ApiView):
+    """
+    POST {"create": [{...}], "update": [{"id": 1, ...}], "delete": [2, 3]}
+    همه در یک تراکنش؛ اگر آیتمی نامعتبر باشد هیچ تغییری اعمال نمی‌شود.
+    """
+
+    @retry_on_serialization_failure
+    def _apply(self, payload):
+        if not isinstance(payload, dict):
+            raise ApiError('بدنهٔ درخواست باید یک شیء JSON باشد.')
+        create = payload.get('create') or []
+        update = payload.get('update') or []
+        delete = payload.get('delete') or []
+        if not all(isinstance(x, list) for x in (create, update, delete)):
+            raise ApiError('create / update / delete باید آرایه باشند.')
+        if len(create) + len(update) + len(delete) > MAX_BULK_ITEMS:
+            raise ApiError(f'حداکثر {MAX_BULK_ITEMS} آیتم در هر درخواست.')
+
+        errors = {}
+        create_forms = []
+        for i, item in enumerate(create):
+            form = self.build_form(item)
+            if not form.is_valid():
+                errors.setdefault('create', {})[i] = form.errors.get_json_data()
+            create_forms.append(form)
+
+        # type(...) is int: JSON true/false در پایتون int هستند (True == 1)
+        update_ids = [item.get('id') for item in update if isinstance(item, dict)]
+        instances = self.get_queryset().in_bulk([pk for pk in update_ids if type(pk) is int])
+        update_forms = []
+        for i, item in enumerate(update):
+            pk = item.get('id') if isinstance(item, dict) else None
+            obj = instances.get(pk) if type(pk) is int else None
+            if obj is None:
+                errors.setdefault('update', {})[i] = {'id': [{'message': 'تسک پیدا نشد.', 'code': 'not_found'}]}
+                continue
+            form = self.build_form({k: v for k, v in item.items() if k != 'id'}, instance=obj)
+            if not form.is_valid():
+                errors.setdefault('update', {})[i] = form.errors.get_json_data()
+            update_forms.append(form)
+
+        delete_ids = [pk for pk in delete if type(pk) is int]
+        if len(delete_ids) != len(delete):
+            errors['delete'] = 'شناسه‌ها باید عدد صحیح باشند.'
+
+        if errors:
+            raise ApiError('اطلاعات نامعتبر است.', errors=errors)
+
+        deleted = 0
+        with transaction.atomic():
+            created = services.bulk_create_todos(create_forms)
+            updated = services.bulk_update_todos(update_forms)
+            if delete_ids:
+                deleted = services.trash_todos(
+                    self.profile, Todo.objects.filter(profile=self.profile, pk__in=delete_ids))
+
+        fresh = self.get_queryset().in_bulk([o.pk for o in created + updated])
+        return {
+            'created': [todo_to_dict(fresh[o.pk]) for o in created],
+            'updated': [todo_to_dict(fresh[o.pk]) for o in updated],
+            'deleted': deleted,
+        }
+
+    async def post(self, request, *args, **kwargs):
+        payload = self.parse_body()
+        return self.respond(await sync_to_async(self._apply)(payload))
+
+
+def _upload_state(upload):
+    return {
+        'id': str(upload.pk),
+        'filename': upload.filename,
+        'size': upload.size,
+        'offset': upload.received,
+        'chunk_size': attachments.chunk_size(),
+    }
+
+
+class UploadStartApi(ApiView):
+    """
+    POST {"filename", "size", "content_type"} -> شروع آپلود تکه‌ای برای ضمیمهٔ یک تسک
+    (پروتکل کامل در todos/attachments.py).
+    """
+
+    async def post(self, request, pk, *args, **kwargs):
+        todo = await self.get_object(pk)
+        payload = self.parse_body()
+        if not isinstance(payload, dict):
+            raise ApiError('بدنهٔ درخواست باید یک شیء JSON باشد.')
+        try:
+            upload = await sync_to_async(attachments.start_upload)(
+                todo, payload.get('filename'), payload.get('size'), payload.get('content_type'),
+            )
+        except attachments.UploadError as e:
+            raise ApiError(str(e), status=e.status, **e.extra)
+        return self.respond(_upload_state(upload), status=201)
+
+
+class UploadApi(ApiView):
+    """
+    GET/HEAD: offset فعلی — PATCH: تکهٔ بعدی (بدنهٔ خام، هدر Upload-Offset) — DELETE: لغو.
+    """
+
+    def get_uploads(self):
+        return AttachmentUpload.objects.filter(todo__profile=self.profile, todo__deleted_at__isnull=True)
+
+    async def get_upload(self, upload_id):
+        try:
+            return await self.get_uploads().aget(pk=upload_id)
+        except AttachmentUpload.DoesNotExist:
+            raise ApiError('آپلود پیدا نشد.', status=404)
+
+    async def get(self, request, upload_id, *args, **kwargs):
+        upload = await self.get_upload(upload_id)
+        response = self.respond(_upload_state(upload))
+        response['Upload-Offset'] = upload.received
+        return response
+
+    async def patch(self, request, upload_id, *args, **kwargs):
+        try:
+            offset = int(request.headers['Upload-Offset'])
+            length = int(request.headers['Content-Length'])
+        except (KeyError, ValueError):
+            raise ApiError('هدرهای Upload-Offset و Content-Length لازم است.')
+        todo_ids = Todo.objects.filter(profile=self.profile).values('pk')
+        try:
+            upload, attachment = await sync_to_async(attachments.append_chunk)(
+                upload_id, todo_ids, offset, request, length,
+            )
+        except attachments.UploadError as e:
+            raise ApiError(str(e), status=e.status, **e.extra)
+
+        data = _upload_state(upload)
+        data['id'] = str(upload_id)  # بعد از ساخت ضمیمه ردیف آپلود حذف شده است
+        if attachment is not None:
+            data['attachment'] = {
+                'id': attachment.pk,
+                'name': attachment.display_name,
+                'size': attachment.size,
+                'sha256': attachment.sha256,
+                'url': reverse('todos:attachment_download', args=[attachment.pk]),
+            }
+        response = self.respond(data, status=201 if attachment is not None else 200)
+        response['Upload-Offset'] = upload.received
+        return response
+
+    async def delete(self, request, upload_id, *args, **kwargs):
+        upload = await self.get_upload(upload_id)
+        await sync_to_async(attachments.abort_upload)(upload)
+        return self.respond({'deleted': 1})
+
+
+class EventStreamApi(ApiView):
+    """
+    Server-Sent Events: تغییر تسک‌ها/تگ‌های همین پروفایل (todos/events.py) برای صفحهٔ لیست.
+
+    فقط زیر ASGI؛ زیر WSGI هر اتصال باز یک thread را نگه می‌داشت، پس 204 برمی‌گردد
+    (EventSource دوباره وصل نمی‌شود و صفحه بدون به‌روزرسانی زنده کار می‌کند).
+    """
+    retry_ms = 3000
+
+    async def get(self, request, *args, **kwargs):
+        if not isinstance(request, ASGIRequest):
+            return HttpResponse(status=204)
+        response = StreamingHttpResponse(self.stream(events.channel(self.profile.pk)),
+                                         content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'  # nginx پاسخ را بافر نکند
+        return response
+
+    async def stream(self, channel):
+        keepalive = getattr(settings, 'REALTIME_KEEPALIVE', 20)
+        # با قطع اتصال، جنگو این generator را cancel می‌کند و اشتراک بسته می‌شود
+        async with get_broker().subscribe(channel) as sub:
+            yield f'retry: {self.retry_ms}\n\n'
+            while True:
+                try:
+                    message = await asyncio.wait_for(sub.get(), keepalive)
+                except TimeoutError:
+                    # پراکسی‌ها اتصال بی‌کار را نبندند
+                    yield ': keepalive\n\n'
+                    continue
+                yield f'data: {json.dumps(message)}\n\n'
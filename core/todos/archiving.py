@@ -0,0 +1,77 @@
+"""
+آرشیو خودکار تسک‌های قدیمیِ انجام‌شده (`manage.py archive_todos`).
+
+روی PostgreSQL جدول تسک‌ها بر اساس archived پارتیشن شده است (مایگریشن 0011): لیست‌ها، شمارش‌ها و
+صف‌ها که archived=False دارند فقط todos_todo_active و ایندکس‌های آن را می‌خوانند. این job تسک‌هایی
+را که بیش از TODO_AUTO_ARCHIVE_DAYS روز پیش انجام شده‌اند آرشیو می‌کند تا پارتیشن فعال برای
+کاربران پرکار هم کوچک بماند؛ UPDATE ستون archived ردیف را به todos_todo_archived منتقل می‌کند.
+آرشیو دستی (ArchiveView) و status=archived مثل قبل روی همان جدول کار می‌کنند.
+
+دسته‌ها با SELECT ... FOR UPDATE SKIP LOCKED روی ایندکس جزئی todo_archive_queue_idx برداشته
+می‌شوند؛ چند پروسه همزمان اجرا می‌شوند. ویرایش همزمان روی ردیفی که همین لحظه بین پارتیشن‌ها
+جابه‌جا شده serialization failure می‌دهد؛ تراکنش بیرونی هر مسیر نوشتن تکرار می‌شود
+(todos/retry.py).
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import events
+from .models import ProfileTodoStats, Tag, Todo
+from .retry import retry_on_serialization_failure
+
+BATCH_SIZE = 500
+
+
+def after_days():
+    """0 یعنی آرشیو خودکار خاموش است."""
+    return getattr(settings, 'TODO_AUTO_ARCHIVE_DAYS', 0)
+
+
+def queue(cutoff):
+    # همان شرط ایندکس todo_archive_queue_idx (Todo.objects سطل زباله را کنار می‌گذارد)
+    return Todo.objects.filter(is_done=True, archived=False, completed_at__lt=cutoff)
+
+
+def claim(cutoff, batch_size=BATCH_SIZE):
+    """(id, profile_id) یک دسته؛ باید داخل transaction.atomic صدا زده شود."""
+    return list(queue(cutoff)
+                .select_for_update(skip_locked=True)
+                .order_by('completed_at')
+                .values_list('pk', 'profile_id')[:batch_size])
+
+
+@retry_on_serialization_failure
+def archive_batch(cutoff, batch_size=BATCH_SIZE, now=None):
+    """آرشیو یک دسته. خروجی: تعداد تسک‌ها"""
+    now = now or timezone.now()
+    with transaction.atomic():
+        rows = claim(cutoff, batch_size)
+        if not rows:
+            return 0
+        by_profile = {}
+        for pk, profile_id in rows:
+            by_profile.setdefault(profile_id, []).append(pk)
+        # updated_at: کش ردیف‌ها و ETag لیست باطل شوند
+        Todo.objects.filter(pk__in=[pk for pk, _ in rows]).update(archived=True, updated_at=now)
+        for profile_id, ids in by_profile.items():
+            ProfileTodoStats.objects.apply_delta(profile_id, {'done_count': -len(ids), 'archived_count': len(ids)})
+            Tag.objects.invalidate_usage(profile_id)
+            events.notify(profile_id, 'updated', ids)
+    return len(rows)
+
+
+def archive_done(days=None, batch_size=BATCH_SIZE, dry_run=False, now=None):
+    """همهٔ تسک‌های واجد شرایط، دسته به دسته. خروجی: تعداد تسک‌ها"""
+    now = now or timezone.now()
+    cutoff = now - timedelta(days=after_days() if days is None else days)
+    if dry_run:
+        return queue(cutoff).count()
+    total = 0
+    while True:
+        n = archive_batch(cutoff, batch_size, now)
+        total += n
+        if n < batch_size:
+            return total
@@ -0,0 +1,247 @@
+"""
+آپلود تکه‌ای/ادامه‌دار و دانلود جریانی ضمیمه‌ها.
+
+پروتکل آپلود (JSON API زیر /todos/api/v1/):
+  1. POST   todos/<pk>/uploads/          {"filename", "size", "content_type"} -> {"id", "offset", "chunk_size"}
+  2. PATCH  uploads/<id>/                 بدنهٔ خام تکه + هدر Upload-Offset -> {"offset"}
+  3. GET    uploads/<id>/                 offset فعلی (برای ادامه بعد از قطع اتصال)
+  آخرین تکه ضمیمه را می‌سازد؛ DELETE آپلود نیمه‌کاره را لغو می‌کند.
+
+تکه‌ها از جریان درخواست روی دیسک نوشته و به فایل موقت اضافه می‌شوند (کل فایل در حافظه نمی‌آید).
+در پایان نوع فایل از روی بایت‌های اول بررسی و sha256 محاسبه می‌شود؛ اگر همان محتوا
+قبلاً ذخیره شده باشد ضمیمهٔ جدید به همان فایل اشاره می‌کند.
+"""
+import hashlib
+import os
+import re
+import shutil
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Attachment, AttachmentUpload
+
+COPY_BUFFER = 64 * 1024
+
+# امضای چند بایت اول برای انواع مجاز (بدون وابستگی به libmagic)
+SIGNATURES = {
+    'application/pdf': [b'%PDF-'],
+    'image/png': [b'\x89PNG\r\n\x1a\n'],
+    'image/jpeg': [b'\xff\xd8\xff'],
+    'image/gif': [b'GIF87a', b'GIF89a'],
+    'image/webp': [b'RIFF'],
+    'application/zip': [b'PK\x03\x04'],
+    'application/vnd.openxmlformats-officedocument.wordprocessingml.document': [b'PK\x03\x04'],
+    'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet': [b'PK\x03\x04'],
+}
+TEXT_TYPES = ('text/plain', 'text/csv')
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class UploadError(Exception):
+    def __init__(self, message, status=400, **extra):
+        super().__init__(message)
+        self.status = status
+        self.extra = extra
+
+
+def max_size():
+    return getattr(settings, 'ATTACHMENT_MAX_SIZE', 50 * 1024 * 1024)
+
+
+def chunk_size():
+    return getattr(settings, 'ATTACHMENT_CHUNK_SIZE', 1024 * 1024)
+
+
+def allowed_types():
+    return getattr(settings, 'ATTACHMENT_ALLOWED_TYPES', [*SIGNATURES, *TEXT_TYPES])
+
+
+def temp_path(upload):
+    directory = Path(getattr(settings, 'ATTACHMENT_UPLOAD_TEMP_DIR', settings.BASE_DIR / 'uploads_tmp'))
+    directory.mkdir(parents=True, exist_ok=True)
+    return directory / f'{upload.pk}.part'
+
+
+def chunk_path(upload):
+    """فایل جدای هر درخواست PATCH تا تکه کامل برسد."""
+    return temp_path(upload).with_name(f'{upload.pk}.{uuid.uuid4().hex}.chunk')
+
+
+def start_upload(todo, filename, size, content_type):
+    filename = os.path.basename(str(filename or '')).strip()[:255]
+    if not filename:
+        raise UploadError('نام فایل لازم است.')
+    if type(size) is not int or size <= 0:
+        raise UploadError('اندازهٔ فایل نامعتبر است.')
+    if size > max_size():
+        raise UploadError(f'حداکثر اندازهٔ فایل {max_size() // (1024 * 1024)} مگابایت است.', status=413)
+    content_type = (content_type or '').split(';')[0].strip().lower()
+    if content_type not in allowed_types():
+        raise UploadError('این نوع فایل مجاز نیست.', status=415)
+    upload = AttachmentUpload.objects.create(
+        todo=todo, filename=filename, size=size, content_type=content_type,
+    )
+    temp_path(upload).touch()
+    return upload
+
+
+def append_chunk(upload_pk, todo_ids, offset, stream, length):
+    """
+    تکهٔ بعدی را از stream (request) به فایل موقت اضافه می‌کند.
+    خروجی: (upload، attachment یا None اگر هنوز کامل نشده)
+
+    خواندن از کلاینت (تا ATTACHMENT_MAX_CHUNK) بیرون از تراکنش و بدون قفل در یک فایل جدا
+    انجام می‌شود؛ بعد UPDATE ... SET received = received + n WHERE received = offset تکه را ثبت
+    می‌کند. از دو تکهٔ همزمان با یک offset فقط یکی ثبت می‌شود و دیگری 409 می‌گیرد؛ کپی تکه
+    به انتهای فایل موقت زیر قفل همان UPDATE است (کپی محلی، نه انتظار برای شبکه).
+    """
+    upload = AttachmentUpload.objects.filter(pk=upload_pk, todo_id__in=todo_ids).first()
+    if upload is None:
+        raise UploadError('آپلود پیدا نشد.', status=404)
+    if offset != upload.received:
+        raise UploadError('offset با دادهٔ دریافت‌شده هم‌خوان نیست.', status=409, offset=upload.received)
+    if length is None or length <= 0:
+        raise UploadError('بدنهٔ تکه خالی است.')
+    if length > getattr(settings, 'ATTACHMENT_MAX_CHUNK', 8 * 1024 * 1024):
+        raise UploadError('تکه بیش از حد بزرگ است.', status=413)
+    if offset + length > upload.size:
+        raise UploadError('داده بیشتر از اندازهٔ اعلام‌شده است.', status=413)
+
+    chunk = chunk_path(upload)
+    try:
+        written = 0
+        with open(chunk, 'wb') as out:
+            while written < length:
+                data = stream.read(min(COPY_BUFFER, length - written))
+                if not data:
+                    break
+                out.write(data)
+                written += len(data)
+        if written != length:
+            raise UploadError('تکه ناقص رسید.', offset=offset)
+
+        with transaction.atomic():
+            claimed = (AttachmentUpload.objects.filter(pk=upload.pk, received=offset)
+                       .update(received=F('received') + written, updated_at=timezone.now()))
+            if not claimed:
+                current = AttachmentUpload.objects.filter(pk=upload.pk).values_list('received', flat=True).first()
+                if current is None:
+                    raise UploadError('آپلود پیدا نشد.', status=404)
+                raise UploadError('offset با دادهٔ دریافت‌شده هم‌خوان نیست.', status=409, offset=current)
+            path = temp_path(upload)
+            path.touch(exist_ok=True)
+            with open(path, 'r+b') as out, open(chunk, 'rb') as src:
+                out.truncate(offset)  # بقایای کپی ناقص قبلی
+                out.seek(offset)
+                shutil.copyfileobj(src, out, COPY_BUFFER)
+    finally:
+        chunk.unlink(missing_ok=True)
+
+    upload.received = offset + written
+    # فقط درخواستی که received را به size رساند به اینجا می‌رسد (UPDATE شرطی روی offset)
+    if upload.received < upload.size:
+        return upload, None
+    return upload, finish_upload(upload)
+
+
+def sniff(path, declared):
+    """بررسی نوع واقعی فایل با نوع اعلام‌شده."""
+    with open(path, 'rb') as f:
+        head = f.read(4096)
+    if declared in TEXT_TYPES:
+        if b'\x00' in head:
+            return False
+        try:
+            head.decode('utf-8')
+        except UnicodeDecodeError as e:
+            # ممکن است کاراکتر چندبایتی در مرز 4096 بریده شده باشد
+            return len(head) == 4096 and e.start >= len(head) - 3
+        return True
+    if declared == 'image/webp':
+        return head[:4] == b'RIFF' and head[8:12] == b'WEBP'
+    return any(head.startswith(sig) for sig in SIGNATURES.get(declared, ()))
+
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(COPY_BUFFER), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def finish_upload(upload):
+    path = temp_path(upload)
+    if not sniff(path, upload.content_type):
+        abort_upload(upload)
+        raise UploadError('محتوای فایل با نوع اعلام‌شده هم‌خوان نیست.', status=415)
+
+    digest = file_sha256(path)
+    attachment = Attachment(
+        todo_id=upload.todo_id, sha256=digest, size=upload.size,
+        content_type=upload.content_type, original_name=upload.filename,
+    )
+    with transaction.atomic():
+        existing = (Attachment.objects.select_for_update()
+                    .filter(sha256=digest, size=upload.size).exclude(file='').first())
+        if existing is not None and existing.file.storage.exists(existing.file.name):
+            attachment.file.name = existing.file.name
+        else:
+            ext = os.path.splitext(upload.filename)[1].lower()[:10]
+            with open(path, 'rb') as f:
+                # نام فایل از hash؛ نام اصلی فقط در original_name نگه داشته می‌شود
+                attachment.file.save(f'{digest[:32]}{ext}', File(f), save=False)
+        attachment.save()
+        upload.delete()
+    path.unlink(missing_ok=True)
+    return attachment
+
+
+def abort_upload(upload):
+    temp_path(upload).unlink(missing_ok=True)
+    upload.delete()
+
+
+def parse_range(header, size):
+    """
+    «bytes=start-end» -> (start, end) شامل end؛ None یعنی کل فایل؛ ValueError یعنی 416.
+    فقط یک بازه پشتیبانی می‌شود.
+    """
+    if not header:
+        return None
+    m = RANGE_RE.match(header.strip())
+    if not m or not (m.group(1) or m.group(2)):
+        return None
+    start, end = m.group(1), m.group(2)
+    if start == '':
+        # bytes=-500 : ۵۰۰ بایت آخر
+        length = int(end)
+        if length == 0:
+            raise ValueError(header)
+        return max(0, size - length), size - 1
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        raise ValueError(header)
+    return start, end
+
+
+def iter_range(fileobj, start, end):
+    fileobj.seek(start)
+    remaining = end - start + 1
+    try:
+        while remaining > 0:
+            data = fileobj.read(min(COPY_BUFFER, remaining))
+            if not data:
+                break
+            remaining -= len(data)
+            yield data
+    finally:
+        fileobj.close()
@@ -0,0 +1,164 @@
+"""
+بنچمارک مسیرهای پرتکرار تسک‌ها (جدا از تست‌ها؛ با الگوی test*.py پیدا نمی‌شود).
+
+    python manage.py test todos.benchmarks
+    DATABASE_URL=sqlite:///bench.sqlite3 python manage.py test todos.benchmarks
+
+برای هر سناریو تعداد کوئری و میانهٔ زمان پاسخ گزارش می‌شود و با
+benchmarks_baseline.json (به تفکیک دیتابیس) مقایسه می‌شود: تعداد کوئری بیشتر از
+baseline یا زمان بیشتر از baseline * BENCH_TOLERANCE + BENCH_SLACK_MS شکست است.
+
+BENCH_RECORD=1 مقادیر همین اجرا را به‌عنوان baseline جدید ذخیره می‌کند
+(زمان‌ها به سخت‌افزار وابسته‌اند؛ روی ماشینی که بنچمارک را اجرا می‌کند ثبت کنید).
+متغیرهای دیگر: BENCH_TODOS (میانگین تسک هر کاربر)، BENCH_REPEAT.
+"""
+import itertools
+import json
+import os
+import statistics
+import time
+from pathlib import Path
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+
+from accounts.models import Profile
+
+BASELINE_FILE = Path(__file__).with_name('benchmarks_baseline.json')
+
+TODOS = int(os.environ.get('BENCH_TODOS', 1000))
+REPEAT = int(os.environ.get('BENCH_REPEAT', 5))
+TOLERANCE = float(os.environ.get('BENCH_TOLERANCE', 1.5))
+SLACK_MS = float(os.environ.get('BENCH_SLACK_MS', 5))
+RECORD = os.environ.get('BENCH_RECORD') == '1'
+
+
+def load_baselines():
+    if BASELINE_FILE.exists():
+        return json.loads(BASELINE_FILE.read_text())
+    return {}
+
+
+class TodoBenchmarks(TestCase):
+    results = {}
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command('seed_perf', users=3, todos=TODOS, tags=20, seed=1, prefix='bench', verbosity=0)
+        # پرکارترین کاربر
+        cls.profile = (Profile.objects.select_related('user')
+                       .order_by('-todo_stats__open_count', 'pk').first())
+        cls.user = cls.profile.user
+        cls.tag = cls.profile.tags.with_usage().first()
+        cls.todo_ids = list(cls.profile.todos.filter(archived=False).order_by('pk').values_list('pk', flat=True))
+
+    @classmethod
+    def tearDownClass(cls):
+        vendor = connection.vendor
+        if cls.results:
+            print(f"\n{'scenario':<48} {'queries':>8} {'median ms':>10}")
+            for name, (queries, ms) in sorted(cls.results.items()):
+                print(f"{name:<48} {queries:>8} {ms:>10.1f}")
+        if RECORD and cls.results:
+            baselines = load_baselines()
+            baselines[vendor] = {name: {'queries': q, 'ms': ms} for name, (q, ms) in sorted(cls.results.items())}
+            BASELINE_FILE.write_text(json.dumps(baselines, indent=2, ensure_ascii=False) + '\n')
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def measure(self, name, request):
+        """
+        request(i) یک درخواست می‌فرستد و پاسخ را برمی‌گرداند. یک اجرای گرم‌کردن،
+        یک اجرا برای شمارش کوئری، سپس REPEAT اجرا برای زمان.
+        """
+        self.assertLess(request(0).status_code, 400)
+        # CaptureQueriesContext اینجا کار نمی‌کند: request_started لیست connection.queries را خالی می‌کند
+        executed = []
+        with connection.execute_wrapper(lambda execute, *args: executed.append(1) or execute(*args)):
+            request(1)
+        times = []
+        for i in range(REPEAT):
+            start = time.perf_counter()
+            request(i + 2)
+            times.append((time.perf_counter() - start) * 1000)
+        queries, ms = len(executed), statistics.median(times)
+        type(self).results[name] = (queries, round(ms, 2))
+
+        baseline = load_baselines().get(connection.vendor, {}).get(name)
+        if RECORD or baseline is None:
+            return
+        with self.subTest(scenario=name):
+            self.assertLessEqual(queries, baseline['queries'],
+                                 f"{name}: {queries} queries, baseline {baseline['queries']}")
+            limit = baseline['ms'] * TOLERANCE + SLACK_MS
+            self.assertLessEqual(ms, limit, f"{name}: {ms:.1f}ms, limit {limit:.1f}ms")
+
+    # ---------- سناریوها ----------
+
+    def test_list_filters(self):
+        url = reverse('todos:list')
+        for status, priority, tag, q in itertools.product(
+            ('', 'open', 'done', 'archived'), ('', '1'), ('', 'tag'), ('', 'q'),
+        ):
+            params = {'status': status, 'priority': priority,
+                      'tag': self.tag.pk if tag else '', 'q': 'گزارش' if q else ''}
+            params = {k: v for k, v in params.items() if v}
+            name = 'list[' + ','.join(f'{k}' if k in ('tag', 'q') else f'{k}={v}' for k, v in params.items()) + ']'
+            self.measure(name, lambda i: self.client.get(url, params))
+
+    def test_list_due(self):
+        url = reverse('todos:list')
+        for status in ('overdue', 'due_today', 'due_this_week'):
+            self.measure(f'list[status={status}]', lambda i: self.client.get(url, {'status': status}))
+        self.measure('list[sort=due]', lambda i: self.client.get(url, {'sort': 'due'}))
+        cursor = self.client.get(url, {'sort': 'due'}).context['page_obj'].next_cursor
+        self.measure('list[sort=due,cursor]', lambda i: self.client.get(url, {'sort': 'due', 'cursor': cursor}))
+
+    def test_list_next_page(self):
+        url = reverse('todos:list')
+        cursor = self.client.get(url).context['page_obj'].next_cursor
+        self.measure('list[cursor]', lambda i: self.client.get(url, {'cursor': cursor}))
+
+    def test_list_not_modified(self):
+        url = reverse('todos:list')
+        self.client.get(url)  # کوکی CSRF بخشی از ETag است
+        etag = self.client.get(url)['ETag']
+        self.measure('list[304]', lambda i: self.client.get(url, headers={'if-none-match': etag}))
+
+    def test_detail(self):
+        url = reverse('todos:detail', args=[self.todo_ids[0]])
+        self.measure('detail', lambda i: self.client.get(url))
+        self.client.get(url)
+        etag = self.client.get(url)['ETag']
+        self.measure('detail[304]', lambda i: self.client.get(url, headers={'if-none-match': etag}))
+
+    def test_dashboard(self):
+        url = reverse('site:home')
+        self.measure('dashboard', lambda i: self.client.get(url))
+
+    def test_create(self):
+        url = reverse('todos:create')
+        self.measure('create', lambda i: self.client.post(url, {
+            'title': f'بنچمارک {i}', 'priority': 2, 'tags': [self.tag.pk], 'new_tags': 'بنچ, جدید',
+        }))
+
+    def test_update(self):
+        pk = self.todo_ids[0]
+        url = reverse('todos:edit', args=[pk])
+        self.measure('update', lambda i: self.client.post(url, {
+            'title': f'ویرایش {i}', 'priority': 1, 'tags': [self.tag.pk],
+        }))
+
+    def test_toggle(self):
+        url = reverse('todos:toggle', args=[self.todo_ids[0]])
+        self.measure('toggle', lambda i: self.client.post(url))
+
+    def test_archive(self):
+        ids = iter(self.todo_ids)
+        self.measure('archive', lambda i: self.client.post(reverse('todos:archive', args=[next(ids)])))
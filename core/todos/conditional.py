@@ -0,0 +1,88 @@
+"""
+GET شرطی (ETag / Last-Modified) برای لیست و جزئیات تسک.
+
+ETag از چیزهایی ساخته می‌شود که صفحه به آن‌ها وابسته است و قبل از queryset اصلی در دسترس‌اند:
+  - لیست: Todo.objects.achange_stamp() روی همهٔ تسک‌های پروفایل (یک aggregate)، امضای تگ‌ها و
+    فیلترهای ذخیره‌شده (هر دو از کش)، updated_at پروفایل و تاریخ امروز (برچسب‌های سررسید)
+  - جزئیات: updated_at تسک و آخرین ضمیمه (یک کوئری)، و همان امضای تگ‌ها
+و در هر دو CSRF (فرم‌های صفحهٔ قدیمی بعد از ورود دوباره نامعتبرند) و HTTP_CACHE_VERSION
+(تمپلیت‌های deploy تازه).
+
+ETag ضعیف است (W/)؛ توکن CSRF ماسک‌شدهٔ HTML در هر رندر فرق می‌کند. لیست Last-Modified
+ندارد چون حذف تسک max(updated_at) را جلو نمی‌برد. پاسخ‌ها Cache-Control: private, no-cache
+می‌گیرند: مرورگر نگه می‌دارد ولی هر بار با If-None-Match می‌پرسد.
+"""
+import hashlib
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.db.models import Count, Max
+from django.middleware.csrf import get_token
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+
+from .fragments import tag_version
+from .models import Todo
+
+
+def make_etag(request, *parts):
+    # صفحه فرم دارد و در رندر secret CSRF را می‌سازد؛ بدون این، ETag اولین بازدید (بدون کوکی)
+    # با درخواست بعدی که کوکی را می‌فرستد نمی‌خواند
+    get_token(request)
+    h = hashlib.blake2b(digest_size=16)
+    for part in (getattr(settings, 'HTTP_CACHE_VERSION', ''), request.META.get('CSRF_COOKIE', ''), *parts):
+        h.update(f'{part}\n'.encode())
+    return f'W/"{h.hexdigest()}"'
+
+
+def is_cacheable(request):
+    # پیام flash فقط یک بار نمایش داده می‌شود؛ نسخهٔ کش‌شده نباید آن را دوباره نشان دهد
+    return request.method in ('GET', 'HEAD') and not len(get_messages(request))
+
+
+async def list_etag(request, profile, tags, saved_filters):
+    now = timezone.now()
+    stamp = await Todo.objects.filter(profile=profile).achange_stamp(now)
+    return make_etag(
+        request, 'list', profile.pk, profile.updated_at.isoformat(), timezone.localdate(now),
+        *stamp.values(), tag_version(tags), tag_version(saved_filters),
+        *(f.query for f in saved_filters),
+    )
+
+
+async def detail_validators(request, profile, pk, tags):
+    """(etag, last_modified) یا None اگر تسک نباشد."""
+    # values قبل از annotate: GROUP BY همین ستون‌ها، نه فقط id (کلید جدول پارتیشن‌شده (id, archived) است)
+    row = await (Todo.objects.filter(profile=profile, pk=pk)
+                 .values('updated_at', 'is_done', 'due_date')
+                 .annotate(attachment_count=Count('attachments'), last_attachment=Max('attachments__uploaded_at'))
+                 .order_by('updated_at').afirst())
+    if row is None:
+        return None
+    overdue = bool(row['due_date'] and not row['is_done'] and row['due_date'] < timezone.now())
+    last_modified = max(d for d in (row['updated_at'], row['last_attachment'], profile.updated_at) if d)
+    etag = make_etag(
+        request, 'detail', pk, row['updated_at'].isoformat(), overdue, row['attachment_count'],
+        last_modified.isoformat(), tag_version(tags),
+    )
+    return etag, last_modified
+
+
+def not_modified(request, etag, last_modified=None):
+    """پاسخ 304 اگر نسخهٔ مرورگر هنوز معتبر است؛ وگرنه None."""
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified and int(last_modified.timestamp()))
+    if response is not None:
+        set_headers(response, etag, last_modified)
+    return response
+
+
+def set_headers(response, etag=None, last_modified=None):
+    if etag:
+        response.headers['ETag'] = etag
+    if last_modified:
+        response.headers['Last-Modified'] = http_date(last_modified.timestamp())
+    patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ('Cookie',))
+    return response
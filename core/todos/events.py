@@ -0,0 +1,77 @@
+"""
+رویدادهای لحظه‌ای تغییر تسک/تگ برای صفحهٔ لیست (core/pubsub.py).
+
+تغییرات هر تراکنش برای هر پروفایل در یک پیام جمع و بعد از commit منتشر می‌شوند:
+
+    {"created": [pk, ...], "updated": [...], "deleted": [...], "tags": true, "reset": true}
+
+فقط شناسه‌ها فرستاده می‌شوند؛ صفحه ردیف‌ها را از todos:rows می‌گیرد. reset یعنی
+«چیزهایی عوض شده که شناسه‌شان معلوم نیست» (مثلاً UPDATE دسته‌ای)؛ ردیف‌های صفحه دوباره خوانده شوند.
+"""
+from django.db import transaction
+
+from core.pubsub import get_broker
+
+# بیشتر از این شناسه در یک پیام -> reset
+MAX_IDS = 200
+
+OPS = ('created', 'updated', 'deleted')
+
+
+def channel(profile_id):
+    return f'todos.{profile_id}'
+
+
+class _Batch:
+    def __init__(self):
+        self.profiles = {}
+        self.flushed = False
+
+    def add(self, profile_id, op, ids=(), tags=False, reset=False):
+        entry = self.profiles.setdefault(profile_id, {name: set() for name in OPS})
+        ids = set(ids)
+        if op == 'updated':
+            ids -= entry['created']
+        elif op == 'deleted':
+            # ساخته و حذف‌شده در همین تراکنش: صفحه هرگز آن را ندیده است
+            born = ids & entry['created']
+            entry['created'] -= born
+            entry['updated'] -= ids
+            ids -= born
+        if op:
+            entry[op] |= ids
+        if tags:
+            entry['tags'] = True
+        if reset:
+            entry['reset'] = True
+
+    def flush(self):
+        self.flushed = True
+        broker = get_broker()
+        for profile_id, entry in self.profiles.items():
+            message = {name: sorted(entry[name]) for name in OPS if entry[name]}
+            if entry.get('tags'):
+                message['tags'] = True
+            if entry.get('reset') or sum(len(entry[name]) for name in OPS) > MAX_IDS:
+                # شناسه‌های حذف‌شده هم لازم نیستند؛ ردیف‌های صفحه دوباره خوانده می‌شوند
+                message = {'reset': True, **({'tags': True} if entry.get('tags') else {})}
+            if message:
+                broker.publish(channel(profile_id), message)
+
+
+def notify(profile_id, op=None, ids=(), *, tags=False, reset=False, using=None):
+    """
+    ثبت تغییر؛ داخل تراکنش تا commit صبر می‌کند (و با rollback دور ریخته می‌شود).
+    همهٔ فراخوانی‌های یک تراکنش یک callback و برای هر پروفایل یک پیام دارند.
+    """
+    conn = transaction.get_connection(using)
+    batch = getattr(conn, '_todo_events', None)
+    # callback قبلی اجرا شده یا با rollback حذف شده باشد -> batch تازه
+    # (captureOnCommitCallbacks در تست‌ها callback اجراشده را در run_on_commit نگه می‌دارد)
+    if batch is None or batch.flushed or not any(func == batch.flush for _, func, _ in conn.run_on_commit):
+        batch = conn._todo_events = _Batch()
+        batch.add(profile_id, op, ids, tags, reset)
+        # robust: خطای انتشار (مثلاً قطع PostgreSQL در PostgresBroker) فقط لاگ می‌شود
+        transaction.on_commit(batch.flush, using=using, robust=True)
+        return
+    batch.add(profile_id, op, ids, tags, reset)
@@ -0,0 +1,132 @@
+"""
+فیلترهای GET لیست تسک‌ها (صفحهٔ لیست، JSON، API، خروجی و اکشن دسته‌ای).
+
+    q, status, priority, tag (تکرارپذیر) + tag_mode=any|all, due_after, due_before, sort
+
+تگ‌ها با EXISTS روی جدول واسط فیلتر می‌شوند (بدون join و distinct). فرم فقط عدد بودن شناسهٔ تگ
+را می‌سنجد و خود دیتابیس بقیه را: شناسهٔ ناموجود، حذف‌شده یا مال پروفایل دیگر با هیچ تسکی جور
+نمی‌شود (نه این‌که کل فیلتر تگ کنار گذاشته شود).
+"""
+import django_filters
+from django import forms
+from django.db.models import Exists, OuterRef
+from django.http import QueryDict
+
+from .models import Priority, Todo
+from .search import search_todos
+
+STATUS_CHOICES = (
+    ('open', 'باز'),
+    ('done', 'انجام‌شده'),
+    ('archived', 'آرشیو'),
+    ('overdue', 'دارای تاخیر'),
+    ('due_today', 'سررسید امروز'),
+    ('due_this_week', 'سررسید این هفته'),
+)
+TAG_MODES = (('any', 'هر کدام'), ('all', 'همه'))
+SORT_CHOICES = (('due', 'نزدیک‌ترین سررسید'),)
+
+# پارامترهایی که جزء فیلتر نیستند (صفحه‌بندی و ...)؛ در فیلتر ذخیره‌شده نگه داشته نمی‌شوند
+NON_FILTER_PARAMS = ('cursor', 'page', 'count', 'page_size', 'format', 'csrfmiddlewaretoken')
+
+
+def tag_id(value):
+    pk = int(value)
+    if not 0 < pk < 2 ** 63:
+        raise ValueError(value)
+    return pk
+
+
+class TagIdsField(forms.TypedMultipleChoiceField):
+    """شناسه‌های تگ بدون فهرست گزینه‌ها؛ وجود تگ را کوئری می‌سنجد."""
+
+    def valid_value(self, value):
+        return True
+
+
+class TagIdsFilter(django_filters.TypedMultipleChoiceFilter):
+    field_class = TagIdsField
+
+
+class TodoFilterSet(django_filters.FilterSet):
+    status = django_filters.ChoiceFilter(choices=STATUS_CHOICES, method='filter_status')
+    priority = django_filters.TypedChoiceFilter(choices=Priority.choices, coerce=int)
+    tag = TagIdsFilter(coerce=tag_id, method='filter_tags')
+    tag_mode = django_filters.ChoiceFilter(choices=TAG_MODES, method='filter_noop')
+    # datetime-local (2025-08-13T17:45) در منطقهٔ زمانی فعلی
+    due_after = django_filters.DateTimeFilter(field_name='due_date', lookup_expr='gte')
+    due_before = django_filters.DateTimeFilter(field_name='due_date', lookup_expr='lte')
+    sort = django_filters.ChoiceFilter(choices=SORT_CHOICES, method='filter_sort')
+    # آخر: جست‌وجو ترتیب را بر اساس rank (و بعد ترتیب فعلی) می‌چیند
+    q = django_filters.CharFilter(method='filter_q')
+
+    class Meta:
+        model = Todo
+        fields = ()
+
+    def __init__(self, data=None, queryset=None, *, profile=None, **kwargs):
+        super().__init__(data, queryset, **kwargs)
+        self.profile = profile
+
+    @classmethod
+    def _base_form_class(cls):
+        # کلاس فرم یک‌بار برای هر FilterSet ساخته می‌شود (نه در هر درخواست)
+        if '_form_class' not in cls.__dict__:
+            fields = {name: f.field for name, f in cls.base_filters.items()}
+            cls._form_class = type(f'{cls.__name__}Form', (cls._meta.form,), fields)
+        return cls._form_class
+
+    def get_form_class(self):
+        return self._base_form_class()
+
+    @property
+    def qs(self):
+        if self.is_bound and not any(name in self.data for name in self.filters):
+            # بدون پارامتر فیلتر: ساختن و اعتبارسنجی فرم لازم نیست
+            return self.queryset.all()
+        return super().qs
+
+    def filter_noop(self, queryset, name, value):
+        return queryset
+
+    def filter_status(self, queryset, name, value):
+        if value == 'open':
+            return queryset.filter(is_done=False, archived=False)
+        if value == 'done':
+            return queryset.filter(is_done=True, archived=False)
+        if value == 'archived':
+            return queryset.filter(archived=True)
+        return getattr(queryset, value)()  # overdue / due_today / due_this_week
+
+    def filter_tags(self, queryset, name, value):
+        if not value:
+            return queryset
+        links = Todo.tags.through.objects.filter(todo_id=OuterRef('pk'))
+        if self.form.cleaned_data.get('tag_mode') == 'all':
+            for tag_id in set(value):
+                queryset = queryset.filter(Exists(links.filter(tag_id=tag_id)))
+            return queryset
+        return queryset.filter(Exists(links.filter(tag_id__in=value)))
+
+    def filter_sort(self, queryset, name, value):
+        return queryset.order_by_due()
+
+    def filter_q(self, queryset, name, value):
+        return search_todos(queryset, value)
+
+    def active_params(self):
+        """پارامترهای معتبر و غیرخالی به‌صورت QueryDict (برای ذخیرهٔ فیلتر)؛ بقیه کنار گذاشته می‌شوند."""
+        params = QueryDict(mutable=True)
+        if not self.is_bound or not any(name in self.data for name in self.filters):
+            return params
+        self.errors  # اعتبارسنجی؛ cleaned_data فقط فیلدهای معتبر را دارد
+        for name in self.form.cleaned_data:
+            values = [v for v in self.data.getlist(name) if v]
+            if values and name not in NON_FILTER_PARAMS:
+                params.setlist(name, values)
+        return params
+
+
+def filter_todos(qs, params, profile):
+    """میانبر: queryset فیلترشده با TodoFilterSet."""
+    return TodoFilterSet(params, queryset=qs, profile=profile).qs
@@ -1,8 +1,14 @@
 from django import forms
 from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models.functions import Lower
+from django.http import QueryDict
 from django.utils import timezone
 
-from .models import Todo, Tag, Priority
+from .filters import TodoFilterSet
+from .models import SavedFilter, Todo, Tag, Priority
+from .retry import retry_on_serialization_failure
+from .services import attach_tags, normalize_tag_names, resolve_tags
 
 
 class TailwindFormMixin:
@@ -28,6 +34,33 @@ class TailwindFormMixin:
             self._tweak_widget(name)
 
 
+# ——— قواعد مشترک TodoForm و TodoImportForm ———
+
+def validate_title(value):
+    title = (value or "").strip()
+    if not title:
+        raise ValidationError("عنوان لازم است.")
+    return title
+
+
+def validate_due_date(due, allow_past=False):
+    if not due:
+        return due
+    # اگر naive بود، به منطقهٔ زمانی پروژه آگاهش کن
+    if timezone.is_naive(due):
+        due = timezone.make_aware(due, timezone.get_current_timezone())
+    if not allow_past and due < timezone.now():
+        raise ValidationError("تاریخ سررسید نمی‌تواند در گذشته باشد.")
+    return due
+
+
+def validate_tag_names(raw):
+    names = normalize_tag_names(raw)
+    if any(len(name) > 30 for name in names):
+        raise ValidationError("نام هر تگ حداکثر باید ۳۰ کاراکتر باشد.")
+    return names
+
+
 class TodoForm(TailwindFormMixin, forms.ModelForm):
     new_tags = forms.CharField(
         label="تگ‌های جدید (با , جدا کنید)",
@@ -76,23 +109,18 @@ class TodoForm(TailwindFormMixin, forms.ModelForm):
 
     # ——— اعتبارسنجی‌ها ———
     def clean_title(self):
-        title = (self.cleaned_data.get("title") or "").strip()
-        if not title:
-            raise ValidationError("عنوان لازم است.")
-        return title
+        return validate_title(self.cleaned_data.get("title"))
 
     def clean_due_date(self):
-        due = self.cleaned_data.get("due_date")
-        if not due:
-            return due
-        # اگر naive بود، به منطقهٔ زمانی پروژه آگاهش کن
-        if timezone.is_naive(due):
-            due = timezone.make_aware(due, timezone.get_current_timezone())
-        if due < timezone.now():
-            raise ValidationError("تاریخ سررسید نمی‌تواند در گذشته باشد.")
-        return due
+        return validate_due_date(self.cleaned_data.get("due_date"))
+
+    def clean_new_tags(self):
+        # قبل از هر ذخیره‌ای بررسی شود، نه بعد از ثبت تسک
+        return validate_tag_names(self.cleaned_data.get("new_tags"))
 
     # ——— ذخیره‌سازی و ساخت تگ‌های جدید ———
+    # تراکنش بیرونی همین‌جاست؛ retry داخل Todo.save در atomic کاری نمی‌کند
+    @retry_on_serialization_failure
     def save(self, commit=True):
         obj = super().save(commit=False)
 
@@ -101,21 +129,13 @@ class TodoForm(TailwindFormMixin, forms.ModelForm):
             obj.profile = self.profile
 
         if commit:
-            obj.save()
-            self.save_m2m()  # ذخیره many-to-many انتخاب‌شده‌ها
-
-            # ساخت تگ‌های جدید
-            raw = (self.cleaned_data.get("new_tags") or "")
-            names = list({n.strip() for n in raw.split(",") if n.strip()})
-            for name in names:
-                if len(name) > 30:
-                    raise ValidationError("نام هر تگ حداکثر باید ۳۰ کاراکتر باشد.")
-                tag, _ = Tag.objects.get_or_create(
-                    profile=self.profile,
-                    name__iexact=name,
-                    defaults={"name": name}
-                )
-                obj.tags.add(tag)
+            with transaction.atomic():
+                obj.save()
+                self.save_m2m()  # ذخیره many-to-many انتخاب‌شده‌ها
+
+                # تگ‌های جدید: یک lookup، یک bulk_create و یک insert در جدول واسط
+                tags = resolve_tags(obj.profile, self.cleaned_data.get("new_tags") or [])
+                attach_tags(obj, tags)
 
         return obj
 
@@ -140,7 +160,8 @@ class TagForm(TailwindFormMixin, forms.ModelForm):
             raise ValidationError("نام تگ لازم است.")
         if len(name) > 30:
             raise ValidationError("نام تگ حداکثر باید ۳۰ کاراکتر باشد.")
-        if self.profile and Tag.objects.filter(profile=self.profile, name__iexact=name).exists():
+        if self.profile and (Tag.objects.filter(profile=self.profile)
+                             .alias(lname=Lower("name")).filter(lname=name.lower()).exists()):
             raise ValidationError("تگی با این نام از قبل وجود دارد.")
         return name
 
@@ -151,3 +172,111 @@ class TagForm(TailwindFormMixin, forms.ModelForm):
         if commit:
             obj.save()
         return obj
+
+
+class SavedFilterForm(forms.ModelForm):
+    """
+    ذخیرهٔ فیلتر فعلی لیست؛ query همان querystring صفحه است و فقط پارامترهای معتبر آن نگه داشته می‌شود.
+    """
+    class Meta:
+        model = SavedFilter
+        fields = ["name", "query"]
+
+    def __init__(self, *args, **kwargs):
+        self.profile = kwargs.pop("profile")
+        super().__init__(*args, **kwargs)
+
+    def clean_name(self):
+        name = (self.cleaned_data.get("name") or "").strip()
+        if not name:
+            raise ValidationError("نام فیلتر لازم است.")
+        if (SavedFilter.objects.filter(profile=self.profile)
+                .alias(lname=Lower("name")).filter(lname=name.lower()).exists()):
+            raise ValidationError("فیلتری با این نام از قبل وجود دارد.")
+        return name
+
+    def clean_query(self):
+        params = TodoFilterSet(QueryDict(self.cleaned_data.get("query") or ""),
+                               queryset=Todo.objects.none(), profile=self.profile).active_params()
+        if not params:
+            raise ValidationError("فیلتری انتخاب نشده است.")
+        return params.urlencode()
+
+    def clean(self):
+        cleaned = super().clean()
+        if SavedFilter.objects.filter(profile=self.profile).count() >= SavedFilter.MAX_PER_PROFILE:
+            raise ValidationError(f"حداکثر {SavedFilter.MAX_PER_PROFILE} فیلتر ذخیره‌شده مجاز است.")
+        return cleaned
+
+    def save(self, commit=True):
+        obj = super().save(commit=False)
+        obj.profile = self.profile
+        if commit:
+            obj.save()
+        return obj
+
+
+# ——— ورود دسته‌ای (todos/importer.py) ———
+
+IMPORT_DATETIME_FORMATS = [
+    "%Y-%m-%dT%H:%M:%S.%f%z", "%Y-%m-%dT%H:%M:%S%z", "%Y-%m-%dT%H:%M%z",
+    "%Y-%m-%dT%H:%M:%S.%f", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%dT%H:%M",
+    "%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d",
+]
+
+
+class TodoImportForm(forms.Form):
+    """
+    اعتبارسنجی یک ردیف فایل ورودی با همان قواعد TodoForm.
+    تسک‌های انجام‌شده/آرشیوی (تاریخچه) می‌توانند سررسید گذشته داشته باشند.
+    """
+    title = forms.CharField(max_length=200, required=False)
+    description = forms.CharField(required=False, strip=False)
+    priority = forms.TypedChoiceField(choices=Priority.choices, coerce=int,
+                                      required=False, empty_value=Priority.MEDIUM)
+    due_date = forms.DateTimeField(required=False, input_formats=IMPORT_DATETIME_FORMATS)
+    is_done = forms.BooleanField(required=False)
+    archived = forms.BooleanField(required=False)
+    tags = forms.CharField(required=False)
+    created_at = forms.DateTimeField(required=False, input_formats=IMPORT_DATETIME_FORMATS)
+    completed_at = forms.DateTimeField(required=False, input_formats=IMPORT_DATETIME_FORMATS)
+
+    def rebind(self, data):
+        """
+        همین فرم برای ردیف بعدی؛ ساخت فرم تازه (deepcopy همهٔ فیلدها) برای هر ردیف
+        بیشتر زمان ورود را می‌گرفت.
+        """
+        self.data = data
+        self.is_bound = True
+        self._errors = None
+        return self
+
+    def clean_title(self):
+        return validate_title(self.cleaned_data.get("title"))
+
+    def clean_tags(self):
+        return validate_tag_names(self.cleaned_data.get("tags"))
+
+    def clean(self):
+        data = super().clean()
+        if self.errors:
+            return data
+        try:
+            data["due_date"] = validate_due_date(
+                data.get("due_date"), allow_past=data.get("is_done") or data.get("archived"))
+        except ValidationError as e:
+            self.add_error("due_date", e)
+        return data
+
+
+class ImportUploadForm(TailwindFormMixin, forms.Form):
+    file = forms.FileField(label="فایل CSV یا NDJSON")
+    format = forms.ChoiceField(
+        label="فرمت",
+        choices=[("", "از روی پسوند فایل"), ("csv", "CSV"), ("ndjson", "NDJSON")],
+        required=False,
+    )
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.apply_tailwind()
@@ -0,0 +1,23 @@
+"""
+کش fragment ردیف‌های تسک (تمپلیت‌ها با {% cache %}).
+
+کلید هر ردیف: (pk, updated_at, is_overdue, tag_version). ویرایش تسک updated_at را
+عوض می‌کند؛ تغییر تگ‌های یک تسک (m2m_changed) هم updated_at را جلو می‌برد (models.py).
+tag_version از روی خود تگ‌های پروفایل ساخته می‌شود، پس تغییر نام/حذف تگ بدون
+نیاز به پاک‌کردن کش (و بین همهٔ پروسه‌ها) کلید را عوض می‌کند.
+"""
+import hashlib
+
+from django.conf import settings
+
+
+def fragment_timeout():
+    return getattr(settings, 'TODO_FRAGMENT_CACHE_TIMEOUT', 60 * 60 * 24)
+
+
+def tag_version(tags):
+    """امضای کوتاه از (id, name) تگ‌های پروفایل."""
+    h = hashlib.blake2b(digest_size=8)
+    for tag in tags:
+        h.update(f'{tag.pk}:{tag.name}\n'.encode())
+    return h.hexdigest()
@@ -0,0 +1,190 @@
+"""
+ورود دسته‌ای تسک‌ها از CSV / NDJSON (TodoImportView و `manage.py import_todos`).
+
+فایل به‌صورت جریانی خوانده می‌شود و ردیف‌ها در دسته‌های batch_size پردازش می‌شوند:
+اعتبارسنجی با TodoImportForm، یک resolve_tags برای همهٔ تگ‌های دسته، و درج با
+COPY (PostgreSQL / psycopg 3) یا bulk_create. ردیف‌های نامعتبر رد و با شمارهٔ
+خط گزارش می‌شوند؛ بقیه وارد می‌شوند. ستون‌ها همان خروجی todos/export.py است.
+"""
+import csv
+import io
+import json
+
+from django.db import connections, router, transaction
+from django.utils import timezone
+
+from . import events
+from .forms import TodoImportForm
+from .models import ProfileTodoStats, Tag, Todo
+from .services import explicit_timestamps, resolve_tags
+
+FORMATS = ('csv', 'ndjson')
+BATCH_SIZE = 5000
+MAX_REPORTED_ERRORS = 500
+
+COPY_COLUMNS = ('id', 'profile_id', 'title', 'description', 'priority', 'is_done', 'archived',
+                'due_date', 'completed_at', 'reminder_attempts', 'created_at', 'updated_at')
+
+
+class ImportFileError(ValueError):
+    """فایل قابل خواندن نیست (نه خطای یک ردیف)."""
+
+
+class ImportResult:
+
+    def __init__(self):
+        self.created = 0
+        self.error_count = 0
+        self.errors = []  # [(line, {field: [message, ...]}), ...] — حداکثر MAX_REPORTED_ERRORS
+
+    def add_error(self, line, errors):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line, errors))
+
+
+def guess_format(filename):
+    ext = (filename or '').rsplit('.', 1)[-1].lower()
+    if ext in ('ndjson', 'jsonl', 'json'):
+        return 'ndjson'
+    return 'csv'
+
+
+def read_rows(fileobj, fmt):
+    """
+    (شمارهٔ خط، dict) برای هر ردیف؛ fileobj باینری است و خط‌به‌خط خوانده می‌شود.
+    """
+    text = io.TextIOWrapper(fileobj, encoding='utf-8-sig', newline='')
+    try:
+        if fmt == 'csv':
+            reader = csv.DictReader(text)
+            for row in reader:
+                yield reader.line_num, row
+            return
+        for line_no, line in enumerate(text, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                yield line_no, None
+                continue
+            yield line_no, row
+    except UnicodeDecodeError:
+        raise ImportFileError('فایل باید UTF-8 باشد.')
+    finally:
+        text.detach()
+
+
+def _form_data(row):
+    """ردیف خام -> داده‌ی TodoImportForm (تگ‌ها در NDJSON می‌توانند لیست باشند)."""
+    data = {k: v for k, v in row.items() if k is not None}
+    tags = data.get('tags')
+    if isinstance(tags, list):
+        data['tags'] = ','.join(t.get('name', '') if isinstance(t, dict) else str(t) for t in tags)
+    for key in ('is_done', 'archived'):
+        if isinstance(data.get(key), bool):
+            data[key] = 'true' if data[key] else ''
+    return data
+
+
+def import_todos(profile, rows, batch_size=BATCH_SIZE):
+    """rows: خروجی read_rows. خروجی: ImportResult."""
+    result = ImportResult()
+    batch = []
+    form = TodoImportForm()
+    for line, row in rows:
+        if not isinstance(row, dict):
+            result.add_error(line, {'__all__': ['ردیف JSON معتبر نیست.']})
+            continue
+        form.rebind(_form_data(row))
+        if not form.is_valid():
+            result.add_error(line, {f: [str(m) for m in msgs] for f, msgs in form.errors.items()})
+            continue
+        batch.append(form.cleaned_data)
+        if len(batch) >= batch_size:
+            result.created += _import_batch(profile, batch)
+            batch = []
+    if batch:
+        result.created += _import_batch(profile, batch)
+    return result
+
+
+def _import_batch(profile, rows):
+    now = timezone.now()
+    using = router.db_for_write(Todo)
+
+    objs, tag_names = [], []
+    for data in rows:
+        obj = Todo(
+            profile=profile,
+            title=data['title'],
+            description=data['description'],
+            priority=data['priority'],
+            is_done=data['is_done'],
+            archived=data['archived'],
+            due_date=data['due_date'],
+            completed_at=data['completed_at'] if data['is_done'] else None,
+            created_at=data['created_at'] or now,
+            updated_at=now,
+        )
+        obj.set_derived_fields()
+        objs.append(obj)
+        tag_names.extend(data['tags'])
+
+    with transaction.atomic(using=using):
+        tags = {t.name.lower(): t for t in resolve_tags(profile, tag_names)}
+        if connections[using].vendor == 'postgresql':
+            _copy_insert(using, objs)
+        else:
+            with explicit_timestamps('created_at'):
+                Todo.objects.using(using).bulk_create(objs)
+
+        links = {(obj.pk, tags[name.lower()].pk)
+                 for obj, data in zip(objs, rows) for name in data['tags'] if name.lower() in tags}
+        _copy_links(using, links)
+
+        deltas = {}
+        for obj in objs:
+            bucket = ProfileTodoStats.bucket(obj.is_done, obj.archived)
+            deltas[bucket] = deltas.get(bucket, 0) + 1
+        ProfileTodoStats.objects.db_manager(using).apply_delta(profile.pk, deltas)
+        Tag.objects.db_manager(using).invalidate_usage(profile.pk)
+        events.notify(profile.pk, 'created', [obj.pk for obj in objs], tags=True, using=using)
+    return len(objs)
+
+
+def _copy_insert(using, objs):
+    """
+    شناسه‌ها از sequence رزرو می‌شوند تا بعد از COPY بتوان ردیف‌های جدول واسط تگ را ساخت.
+    تریگر search_vector برای COPY هم اجرا می‌شود.
+    """
+    table = Todo._meta.db_table
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            "SELECT nextval(pg_get_serial_sequence(%s, 'id')) FROM generate_series(1, %s)",
+            [table, len(objs)],
+        )
+        for obj, (pk,) in zip(objs, cursor.fetchall()):
+            obj.pk = pk
+        sql = f"COPY {table} ({', '.join(COPY_COLUMNS)}) FROM STDIN"
+        with cursor.cursor.copy(sql) as copy:
+            for obj in objs:
+                copy.write_row([getattr(obj, col) for col in COPY_COLUMNS])
+    for obj in objs:
+        obj._state.adding = False
+        obj._state.db = using
+
+
+def _copy_links(using, links):
+    if not links:
+        return
+    TodoTag = Todo.tags.through
+    if connections[using].vendor != 'postgresql':
+        TodoTag.objects.using(using).bulk_create(
+            [TodoTag(todo_id=todo_id, tag_id=tag_id) for todo_id, tag_id in links], batch_size=BATCH_SIZE)
+        return
+    with connections[using].cursor() as cursor:
+        with cursor.cursor.copy(f"COPY {TodoTag._meta.db_table} (todo_id, tag_id) FROM STDIN") as copy:
+            for row in links:
+                copy.write_row(row)
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from todos import archiving
+
+
+class Command(BaseCommand):
+    help = ("آرشیو تسک‌هایی که بیش از TODO_AUTO_ARCHIVE_DAYS روز پیش انجام شده‌اند "
+            "(دسته‌ای، SKIP LOCKED)؛ روی PostgreSQL به پارتیشن آرشیو منتقل می‌شوند. مثلاً روزانه از cron.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, help='به‌جای TODO_AUTO_ARCHIVE_DAYS.')
+        parser.add_argument('--batch-size', type=int, default=archiving.BATCH_SIZE)
+        parser.add_argument('--dry-run', action='store_true', help='فقط شمارش، چیزی تغییر نمی‌کند.')
+
+    def handle(self, *args, days=None, batch_size=archiving.BATCH_SIZE, dry_run=False, **options):
+        if days is None and not archiving.after_days():
+            self.stdout.write("TODO_AUTO_ARCHIVE_DAYS is 0; auto-archiving is disabled (use --days).")
+            return
+
+        count = archiving.archive_done(days=days, batch_size=batch_size, dry_run=dry_run)
+        verb = 'would be archived' if dry_run else 'archived'
+        self.stdout.write(self.style.SUCCESS(f"{count} done todos {verb}."))
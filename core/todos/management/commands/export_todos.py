@@ -0,0 +1,43 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.models import Profile
+from todos import export
+from todos.models import Todo
+
+
+class Command(BaseCommand):
+    help = "خروجی جریانی تسک‌های یک پروفایل (CSV یا NDJSON)."
+
+    def add_arguments(self, parser):
+        target = parser.add_mutually_exclusive_group(required=True)
+        target.add_argument('--profile', type=int, help='شناسهٔ پروفایل')
+        target.add_argument('--email', help='ایمیل کاربر')
+        parser.add_argument('--format', choices=sorted(export.FORMATS), default='csv')
+        parser.add_argument('--output', '-o', help='مسیر فایل؛ پیش‌فرض stdout')
+        parser.add_argument('--chunk-size', type=int, default=export.CHUNK_SIZE)
+        parser.add_argument('--base-url', default='',
+                            help='پیشوند آدرس فایل‌های ضمیمه، مثلاً https://todo.example.com')
+
+    def handle(self, *args, profile=None, email=None, format='csv', output=None,
+               chunk_size=export.CHUNK_SIZE, base_url='', **options):
+        try:
+            if profile is not None:
+                obj = Profile.objects.get(pk=profile)
+            else:
+                obj = Profile.objects.get(user__email__iexact=email)
+        except Profile.DoesNotExist:
+            raise CommandError("پروفایل پیدا نشد.")
+
+        base_url = base_url.rstrip('/')
+        chunks = export.stream(format, Todo.objects.filter(profile=obj),
+                               build_url=lambda url: base_url + url, chunk_size=chunk_size)
+
+        out = open(output, 'w', encoding='utf-8', newline='') if output else sys.stdout
+        try:
+            for chunk in chunks:
+                out.write(chunk)
+        finally:
+            if output:
+                out.close()
@@ -0,0 +1,43 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.models import Profile
+from todos import importer
+
+
+class Command(BaseCommand):
+    help = "ورود دسته‌ای تسک‌ها از CSV یا NDJSON برای یک پروفایل (COPY روی PostgreSQL)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        target = parser.add_mutually_exclusive_group(required=True)
+        target.add_argument('--profile', type=int, help='شناسهٔ پروفایل')
+        target.add_argument('--email', help='ایمیل کاربر')
+        parser.add_argument('--format', choices=importer.FORMATS, help='پیش‌فرض: از روی پسوند فایل')
+        parser.add_argument('--batch-size', type=int, default=importer.BATCH_SIZE)
+
+    def handle(self, path, profile=None, email=None, format=None, batch_size=importer.BATCH_SIZE, **options):
+        try:
+            if profile is not None:
+                obj = Profile.objects.get(pk=profile)
+            else:
+                obj = Profile.objects.get(user__email__iexact=email)
+        except Profile.DoesNotExist:
+            raise CommandError("پروفایل پیدا نشد.")
+
+        fmt = format or importer.guess_format(path)
+        start = time.monotonic()
+        try:
+            with open(path, 'rb') as f:
+                result = importer.import_todos(obj, importer.read_rows(f, fmt), batch_size=batch_size)
+        except (OSError, importer.ImportFileError) as e:
+            raise CommandError(str(e))
+
+        for line, errors in result.errors:
+            msgs = '; '.join(f"{field}: {', '.join(m)}" for field, m in errors.items())
+            self.stderr.write(f"line {line}: {msgs}")
+        self.stdout.write(self.style.SUCCESS(
+            f"{result.created} todos imported, {result.error_count} rows rejected "
+            f"in {time.monotonic() - start:.1f}s."
+        ))
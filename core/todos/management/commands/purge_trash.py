@@ -0,0 +1,32 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from todos import trash
+
+
+class Command(BaseCommand):
+    help = ("حذف قطعی تسک‌هایی که بیش از TODO_TRASH_RETENTION_DAYS روز در سطل زباله مانده‌اند "
+            "(دسته‌ای، SKIP LOCKED) و پاک کردن فایل‌های بی‌ارجاع؛ مثلاً روزانه از cron.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, help='به‌جای TODO_TRASH_RETENTION_DAYS.')
+        parser.add_argument('--batch-size', type=int, default=trash.BATCH_SIZE)
+        parser.add_argument('--dry-run', action='store_true', help='فقط شمارش، چیزی حذف نمی‌شود.')
+        parser.add_argument('--sweep', action='store_true',
+                            help='فایل‌های زیر todo_attachments/ بدون ضمیمه را هم پاک کن.')
+        parser.add_argument('--sweep-grace-hours', type=int, default=24,
+                            help='فایل‌های تازه‌تر از این در --sweep دست نمی‌خورند.')
+
+    def handle(self, *args, days=None, batch_size=trash.BATCH_SIZE, dry_run=False, sweep=False,
+               sweep_grace_hours=24, **options):
+        todos, files = trash.purge(batch_size=batch_size, dry_run=dry_run, days=days)
+        uploads = trash.expire_uploads(dry_run=dry_run)
+        orphans = (trash.sweep_orphans(grace=timedelta(hours=sweep_grace_hours), dry_run=dry_run)
+                   if sweep else 0)
+
+        verb = 'would be purged' if dry_run else 'purged'
+        message = f"{todos} todos ({files} attachments), {uploads} stale uploads {verb}"
+        if sweep:
+            message += f", {orphans} orphaned files"
+        self.stdout.write(self.style.SUCCESS(message + '.'))
@@ -0,0 +1,60 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from accounts.models import Profile
+from todos.models import ProfileTodoStats
+
+FIELDS = ('open_count', 'done_count', 'archived_count')
+
+
+class Command(BaseCommand):
+    help = "بازسازی یا بررسی شمارنده‌های ProfileTodoStats از روی جدول تسک‌ها."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verify', action='store_true',
+                            help='فقط انحراف را گزارش کن، چیزی ننویس.')
+        parser.add_argument('--profile', type=int, action='append', dest='profiles',
+                            help='فقط این پروفایل(ها)؛ قابل تکرار.')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, verify=False, profiles=None, batch_size=1000, **options):
+        ids = Profile.objects.order_by('pk').values_list('pk', flat=True)
+        if profiles:
+            ids = ids.filter(pk__in=profiles)
+
+        checked = drifted = 0
+        batch = []
+        for pid in ids.iterator(chunk_size=batch_size):
+            batch.append(pid)
+            if len(batch) >= batch_size:
+                drifted += self._process(batch, verify)
+                checked += len(batch)
+                batch = []
+        if batch:
+            drifted += self._process(batch, verify)
+            checked += len(batch)
+
+        action = 'drifted' if verify else 'fixed'
+        self.stdout.write(self.style.SUCCESS(f"{checked} profiles checked, {drifted} {action}."))
+        if verify and drifted:
+            raise SystemExit(1)
+
+    def _process(self, profile_ids, verify):
+        with transaction.atomic():
+            stored = {
+                s.profile_id: s
+                for s in ProfileTodoStats.objects.select_for_update().filter(profile_id__in=profile_ids)
+            }
+            actual = ProfileTodoStats.objects.compute(profile_ids)
+            drifted = 0
+            for pid, counts in actual.items():
+                row = stored.get(pid)
+                # ردیف ساخته‌نشده انحراف نیست؛ در اولین نمایش داشبورد ساخته می‌شود
+                if row is not None and any(getattr(row, f) != counts[f] for f in FIELDS):
+                    drifted += 1
+                    if verify:
+                        have = {f: getattr(row, f) for f in FIELDS}
+                        self.stdout.write(f"profile {pid}: stored={have} actual={counts}")
+            if not verify:
+                ProfileTodoStats.objects.rebuild(profile_ids)
+        return drifted
@@ -0,0 +1,49 @@
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from todos import reminders
+
+
+class Command(BaseCommand):
+    help = "worker یادآوری سررسید تسک‌ها؛ چند پروسه می‌توانند همزمان اجرا شوند (SKIP LOCKED)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=reminders.BATCH_SIZE)
+        parser.add_argument('--interval', type=float, default=30,
+                            help='فاصلهٔ poll (ثانیه) وقتی صف خالی است.')
+        parser.add_argument('--once', action='store_true', help='صف را یک‌بار خالی کن و خارج شو.')
+
+    def handle(self, *args, batch_size=reminders.BATCH_SIZE, interval=30, once=False, **options):
+        stop = threading.Event()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            # دستهٔ در حال اجرا کامل می‌شود، بعد خروج
+            signal.signal(sig, lambda *_: stop.set())
+
+        claimed_total = sent_total = 0
+        while not stop.is_set():
+            close_old_connections()
+            try:
+                claimed, sent = reminders.run_batch(batch_size)
+            except Exception as e:
+                # مثلاً SMTP در دسترس نیست؛ دسته برگشت خورده و بعداً دوباره تلاش می‌شود
+                self.stderr.write(f"reminder batch failed: {e}")
+                if once:
+                    raise
+                stop.wait(interval)
+                continue
+
+            claimed_total += claimed
+            sent_total += sent
+            if claimed and options['verbosity'] > 1:
+                self.stdout.write(f"{claimed} todos claimed, {sent} emails sent.")
+            if claimed < batch_size:
+                # صف خالی شد
+                if once:
+                    break
+                stop.wait(interval)
+
+        close_old_connections()
+        self.stdout.write(self.style.SUCCESS(f"{claimed_total} todos reminded, {sent_total} emails sent."))
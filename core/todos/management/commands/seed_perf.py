@@ -0,0 +1,121 @@
+import random
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from accounts.models import Profile, User
+from todos.models import Priority, ProfileTodoStats, Tag, Todo
+from todos.services import explicit_timestamps
+
+FIRST_NAMES = ['علی', 'سارا', 'محمد', 'مریم', 'رضا', 'زهرا', 'حسین', 'نگار', 'امیر', 'فاطمه']
+LAST_NAMES = ['احمدی', 'رضایی', 'محمدی', 'کریمی', 'حسینی', 'موسوی', 'جعفری', 'صادقی']
+VERBS = ['خرید', 'بررسی', 'ارسال', 'تماس با', 'نوشتن', 'پرداخت', 'رزرو', 'تمدید', 'آماده‌سازی', 'پیگیری']
+OBJECTS = ['گزارش ماهانه', 'قبض برق', 'بلیط قطار', 'کد پروژه', 'ایمیل مشتری', 'جلسهٔ تیم', 'نان و شیر',
+           'کتاب جدید', 'بیمهٔ ماشین', 'ارائهٔ فصلی', 'دندانپزشک', 'پاسپورت', 'سرور تست', 'فاکتور']
+TAG_WORDS = ['کار', 'خانه', 'خرید', 'پروژه', 'فوری', 'سلامت', 'مالی', 'سفر', 'مطالعه', 'ورزش', 'خانواده',
+             'اداری', 'شخصی', 'ایده', 'جلسه', 'backend', 'frontend', 'infra', 'bug', 'review']
+
+# سهم اولویت‌ها: بیشتر تسک‌ها «متوسط»اند
+PRIORITY_WEIGHTS = {Priority.HIGH: 2, Priority.MEDIUM: 5, Priority.LOW: 3}
+
+
+class Command(BaseCommand):
+    help = "ساخت دادهٔ مصنوعی (کاربر، پروفایل، تگ، تسک) برای تست کارایی."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10)
+        parser.add_argument('--todos', type=int, default=500,
+                            help='میانگین تعداد تسک هر کاربر (توزیع نمایی، چند کاربر پرکار).')
+        parser.add_argument('--tags', type=int, default=20, help='میانگین تعداد تگ هر کاربر.')
+        parser.add_argument('--seed', type=int, default=None)
+        parser.add_argument('--password', default='perf-pass-123')
+        parser.add_argument('--prefix', default='perf', help='ایمیل‌ها: <prefix><n>@example.com')
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, users=10, todos=500, tags=20, seed=None, password='perf-pass-123',
+               prefix='perf', batch_size=2000, **options):
+        rng = random.Random(seed)
+        now = timezone.now()
+
+        with transaction.atomic():
+            profiles = self.create_profiles(rng, users, password, prefix)
+            tag_map = self.create_tags(rng, profiles, tags)
+            total = 0
+            with explicit_timestamps('created_at', 'updated_at'):
+                for profile in profiles:
+                    count = max(1, int(rng.expovariate(1 / todos)))
+                    total += self.create_todos(rng, profile, count, tag_map[profile.pk], now, batch_size)
+            ProfileTodoStats.objects.rebuild([p.pk for p in profiles])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(profiles)} users, {sum(len(t) for t in tag_map.values())} tags, {total} todos created."
+        ))
+
+    def create_profiles(self, rng, count, password, prefix):
+        start = User.objects.filter(email__startswith=prefix).count()
+        hashed = make_password(password)
+        users = User.objects.bulk_create([
+            User(email=f'{prefix}{n}@example.com', password=hashed)
+            for n in range(start, start + count)
+        ])
+        # bulk_create سیگنال post_save (ساخت پروفایل) را نمی‌فرستد
+        return Profile.objects.bulk_create([
+            Profile(
+                user=user,
+                first_name=rng.choice(FIRST_NAMES),
+                last_name=rng.choice(LAST_NAMES),
+                phone_number='09' + ''.join(rng.choice('0123456789') for _ in range(9)),
+            )
+            for user in users
+        ])
+
+    def create_tags(self, rng, profiles, avg):
+        objs, tag_map = [], {}
+        for profile in profiles:
+            n = max(1, min(int(rng.gauss(avg, avg / 3)), avg * 3))
+            names = rng.sample(TAG_WORDS, min(n, len(TAG_WORDS)))
+            names += [f'{rng.choice(TAG_WORDS)}-{i}' for i in range(n - len(names))]
+            objs.extend(Tag(profile=profile, name=name) for name in names)
+        for tag in Tag.objects.bulk_create(objs):
+            tag_map.setdefault(tag.profile_id, []).append(tag)
+        return tag_map
+
+    def create_todos(self, rng, profile, count, tags, now, batch_size):
+        priorities, weights = zip(*PRIORITY_WEIGHTS.items())
+        # محبوبیت تگ‌ها Zipf-مانند: چند تگ پراستفاده، بقیه کم
+        tag_weights = [1 / (i + 1) for i in range(len(tags))]
+        TodoTag = Todo.tags.through
+
+        created = 0
+        while created < count:
+            objs, tag_sets = [], []
+            for _ in range(min(batch_size, count - created)):
+                created_at = now - timedelta(days=rng.uniform(0, 365) ** 1.5 / 19)
+                is_done = rng.random() < 0.4
+                due_date = None
+                if rng.random() < 0.6:
+                    due_date = created_at + timedelta(days=rng.uniform(-2, 30), hours=rng.randint(0, 23))
+                objs.append(Todo(
+                    profile=profile,
+                    title=f'{rng.choice(VERBS)} {rng.choice(OBJECTS)}',
+                    description='' if rng.random() < 0.5 else f'{rng.choice(OBJECTS)} تا {rng.randint(1, 30)} ام',
+                    priority=rng.choices(priorities, weights)[0],
+                    is_done=is_done,
+                    archived=is_done and rng.random() < 0.3,
+                    due_date=due_date,
+                    completed_at=created_at + timedelta(days=rng.uniform(0, 10)) if is_done else None,
+                    created_at=created_at,
+                    updated_at=created_at,
+                ))
+                k = min(len(tags), rng.choices((0, 1, 2, 3), (3, 4, 2, 1))[0])
+                tag_sets.append(set(rng.choices(tags, tag_weights, k=k)))
+            Todo.objects.bulk_create(objs, batch_size=batch_size)
+            TodoTag.objects.bulk_create(
+                [TodoTag(todo_id=obj.pk, tag_id=tag.pk) for obj, ts in zip(objs, tag_sets) for tag in ts],
+                batch_size=batch_size,
+            )
+            created += len(objs)
+        return created
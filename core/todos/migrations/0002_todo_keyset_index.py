@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-18 02:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('todos', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='todo',
+            index=models.Index(fields=['profile', 'is_done', 'priority', '-created_at', '-id'], name='todo_profile_keyset_idx'),
+        ),
+    ]
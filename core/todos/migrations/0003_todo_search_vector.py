@@ -0,0 +1,95 @@
+# Generated by Django 5.2.5 on 2026-10-18 02:35
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+# باید با todos/search.py (PERSIAN_CHAR_MAP / PERSIAN_STRIP_CHARS) هم‌خوان بماند
+CHAR_MAP = {
+    'ي': 'ی', 'ى': 'ی', 'ك': 'ک', 'ۀ': 'ه', 'ة': 'ه',
+    **{chr(0x06F0 + i): str(i) for i in range(10)},
+    **{chr(0x0660 + i): str(i) for i in range(10)},
+}
+STRIP_CHARS = '\u200c\u0640' + ''.join(chr(c) for c in range(0x064B, 0x0653))
+
+TRANSLATE_FROM = ''.join(CHAR_MAP) + STRIP_CHARS
+TRANSLATE_TO = ''.join(CHAR_MAP.values())
+
+FORWARD_SQL = [
+    """
+    CREATE OR REPLACE FUNCTION todos_normalize_fa(value text) RETURNS text AS $$
+        SELECT lower(translate(coalesce(value, ''), %s, %s))
+    $$ LANGUAGE sql IMMUTABLE PARALLEL SAFE
+    """,
+    """
+    CREATE OR REPLACE FUNCTION todos_todo_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('simple', todos_normalize_fa(NEW.title)), 'A') ||
+            setweight(to_tsvector('simple', todos_normalize_fa(NEW.description)), 'B');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER todos_todo_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF title, description, search_vector ON todos_todo
+    FOR EACH ROW EXECUTE FUNCTION todos_todo_search_vector_update()
+    """,
+    "CREATE INDEX IF NOT EXISTS todos_todo_search_vector_gin ON todos_todo USING gin (search_vector)",
+    # پر کردن ردیف‌های موجود از طریق همان تریگر
+    "UPDATE todos_todo SET search_vector = NULL",
+]
+
+BACKWARD_SQL = [
+    "DROP INDEX IF EXISTS todos_todo_title_trgm",
+    "DROP INDEX IF EXISTS todos_todo_search_vector_gin",
+    "DROP TRIGGER IF EXISTS todos_todo_search_vector_trigger ON todos_todo",
+    "DROP FUNCTION IF EXISTS todos_todo_search_vector_update()",
+    "DROP FUNCTION IF EXISTS todos_normalize_fa(text)",
+]
+
+
+def create_search_objects(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for sql in FORWARD_SQL:
+            if '%s' in sql:
+                # پارامترها را امن درون بدنهٔ تابع قرار بده (DDL پارامتر نمی‌پذیرد)
+                cursor.execute('SELECT quote_literal(%s), quote_literal(%s)', [TRANSLATE_FROM, TRANSLATE_TO])
+                sql = sql % cursor.fetchone()
+            cursor.execute(sql)
+
+        # fallback فازی: فقط اگر pg_trgm روی سرور موجود باشد (بعضی سرویس‌های مدیریت‌شده ندارند)
+        cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        if cursor.fetchone() is not None:
+            cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+            cursor.execute(
+                'CREATE INDEX IF NOT EXISTS todos_todo_title_trgm '
+                'ON todos_todo USING gin (title gin_trgm_ops)'
+            )
+
+
+def drop_search_objects(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for sql in BACKWARD_SQL:
+            cursor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todos', '0002_todo_keyset_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='todo',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_objects, drop_search_objects),
+    ]
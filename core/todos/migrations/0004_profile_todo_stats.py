@@ -0,0 +1,30 @@
+# Generated by Django 5.2.5 on 2026-10-18 02:39
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('todos', '0003_todo_search_vector'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProfileTodoStats',
+            fields=[
+                ('profile', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='todo_stats', serialize=False, to='accounts.profile')),
+                ('open_count', models.IntegerField(default=0)),
+                ('done_count', models.IntegerField(default=0)),
+                ('archived_count', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='todo',
+            index=models.Index(fields=['profile', '-created_at'], name='todo_profile_recent_idx'),
+        ),
+    ]
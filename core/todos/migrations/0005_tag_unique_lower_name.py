@@ -0,0 +1,41 @@
+# Generated by Django 5.2.5 on 2026-10-18 02:44
+
+import django.db.models.functions.text
+from django.db import migrations, models
+from django.db.models.functions import Lower
+
+
+def merge_case_duplicates(apps, schema_editor):
+    """تگ‌های هم‌نام (بدون توجه به حروف) هر پروفایل را در قدیمی‌ترین ادغام کن."""
+    Tag = apps.get_model('todos', 'Tag')
+    Through = apps.get_model('todos', 'Todo').tags.through
+    keep = {}
+    for tag in Tag.objects.annotate(lname=Lower('name')).order_by('pk'):
+        key = (tag.profile_id, tag.lname)
+        if key not in keep:
+            keep[key] = tag.pk
+            continue
+        target = keep[key]
+        linked = set(Through.objects.filter(tag_id=target).values_list('todo_id', flat=True))
+        Through.objects.filter(tag_id=tag.pk).exclude(todo_id__in=linked).update(tag_id=target)
+        tag.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('todos', '0004_profile_todo_stats'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_case_duplicates, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='tag',
+            unique_together=set(),
+        ),
+        migrations.AddConstraint(
+            model_name='tag',
+            constraint=models.UniqueConstraint(models.F('profile'), django.db.models.functions.text.Lower('name'), name='uniq_tag_profile_lower_name'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.5 on 2026-10-18 03:11
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def mark_past_due(apps, schema_editor):
+    # سررسیدهای گذشته یادآوری نمی‌خواهند؛ ایندکس جزئی هم از همان اول کوچک ساخته می‌شود
+    Todo = apps.get_model('todos', 'Todo')
+    Todo.objects.using(schema_editor.connection.alias).filter(
+        due_date__lt=timezone.now(), reminded_at__isnull=True,
+    ).update(reminded_at=timezone.now())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_profile_avatar_variants'),
+        ('todos', '0006_attachment_dedup_uploads'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='todo',
+            name='reminded_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(mark_past_due, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='todo',
+            index=models.Index(condition=models.Q(('archived', False), ('due_date__isnull', False), ('is_done', False), ('reminded_at__isnull', True)), fields=['due_date'], name='todo_reminder_due_idx'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.5 on 2026-10-18 03:13
+
+import datetime
+import django.db.models.functions.comparison
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_profile_avatar_variants'),
+        ('todos', '0007_todo_reminders'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='todo',
+            name='todos_todo_due_dat_f2739d_idx',
+        ),
+        migrations.AddIndex(
+            model_name='todo',
+            index=models.Index(fields=['profile', 'due_date'], name='todo_profile_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='todo',
+            index=models.Index(condition=models.Q(('archived', False), ('is_done', False)), fields=['profile', 'due_date'], name='todo_profile_open_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='todo',
+            index=models.Index(models.F('profile'), django.db.models.functions.comparison.Coalesce('due_date', models.Value(datetime.datetime(9999, 12, 31, 0, 0, tzinfo=datetime.timezone.utc))), models.F('id'), name='todo_profile_due_sort_idx'),
+        ),
+    ]
@@ -0,0 +1,151 @@
+# Generated by Django 5.2.5 on 2026-10-18 03:59
+
+"""
+پارتیشن‌بندی todos_todo بر اساس archived (PostgreSQL).
+
+مرحلهٔ پنجرهٔ نگه‌داری (maintenance window) است، نه مایگریشن آنلاین: کل جدول در یک تراکنش با
+INSERT ... SELECT کپی می‌شود و جدول قدیمی تا پایان با قفل ACCESS EXCLUSIVE (DROP/RENAME) بسته
+می‌ماند؛ زمان اجرا با تعداد تسک‌ها خطی است. قبل از اجرا web، reminders و cronهای purge_trash و
+archive_todos را متوقف کنید (RUN_MIGRATIONS=0 و migrate دستی، README).
+
+بعد از آن:
+  - کلید اصلی (id, archived) است؛ یکتایی id فقط با sequence (todos_todo_id_seq) تضمین می‌شود و
+    دیتابیس جلوی id تکراری در دو پارتیشن را نمی‌گیرد. id را دستی مقدار ندهید.
+  - FK دیتابیسی جدول‌های دیگر به تسک (todos_todo_tags، ضمیمه‌ها، آپلودها) حذف می‌شود و در state
+    مایگریشن هم db_constraint=False است (جدول واسط تگ‌ها مدل صریح TodoTag می‌شود، همان جدول).
+  - UPDATE ستون archived ردیف را بین پارتیشن‌ها جابه‌جا می‌کند؛ تراکنش همزمان روی همان ردیف
+    serialization failure می‌گیرد که todos/retry.py تکرارش می‌کند.
+"""
+import django.db.models.deletion
+from django.db import migrations, models
+
+TABLE = 'todos_todo'
+REBUILD_TABLE = 'todos_todo_rebuild'
+SEQUENCE = 'todos_todo_id_seq'
+
+# پارتیشن‌ها بر اساس Todo.archived: ردیف فعال در active، آرشیوشده در archived
+PARTITIONS = (('todos_todo_active', 'false'), ('todos_todo_archived', 'true'))
+
+
+def rebuild_table(schema_editor, partitioned):
+    """
+    بازسازی todos_todo به‌صورت جدول پارتیشن‌شده (LIST روی archived) یا برعکس.
+
+    جدول پارتیشن‌شده identity (تا PostgreSQL 17) و کلید یکتای بدون ستون پارتیشن ندارد؛
+    پس id از یک sequence معمولی (OWNED BY، همان چیزی که pg_get_serial_sequence در importer
+    می‌خواند) پر می‌شود، کلید اصلی (id, archived) است و FKهای جدول‌های دیگر به تسک
+    (تگ‌ها، ضمیمه‌ها، آپلودها) با DROP ... CASCADE حذف می‌شوند. ایندکس‌ها، تریگر search_vector و FK
+    پروفایل از روی جدول فعلی خوانده و روی جدول جدید دوباره ساخته می‌شوند (روی هر پارتیشن).
+    """
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT indexdef FROM pg_indexes "
+            "WHERE schemaname = current_schema() AND tablename = %s AND indexname <> %s",
+            [TABLE, f'{TABLE}_pkey'],
+        )
+        # ایندکس جدول پارتیشن‌شده «ON ONLY» تعریف می‌شود (بدون پارتیشن‌ها)
+        indexes = [row[0].replace(' ON ONLY ', ' ON ') for row in cursor.fetchall()]
+        cursor.execute(
+            "SELECT pg_get_triggerdef(oid) FROM pg_trigger WHERE tgrelid = %s::regclass AND NOT tgisinternal",
+            [TABLE],
+        )
+        triggers = [row[0] for row in cursor.fetchall()]
+        cursor.execute(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = %s::regclass AND contype = 'f'",
+            [TABLE],
+        )
+        foreign_keys = cursor.fetchall()
+        cursor.execute(f"SELECT coalesce(max(id), 0) FROM {TABLE}")
+        last_id = cursor.fetchone()[0]
+
+        # بدون INCLUDING DEFAULTS/IDENTITY: تنها پیش‌فرض دیتابیسی همان id است و جدا ساخته می‌شود
+        cursor.execute(
+            f"CREATE TABLE {REBUILD_TABLE} (LIKE {TABLE} INCLUDING CONSTRAINTS INCLUDING STORAGE)"
+            + (" PARTITION BY LIST (archived)" if partitioned else "")
+        )
+        if partitioned:
+            for name, value in PARTITIONS:
+                cursor.execute(f"CREATE TABLE {name} PARTITION OF {REBUILD_TABLE} FOR VALUES IN ({value})")
+        cursor.execute(f"INSERT INTO {REBUILD_TABLE} SELECT * FROM {TABLE}")
+        # CASCADE فقط FKهای جدول‌های دیگر به این جدول را حذف می‌کند (در state: AlterFieldها و TodoTag پایین)
+        cursor.execute(f"DROP TABLE {TABLE} CASCADE")
+        cursor.execute(f"ALTER TABLE {REBUILD_TABLE} RENAME TO {TABLE}")
+
+        if partitioned:
+            cursor.execute(f"CREATE SEQUENCE {SEQUENCE} AS bigint OWNED BY {TABLE}.id")
+            cursor.execute(f"ALTER TABLE {TABLE} ALTER COLUMN id SET DEFAULT nextval('{SEQUENCE}')")
+            cursor.execute(f"ALTER TABLE {TABLE} ADD CONSTRAINT {TABLE}_pkey PRIMARY KEY (id, archived)")
+        else:
+            cursor.execute(f"ALTER TABLE {TABLE} ADD CONSTRAINT {TABLE}_pkey PRIMARY KEY (id)")
+            cursor.execute(f"ALTER TABLE {TABLE} ALTER COLUMN id ADD GENERATED BY DEFAULT AS IDENTITY")
+        if last_id:
+            cursor.execute("SELECT setval(pg_get_serial_sequence(%s, 'id'), %s)", [TABLE, last_id])
+
+        for name, definition in foreign_keys:
+            cursor.execute(f'ALTER TABLE {TABLE} ADD CONSTRAINT "{name}" {definition}')
+        for sql in indexes + triggers:
+            cursor.execute(sql)
+        cursor.execute(f"ANALYZE {TABLE}")
+
+
+def partition_todos(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    rebuild_table(schema_editor, partitioned=True)
+
+
+def unpartition_todos(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    rebuild_table(schema_editor, partitioned=False)
+    # FK جدول واسط تگ‌ها؛ FK ضمیمه‌ها را AlterFieldهای پایین برمی‌گردانند
+    through = apps.get_model('todos', 'Todo').tags.through
+    schema_editor.execute(schema_editor._create_fk_sql(
+        through, through._meta.get_field('todo'), '_fk_%(to_table)s_%(to_column)s'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_profile_avatar_variants'),
+        ('todos', '0010_todo_soft_delete'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='attachment',
+            name='todo',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='attachments', to='todos.todo'),
+        ),
+        migrations.AlterField(
+            model_name='attachmentupload',
+            name='todo',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='uploads', to='todos.todo'),
+        ),
+        migrations.AddIndex(
+            model_name='todo',
+            index=models.Index(condition=models.Q(('archived', False), ('deleted_at__isnull', True), ('is_done', True)), fields=['completed_at'], name='todo_archive_queue_idx'),
+        ),
+        migrations.RunPython(partition_todos, unpartition_todos),
+        # FK جدول واسط تگ‌ها را RunPython بالا (CASCADE) حذف کرده است؛ state همان را نشان می‌دهد
+        migrations.SeparateDatabaseAndState(state_operations=[
+            migrations.CreateModel(
+                name='TodoTag',
+                fields=[
+                    ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                    ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='todos.tag')),
+                    ('todo', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, to='todos.todo')),
+                ],
+                options={
+                    'db_table': 'todos_todo_tags',
+                    'unique_together': {('todo', 'tag')},
+                },
+            ),
+            migrations.AlterField(
+                model_name='todo',
+                name='tags',
+                field=models.ManyToManyField(blank=True, related_name='todos', through='todos.TodoTag', to='todos.tag'),
+            ),
+        ]),
+    ]
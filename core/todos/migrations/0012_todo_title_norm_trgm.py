@@ -0,0 +1,45 @@
+# Generated by Django 5.2.5 on 2026-10-18 05:10
+
+from django.db import migrations
+
+# fallback فازی جست‌وجو (todos/search.py) عنوان را با todos_normalize_fa مقایسه می‌کند؛ ایندکس
+# روی همان عبارت، نه ستون خام (عنوان با «ي/ك» عربی با کوئری نرمال‌شده جور نمی‌شد)
+
+
+def create_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+        if cursor.fetchone() is None:
+            return
+        cursor.execute('DROP INDEX IF EXISTS todos_todo_title_trgm')
+        cursor.execute(
+            'CREATE INDEX IF NOT EXISTS todos_todo_title_norm_trgm '
+            'ON todos_todo USING gin (todos_normalize_fa(title) gin_trgm_ops)'
+        )
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+        if cursor.fetchone() is None:
+            return
+        cursor.execute('DROP INDEX IF EXISTS todos_todo_title_norm_trgm')
+        cursor.execute(
+            'CREATE INDEX IF NOT EXISTS todos_todo_title_trgm '
+            'ON todos_todo USING gin (title gin_trgm_ops)'
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todos', '0011_todo_archive_partitions'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
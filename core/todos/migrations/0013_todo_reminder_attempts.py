@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-18 05:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todos', '0012_todo_title_norm_trgm'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='todo',
+            name='reminder_attempts',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+    ]
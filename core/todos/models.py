@@ -1,26 +1,200 @@
-from django.db import models
-from django.utils import timezone
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.postgres.search import SearchVectorField
+from django.core.cache import cache
+from django.db import models, router, transaction
+from django.db.models import BooleanField, Case, CharField, Count, ExpressionWrapper, F, Max, Q, Value, When
+from django.db.models.functions import Coalesce, Lower
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from django.utils import formats, timezone
+
+from . import events
+from .retry import retry_on_serialization_failure
 
 class Priority(models.IntegerChoices):
     HIGH = 1, 'بالا'
     MEDIUM = 2, 'متوسط'
     LOW = 3, 'پایین'
 
+class TagQuerySet(models.QuerySet):
+
+    def with_usage(self):
+        """
+        تعداد تسک‌های باز/انجام‌شدهٔ هر تگ (بدون آرشیوی‌ها) در یک کوئری aggregate؛
+        مرتب بر اساس پرکاربردترین.
+        """
+        return (self
+                .annotate(
+                    open_count=Count('todos', filter=Q(todos__is_done=False, todos__archived=False,
+                                                       todos__deleted_at__isnull=True)),
+                    done_count=Count('todos', filter=Q(todos__is_done=True, todos__archived=False,
+                                                       todos__deleted_at__isnull=True)),
+                )
+                .annotate(usage=F('open_count') + F('done_count'))
+                .order_by('-usage', 'name'))
+
+
+class TagManager(models.Manager.from_queryset(TagQuerySet)):
+
+    @staticmethod
+    def usage_cache_key(profile_id):
+        return f'todos:tag_usage:{profile_id}'
+
+    def usage_for(self, profile_id):
+        """تگ‌های پروفایل با شمارش استفاده؛ برای هر پروفایل کش می‌شود."""
+        key = self.usage_cache_key(profile_id)
+        tags = cache.get(key)
+        if tags is None:
+            tags = list(self.filter(profile_id=profile_id).with_usage())
+            cache.set(key, tags, getattr(settings, 'TODO_TAG_USAGE_CACHE_TIMEOUT', 60 * 60))
+        return tags
+
+    async def ausage_for(self, profile_id):
+        """نسخهٔ async همان usage_for (viewهای async)."""
+        key = self.usage_cache_key(profile_id)
+        tags = await cache.aget(key)
+        if tags is None:
+            tags = [t async for t in self.filter(profile_id=profile_id).with_usage()]
+            await cache.aset(key, tags, getattr(settings, 'TODO_TAG_USAGE_CACHE_TIMEOUT', 60 * 60))
+        return tags
+
+    def invalidate_usage(self, *profile_ids):
+        # بعد از commit؛ وگرنه درخواست همزمان ممکن است دادهٔ قدیمی را دوباره کش کند
+        keys = [self.usage_cache_key(pid) for pid in profile_ids]
+        transaction.on_commit(lambda: cache.delete_many(keys), using=self.db)
+
+
 class Tag(models.Model):
     profile = models.ForeignKey('accounts.Profile', on_delete=models.CASCADE, related_name='tags')
     name = models.CharField(max_length=30)
 
+    objects = TagManager()
+
     class Meta:
-        unique_together = ('profile', 'name')
         ordering = ('name',)
         indexes = [
             models.Index(fields=['profile', 'name']),
         ]
+        constraints = [
+            # یکتا بدون توجه به حروف؛ پشتوانهٔ جست‌وجوی تگ‌ها با lower(name)
+            models.UniqueConstraint('profile', Lower('name'), name='uniq_tag_profile_lower_name'),
+        ]
 
     def __str__(self):
         return self.name
 
 
+# مرتب‌سازی بر اساس سررسید: تسک‌های بدون سررسید آخر لیست (صفحه‌بندی keyset مقدار null نمی‌پذیرد)
+DUE_SORT_LAST = datetime(9999, 12, 31, tzinfo=dt_timezone.utc)
+DUE_SORT = Coalesce('due_date', Value(DUE_SORT_LAST))
+
+# تسک «در جریان» — همان شرط ایندکس‌های جزئی سررسید
+OPEN = Q(is_done=False, archived=False)
+
+
+def due_windows(now=None):
+    """
+    بازه‌های «امروز» و «این هفته» در منطقهٔ زمانی فعلی؛ پایان هفته از FIRST_DAY_OF_WEEK زبان فعال.
+    هر دو از now شروع می‌شوند: سررسید گذشته «عقب‌افتاده» است، همان برچسب with_due_status.
+    """
+    now = now or timezone.now()
+    today = timezone.localtime(now).date()
+    tz = timezone.get_current_timezone()
+    first_day = int(formats.get_format('FIRST_DAY_OF_WEEK'))  # 0 = یکشنبه
+    week_start = today - timedelta(days=(today.isoweekday() - first_day) % 7)
+
+    def at(day):
+        return datetime.combine(day, time.min, tzinfo=tz)
+    return {
+        'now': now,
+        'today': (now, at(today + timedelta(days=1))),
+        'week': (now, at(week_start + timedelta(days=7))),
+    }
+
+
+class TodoQuerySet(models.QuerySet):
+
+    def overdue(self, now=None):
+        return self.filter(OPEN, due_date__lt=now or timezone.now())
+
+    def due_today(self, now=None):
+        start, end = due_windows(now)['today']
+        return self.filter(OPEN, due_date__gte=start, due_date__lt=end)
+
+    def due_this_week(self, now=None):
+        start, end = due_windows(now)['week']
+        return self.filter(OPEN, due_date__gte=start, due_date__lt=end)
+
+    def with_due_status(self, now=None):
+        """
+        is_overdue_db و due_status ('overdue' | 'today' | 'week' | '') در خود کوئری.
+        """
+        w = due_windows(now)
+        return self.annotate(
+            # همان معنای Todo.is_overdue (آرشیو را در نظر نمی‌گیرد)
+            is_overdue_db=ExpressionWrapper(
+                Q(is_done=False, due_date__isnull=False, due_date__lt=w['now']), output_field=BooleanField()),
+            due_status=Case(
+                When(OPEN & Q(due_date__lt=w['now']), then=Value('overdue')),
+                When(OPEN & Q(due_date__lt=w['today'][1]), then=Value('today')),
+                When(OPEN & Q(due_date__lt=w['week'][1]), then=Value('week')),
+                default=Value(''),
+                output_field=CharField(),
+            ),
+        )
+
+    def order_by_due(self):
+        """نزدیک‌ترین سررسید اول، بدون سررسید آخر؛ با ایندکس todo_profile_due_sort_idx."""
+        return self.annotate(due_sort=DUE_SORT).order_by('due_sort', 'id')
+
+    @staticmethod
+    def _stamp_aggregates(now):
+        return {
+            'count': Count('pk'),
+            'last_id': Max('pk'),
+            'last_updated': Max('updated_at'),
+            # تسکی که سررسیدش می‌رسد بدون هیچ نوشتنی «عقب‌افتاده» نمایش داده می‌شود
+            'overdue': Count('pk', filter=Q(is_done=False, due_date__lt=now or timezone.now())),
+        }
+
+    def change_stamp(self, now=None):
+        """
+        خلاصهٔ ارزان ردیف‌ها در یک aggregate برای ETag (todos/conditional.py): ساخت، حذف و
+        ویرایش (همهٔ مسیرها updated_at را جلو می‌برند) دست‌کم یکی از مقدارها را عوض می‌کند.
+        """
+        return self.order_by().aggregate(**self._stamp_aggregates(now))
+
+    async def achange_stamp(self, now=None):
+        return await self.order_by().aaggregate(**self._stamp_aggregates(now))
+
+    def trashed(self):
+        return self.filter(deleted_at__isnull=False)
+
+    def locked_buckets(self):
+        """
+        {pk: دستهٔ آماری فعلی} با قفل ردیف‌ها (FOR UPDATE)؛ داخل تراکنش نوشتن صدا زده شود.
+        وضعیت instance لحظهٔ بارگذاری است و ممکن است درخواست دیگری (مثلاً toggle دوباره) آن را
+        عوض کرده باشد؛ delta شمارنده‌ها باید از همین ردیف قفل‌شده حساب شود.
+        """
+        rows = self.order_by().select_for_update().values_list('pk', 'is_done', 'archived', 'deleted_at')
+        return {pk: ProfileTodoStats.bucket(*state) for pk, *state in rows}
+
+
+class TodoManager(models.Manager.from_queryset(TodoQuerySet)):
+    """
+    تسک‌های سطل زباله (deleted_at) را برنمی‌گرداند؛ related managerها (profile.todos) هم همین‌طور.
+    Todo.all_objects همه را برمی‌گرداند (صفحهٔ سطل زباله، بازگردانی، purge_trash).
+    """
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
 class Todo(models.Model):
     # مالک تسک: پروفایل
     profile = models.ForeignKey('accounts.Profile', on_delete=models.CASCADE, related_name='todos')
@@ -36,19 +210,59 @@ class Todo(models.Model):
     completed_at = models.DateTimeField(null=True, blank=True)
 
     # تگ‌ها (به تگ‌های همان پروفایل لینک می‌شود)
-    tags = models.ManyToManyField(Tag, blank=True, related_name='todos')
+    tags = models.ManyToManyField(Tag, blank=True, related_name='todos', through='TodoTag')
 
+    # روی PostgreSQL جدول بر اساس archived پارتیشن شده است (todos_todo_active / todos_todo_archived؛
+    # مایگریشن 0011)؛ آرشیو کردن ردیف را به پارتیشن سرد می‌برد و ایندکس‌های پارتیشن فعال کوچک می‌مانند.
+    # کلید اصلی دیتابیس (id, archived) است: aggregate روی join هر تسک (annotate(Count('attachments')))
+    # باید بعد از values(...) بیاید، وگرنه GROUP BY فقط id است و PostgreSQL خطا می‌دهد
     archived = models.BooleanField(default=False)
 
+    # حذف نرم: تسک در سطل زباله است و بعد از TODO_TRASH_RETENTION_DAYS با manage.py purge_trash حذف قطعی می‌شود
+    deleted_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    # زمان ارسال یادآوری سررسید (todos/reminders.py)؛ با تغییر due_date پاک می‌شود
+    reminded_at = models.DateTimeField(null=True, blank=True, editable=False)
+    # ارسال‌های ناموفق یادآوری برای سررسید فعلی؛ با تغییر due_date صفر می‌شود
+    reminder_attempts = models.PositiveSmallIntegerField(default=0, editable=False)
+
+    # جست‌وجوی متنی؛ توسط تریگر دیتابیس از title/description پر می‌شود (todos/search.py)
+    search_vector = SearchVectorField(null=True, editable=False)
+
     # زمان‌ها
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = TodoManager()
+    all_objects = TodoQuerySet.as_manager()
+
     class Meta:
         ordering = ('is_done', 'priority', '-created_at')
         indexes = [
             models.Index(fields=['profile', 'is_done', 'archived']),
-            models.Index(fields=['due_date']),
+            # بازهٔ due_after/due_before (همیشه برای یک پروفایل)
+            models.Index(fields=['profile', 'due_date'], name='todo_profile_due_idx'),
+            # overdue / due_today / due_this_week
+            models.Index(fields=['profile', 'due_date'], name='todo_profile_open_due_idx', condition=OPEN),
+            # مرتب‌سازی بر اساس سررسید (TodoQuerySet.order_by_due)
+            models.Index(F('profile'), DUE_SORT, F('id'), name='todo_profile_due_sort_idx'),
+            # صفحه‌بندی keyset روی همان ترتیب Meta.ordering (+ id)
+            models.Index(fields=['profile', 'is_done', 'priority', '-created_at', '-id'],
+                         name='todo_profile_keyset_idx'),
+            # «تسک‌های اخیر» داشبورد
+            models.Index(fields=['profile', '-created_at'], name='todo_profile_recent_idx'),
+            # صف یادآوری: فقط تسک‌های باز و یادآوری‌نشده؛ با ارسال یادآوری از ایندکس خارج می‌شوند
+            models.Index(fields=['due_date'], name='todo_reminder_due_idx',
+                         condition=Q(is_done=False, archived=False, reminded_at__isnull=True,
+                                     due_date__isnull=False)),
+            # سطل زبالهٔ هر پروفایل و صف purge_trash؛ فقط ردیف‌های حذف‌شده
+            models.Index(fields=['profile', '-deleted_at'], name='todo_profile_trash_idx',
+                         condition=Q(deleted_at__isnull=False)),
+            models.Index(fields=['deleted_at'], name='todo_trash_purge_idx',
+                         condition=Q(deleted_at__isnull=False)),
+            # صف archive_todos: تسک‌های انجام‌شده و هنوز آرشیونشده
+            models.Index(fields=['completed_at'], name='todo_archive_queue_idx',
+                         condition=Q(is_done=True, archived=False, deleted_at__isnull=True)),
         ]
 
     def __str__(self):
@@ -71,10 +285,23 @@ class Todo(models.Model):
     @property
     def is_overdue(self):
         """آیا سررسید گذشته؟ (فقط اگر done نیست و due_date دارد)"""
+        if 'is_overdue_db' in self.__dict__:
+            # TodoQuerySet.with_due_status
+            return self.is_overdue_db
         return bool(self.due_date and not self.is_done and self.due_date < timezone.now())
 
 
-    def save(self, *args, **kwargs):
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if 'due_date' in instance.__dict__:
+            instance._loaded_due_date = instance.due_date
+        return instance
+
+    def set_derived_fields(self):
+        """
+        فیلدهای وابسته قبل از ذخیره؛ مسیرهای bulk_create/bulk_update هم صدا می‌زنند.
+        """
         # وقتی تسک done شد، completed_at را ست کن؛ وقتی از done خارج شد، پاک کن
         if self.is_done and self.completed_at is None:
             self.completed_at = timezone.now()
@@ -85,24 +312,328 @@ class Todo(models.Model):
         if self.title:
             self.title = self.title.strip()
 
-        super().save(*args, **kwargs)
+        # سررسید جدید یادآوری جدید می‌خواهد
+        if self.due_date != getattr(self, '_loaded_due_date', self.due_date):
+            self.reminded_at = None
+            self.reminder_attempts = 0
+        self._loaded_due_date = self.due_date
+
+    @retry_on_serialization_failure
+    def save(self, *args, **kwargs):
+        self.set_derived_fields()
+
+        adding = self._state.adding
+        using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using):
+            old_bucket = None
+            if not adding:
+                old_bucket = Todo.all_objects.db_manager(using).filter(pk=self.pk).locked_buckets().get(self.pk)
+
+            super().save(*args, **kwargs)
+
+            new_bucket = ProfileTodoStats.bucket(self.is_done, self.archived, self.deleted_at)
+            if old_bucket != new_bucket:
+                deltas = {}
+                if new_bucket:
+                    deltas[new_bucket] = 1
+                if old_bucket:
+                    deltas[old_bucket] = -1
+                ProfileTodoStats.objects.db_manager(using).apply_delta(self.profile_id, deltas)
+                if not adding:
+                    # شمارش باز/انجام‌شدهٔ تگ‌های این تسک عوض شده
+                    Tag.objects.db_manager(using).invalidate_usage(self.profile_id)
+
+
+class TodoTag(models.Model):
+    """جدول واسط تگ‌ها (همان todos_todo_tags که Django خودش می‌ساخت)."""
+    # بدون FK دیتابیس به تسک: کلید جدول پارتیشن‌شده (id, archived) است (مایگریشن 0011)
+    todo = models.ForeignKey(Todo, on_delete=models.CASCADE, db_constraint=False)
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE)
+
+    class Meta:
+        db_table = 'todos_todo_tags'
+        unique_together = (('todo', 'tag'),)
+
+    def __str__(self):
+        return f"Todo #{self.todo_id} - Tag #{self.tag_id}"
 
 
 class Attachment(models.Model):
     # فایل‌های ضمیمهٔ هر تسک
-    todo = models.ForeignKey(Todo, on_delete=models.CASCADE, related_name='attachments')
+    # بدون FK دیتابیس: کلید جدول پارتیشن‌شدهٔ تسک‌ها (id, archived) است؛ CASCADE را Django انجام می‌دهد
+    todo = models.ForeignKey(Todo, on_delete=models.CASCADE, related_name='attachments', db_constraint=False)
     file = models.FileField(upload_to='todo_attachments/%Y/%m/%d/')
     uploaded_at = models.DateTimeField(auto_now_add=True)
 
+    # فایل‌های یکسان (sha256 برابر) یک‌بار ذخیره می‌شوند و چند ضمیمه به همان file اشاره می‌کنند
+    sha256 = models.CharField(max_length=64, blank=True, db_index=True)
+    size = models.BigIntegerField(default=0)
+    content_type = models.CharField(max_length=100, blank=True)
+    original_name = models.CharField(max_length=255, blank=True)
+
     def __str__(self):
         return f"Attachment #{self.pk} for Todo #{self.todo_id}"
 
+    @property
+    def display_name(self):
+        return self.original_name or self.file.name.rsplit('/', 1)[-1]
+
+
+class AttachmentUpload(models.Model):
+    """
+    آپلود تکه‌ای/ادامه‌دار (todos/attachments.py)؛ تکه‌ها به فایل موقت اضافه می‌شوند
+    و با رسیدن received به size، Attachment ساخته و این ردیف حذف می‌شود.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    todo = models.ForeignKey(Todo, on_delete=models.CASCADE, related_name='uploads', db_constraint=False)
+    filename = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=100)
+    size = models.BigIntegerField()
+    received = models.BigIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Upload {self.pk} ({self.received}/{self.size})"
+
+
+class SavedFilterManager(models.Manager):
+
+    @staticmethod
+    def cache_key(profile_id):
+        return f'todos:saved_filters:{profile_id}'
+
+    def for_profile(self, profile_id):
+        """فیلترهای ذخیره‌شدهٔ پروفایل (در هر نمایش لیست لازم‌اند؛ کش می‌شوند)."""
+        key = self.cache_key(profile_id)
+        filters = cache.get(key)
+        if filters is None:
+            filters = list(self.filter(profile_id=profile_id))
+            cache.set(key, filters, getattr(settings, 'TODO_TAG_USAGE_CACHE_TIMEOUT', 60 * 60))
+        return filters
 
+    async def afor_profile(self, profile_id):
+        key = self.cache_key(profile_id)
+        filters = await cache.aget(key)
+        if filters is None:
+            filters = [f async for f in self.filter(profile_id=profile_id)]
+            await cache.aset(key, filters, getattr(settings, 'TODO_TAG_USAGE_CACHE_TIMEOUT', 60 * 60))
+        return filters
 
+    def invalidate(self, profile_id):
+        key = self.cache_key(profile_id)
+        transaction.on_commit(lambda: cache.delete(key), using=self.db)
 
 
+class SavedFilter(models.Model):
+    """querystring فیلترهای لیست تسک‌ها با یک نام (todos/filters.py)."""
+    MAX_PER_PROFILE = 20
 
+    profile = models.ForeignKey('accounts.Profile', on_delete=models.CASCADE, related_name='saved_filters')
+    name = models.CharField(max_length=50)
+    query = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = SavedFilterManager()
 
+    class Meta:
+        ordering = ('name',)
+        constraints = [
+            models.UniqueConstraint('profile', Lower('name'), name='uniq_saved_filter_profile_lower_name'),
+        ]
+
+    def __str__(self):
+        return self.name
 
 
+_pending_stats = ContextVar('todo_stats_pending', default=None)
+
+
+class ProfileTodoStatsManager(models.Manager):
+
+    def apply_delta(self, profile_id, deltas):
+        """
+        افزایش/کاهش اتمیک شمارنده‌ها: {'open_count': -1, 'done_count': 1}
+        اگر ردیف آمار هنوز ساخته نشده کاری نمی‌کند؛ for_profile آن را از روی
+        جدول تسک‌ها می‌سازد.
+        """
+        pending = _pending_stats.get()
+        if pending is not None:
+            acc = pending.setdefault((self.db, profile_id), {})
+            for name, value in deltas.items():
+                acc[name] = acc.get(name, 0) + value
+            return
+        changes = {name: F(name) + value for name, value in deltas.items() if value}
+        if changes:
+            self.filter(profile_id=profile_id).update(updated_at=timezone.now(), **changes)
+
+    @contextmanager
+    def batch(self):
+        """
+        برای عملیات دسته‌ای: deltaها جمع می‌شوند و در پایان یک UPDATE برای هر
+        پروفایل اجرا می‌شود. باید داخل همان transaction.atomic عملیات باشد.
+        """
+        if _pending_stats.get() is not None:
+            yield
+            return
+        pending = {}
+        token = _pending_stats.set(pending)
+        try:
+            yield
+        finally:
+            _pending_stats.reset(token)
+        for (using, profile_id), deltas in pending.items():
+            self.db_manager(using).apply_delta(profile_id, deltas)
+
+    def compute(self, profile_ids):
+        """شمارش واقعی از جدول تسک‌ها؛ یک کوئری aggregate برای همهٔ پروفایل‌ها."""
+        counts = {pid: {'open_count': 0, 'done_count': 0, 'archived_count': 0} for pid in profile_ids}
+        rows = (Todo.objects.using(self.db)
+                .filter(profile_id__in=profile_ids)
+                .order_by()
+                .values('profile_id')
+                .annotate(
+                    open_count=Count('pk', filter=Q(is_done=False, archived=False)),
+                    done_count=Count('pk', filter=Q(is_done=True, archived=False)),
+                    archived_count=Count('pk', filter=Q(archived=True)),
+                ))
+        for row in rows:
+            counts[row.pop('profile_id')] = row
+        return counts
+
+    def rebuild(self, profile_ids):
+        counts = self.compute(profile_ids)
+        now = timezone.now()
+        self.bulk_create(
+            [self.model(profile_id=pid, updated_at=now, **c) for pid, c in counts.items()],
+            update_conflicts=True,
+            unique_fields=['profile'],
+            update_fields=['open_count', 'done_count', 'archived_count', 'updated_at'],
+        )
+        return counts
+
+    def for_profile(self, profile):
+        stats = self.filter(profile=profile).first()
+        if stats is None:
+            self.rebuild(profile_ids=[profile.pk])
+            stats = self.get(profile=profile)
+        return stats
+
+    async def afor_profile(self, profile):
+        stats = await self.filter(profile=profile).afirst()
+        if stats is None:
+            await sync_to_async(self.rebuild)(profile_ids=[profile.pk])
+            stats = await self.aget(profile=profile)
+        return stats
+
+
+class ProfileTodoStats(models.Model):
+    """
+    شمارنده‌های denormalized هر پروفایل برای داشبورد.
+    در Todo.save و حذف تسک به‌روز می‌شود؛ `manage.py rebuild_todo_stats` برای اصلاح انحراف.
+    """
+    profile = models.OneToOneField('accounts.Profile', on_delete=models.CASCADE,
+                                   primary_key=True, related_name='todo_stats')
+    open_count = models.IntegerField(default=0)
+    done_count = models.IntegerField(default=0)
+    archived_count = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    objects = ProfileTodoStatsManager()
+
+    def __str__(self):
+        return f"Stats for {self.profile_id}"
+
+    @staticmethod
+    def bucket(is_done, archived, deleted_at=None):
+        """نام شمارندهٔ هر تسک؛ None برای تسک سطل زباله که در هیچ شمارنده‌ای نیست."""
+        if deleted_at:
+            return None
+        if archived:
+            return 'archived_count'
+        return 'done_count' if is_done else 'open_count'
+
+
+@receiver(post_delete, sender=Todo)
+def update_stats_on_delete(sender, instance, using, **kwargs):
+    # داخل تراکنش حذف اجرا می‌شود (Collector.delete اتمیک است)
+    bucket = ProfileTodoStats.bucket(instance.is_done, instance.archived, instance.deleted_at)
+    if bucket:
+        ProfileTodoStats.objects.db_manager(using).apply_delta(instance.profile_id, {bucket: -1})
+    Tag.objects.db_manager(using).invalidate_usage(instance.profile_id)
+
+
+@receiver(m2m_changed, sender=Todo.tags.through)
+def touch_todos_on_tags_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    تغییر تگ‌های تسک updated_at را جلو می‌برد تا کش fragment ردیف (todos/fragments.py) باطل شود.
+    """
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if not reverse:
+        todo_ids = [instance.pk]
+    elif action == 'pre_clear':
+        todo_ids = instance.todos.values('pk')
+    else:
+        todo_ids = pk_set or []
+    Todo.objects.filter(pk__in=todo_ids).update(updated_at=timezone.now())
+
+
+@receiver(m2m_changed, sender=Todo.tags.through)
+def invalidate_tag_usage_on_tags_changed(sender, instance, action, using, **kwargs):
+    # در هر دو جهت (todo.tags / tag.todos) instance پروفایل دارد
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        Tag.objects.db_manager(using).invalidate_usage(instance.profile_id)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def invalidate_tag_usage_on_tag_change(sender, instance, using, **kwargs):
+    Tag.objects.db_manager(using).invalidate_usage(instance.profile_id)
+
+
+@receiver(post_save, sender=Todo)
+def publish_todo_saved(sender, instance, created, using, raw=False, **kwargs):
+    if not raw:
+        events.notify(instance.profile_id, 'created' if created else 'updated', [instance.pk], using=using)
+
+
+@receiver(post_delete, sender=Todo)
+def publish_todo_deleted(sender, instance, using, **kwargs):
+    events.notify(instance.profile_id, 'deleted', [instance.pk], using=using)
+
+
+@receiver(m2m_changed, sender=Todo.tags.through)
+def publish_todo_tags_changed(sender, instance, action, reverse, using, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if reverse:
+        # tag.todos: شناسهٔ تسک‌ها در post_clear معلوم نیست
+        events.notify(instance.profile_id, reset=True, using=using)
+    else:
+        events.notify(instance.profile_id, 'updated', [instance.pk], using=using)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def publish_tag_changed(sender, instance, using, **kwargs):
+    events.notify(instance.profile_id, tags=True, using=using)
+
+
+@receiver(post_delete, sender=Attachment)
+def delete_unreferenced_attachment_file(sender, instance, using, **kwargs):
+    # فایل ممکن است بین چند ضمیمه مشترک باشد (dedup)؛ فقط آخرین ارجاع آن را پاک می‌کند
+    name = instance.file.name
+    if not name:
+        return
+
+    def cleanup():
+        if not Attachment.objects.using(using).filter(file=name).exists():
+            instance.file.storage.delete(name)
+    transaction.on_commit(cleanup, using=using)
+
+
+@receiver(post_save, sender=SavedFilter)
+@receiver(post_delete, sender=SavedFilter)
+def invalidate_saved_filters(sender, instance, using, **kwargs):
+    SavedFilter.objects.db_manager(using).invalidate(instance.profile_id)
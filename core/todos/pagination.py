@@ -0,0 +1,206 @@
+import base64
+import binascii
+import datetime
+import json
+
+from django.db import connections
+from django.db.models import Q
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def _normalize(field):
+    """'-pk' -> ('id', True)"""
+    desc = field.startswith('-')
+    name = field.lstrip('-')
+    return name, desc
+
+
+def ordering_for(queryset):
+    """
+    ترتیب فعلی کوئری‌ست (یا Meta.ordering) به‌همراه pk به‌عنوان tiebreaker.
+    """
+    model = queryset.model
+    ordering = list(queryset.query.order_by or model._meta.ordering or [])
+    fields = []
+    for f in ordering:
+        if not isinstance(f, str):
+            raise ValueError('Keyset pagination only supports plain field ordering.')
+        name, desc = _normalize(f)
+        if name == 'pk':
+            name = model._meta.pk.attname
+        fields.append(('-' if desc else '') + name)
+    pk_name = model._meta.pk.attname
+    if not any(_normalize(f)[0] == pk_name for f in fields):
+        # جهت tiebreaker را هم‌سو با آخرین فیلد بگیر
+        last_desc = _normalize(fields[-1])[1] if fields else False
+        fields.append(('-' if last_desc else '') + pk_name)
+    return fields
+
+
+def _jsonable(value):
+    # isoformat کامل (با میکروثانیه)؛ DjangoJSONEncoder تا میلی‌ثانیه کوتاه می‌کند
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    return value
+
+
+def encode_cursor(values, direction='next'):
+    payload = json.dumps({'v': [_jsonable(v) for v in values], 'd': direction}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        values, direction = data['v'], data['d']
+    except (ValueError, KeyError, TypeError, binascii.Error, UnicodeDecodeError):
+        raise InvalidCursor(token)
+    if direction not in ('next', 'prev') or not isinstance(values, list):
+        raise InvalidCursor(token)
+    return values, direction
+
+
+def approximate_count(queryset):
+    """
+    تعداد تقریبی ردیف‌ها. روی PostgreSQL از تخمین planner (EXPLAIN) استفاده
+    می‌کند تا هزینه‌ای مثل COUNT(*) کامل نداشته باشد؛ در بقیهٔ دیتابیس‌ها count().
+    """
+    qs = queryset.order_by()
+    connection = connections[qs.db]
+    if connection.vendor != 'postgresql':
+        return qs.count()
+    sql, params = qs.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class CursorPage:
+    """
+    یک صفحه از نتایج keyset؛ رابطی شبیه django.core.paginator.Page.
+    """
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    @property
+    def next_cursor(self):
+        if not self._has_next or not self.object_list:
+            return None
+        return self.paginator.cursor_for(self.object_list[-1], 'next')
+
+    @property
+    def previous_cursor(self):
+        if not self._has_previous or not self.object_list:
+            return None
+        return self.paginator.cursor_for(self.object_list[0], 'prev')
+
+
+class KeysetPaginator:
+    """
+    صفحه‌بندی مبتنی بر cursor (keyset) روی ترتیب کوئری‌ست.
+
+    به‌جای OFFSET، شرط «بعد از آخرین ردیف صفحهٔ قبل» ساخته می‌شود؛ پس هزینهٔ
+    صفحهٔ N با صفحهٔ اول یکی است. فیلدهای ترتیب باید non-null باشند.
+    """
+    def __init__(self, queryset, per_page):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.ordering = ordering_for(queryset)
+        self.model = queryset.model
+
+    def cursor_for(self, obj, direction):
+        values = [getattr(obj, _normalize(f)[0]) for f in self.ordering]
+        return encode_cursor(values, direction)
+
+    def _to_python(self, values):
+        if len(values) != len(self.ordering):
+            raise InvalidCursor(values)
+        out = []
+        for f, raw in zip(self.ordering, values):
+            name = _normalize(f)[0]
+            try:
+                field = self.model._meta.get_field(name)
+            except Exception:
+                # ستون annotate‌شده (مثلاً due_sort)
+                annotation = self.queryset.query.annotations.get(name)
+                if annotation is None:
+                    out.append(raw)
+                    continue
+                field = annotation.output_field
+            try:
+                out.append(field.to_python(raw))
+            except Exception:
+                raise InvalidCursor(values)
+        return out
+
+    def _seek(self, values, reverse=False):
+        """
+        (a, b, c) > (x, y, z) با رعایت جهت هر ستون، به‌صورت OR از ANDها.
+        """
+        cond = Q()
+        for i, f in enumerate(self.ordering):
+            name, desc = _normalize(f)
+            if reverse:
+                desc = not desc
+            lookup = '%s__%s' % (name, 'lt' if desc else 'gt')
+            term = Q(**{lookup: values[i]})
+            for prev_f, prev_v in zip(self.ordering[:i], values[:i]):
+                term &= Q(**{_normalize(prev_f)[0]: prev_v})
+            cond |= term
+        return cond
+
+    def _page_queryset(self, cursor):
+        qs = self.queryset.order_by(*self.ordering)
+        direction = 'next'
+        if cursor:
+            raw, direction = decode_cursor(cursor)
+            values = self._to_python(raw)
+            if direction == 'prev':
+                reversed_ordering = [f[1:] if f.startswith('-') else '-' + f for f in self.ordering]
+                qs = qs.filter(self._seek(values, reverse=True)).order_by(*reversed_ordering)
+            else:
+                qs = qs.filter(self._seek(values))
+        return qs[:self.per_page + 1], direction
+
+    def _make_page(self, rows, cursor, direction):
+        extra = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+
+        if direction == 'prev':
+            rows.reverse()
+            return CursorPage(rows, self, has_next=True, has_previous=extra)
+        return CursorPage(rows, self, has_next=extra, has_previous=bool(cursor))
+
+    def page(self, cursor=None):
+        qs, direction = self._page_queryset(cursor)
+        return self._make_page(list(qs), cursor, direction)
+
+    async def apage(self, cursor=None):
+        """همان page برای viewهای async (ORM async)."""
+        qs, direction = self._page_queryset(cursor)
+        return self._make_page([obj async for obj in qs], cursor, direction)
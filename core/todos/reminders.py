@@ -0,0 +1,110 @@
+"""
+یادآوری ایمیلی سررسید تسک‌ها (`manage.py run_reminders`).
+
+هر دور یک دسته از تسک‌های باز و یادآوری‌نشده که سررسیدشان تا TODO_REMINDER_LEAD_MINUTES
+دیگر می‌رسد با SELECT ... FOR UPDATE SKIP LOCKED برداشته می‌شود؛ پس چند worker موازی
+هرگز یک تسک را دوبار برنمی‌دارند. جست‌وجو فقط روی ایندکس جزئی todo_reminder_due_idx
+انجام می‌شود و تسک‌ها بعد از یادآوری (reminded_at) از آن خارج می‌شوند.
+
+ایمیل‌های هر دسته (یکی برای هر پروفایل) با یک اتصال به EMAIL_BACKEND و جدا از هم ارسال
+می‌شوند. اگر خود اتصال باز نشود (مثلاً SMTP در دسترس نیست) تراکنش برمی‌گردد و دسته در دور
+بعد دوباره برداشته می‌شود (حداقل‌یک‌بار؛ ممکن است ایمیلی تکراری برسد). خطای یک ایمیل فقط
+تسک‌های همان پروفایل را در صف نگه می‌دارد و reminder_attempts آن‌ها را زیاد می‌کند؛ بعد از
+TODO_REMINDER_MAX_ATTEMPTS تلاش کنار گذاشته می‌شوند تا یک گیرندهٔ خراب صف را متوقف نکند.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import F, Q
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from .models import Todo
+from .retry import retry_on_serialization_failure
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+
+# همان شرط ایندکس جزئی todo_reminder_due_idx
+PENDING = Q(is_done=False, archived=False, reminded_at__isnull=True, due_date__isnull=False)
+
+
+def lead_time():
+    return timedelta(minutes=getattr(settings, 'TODO_REMINDER_LEAD_MINUTES', 60))
+
+
+def max_age():
+    # سررسیدهای خیلی قدیمی (مثلاً دادهٔ واردشده) بی‌صدا علامت می‌خورند
+    return timedelta(hours=getattr(settings, 'TODO_REMINDER_MAX_AGE_HOURS', 24))
+
+
+def max_attempts():
+    return getattr(settings, 'TODO_REMINDER_MAX_ATTEMPTS', 3)
+
+
+def claim(now, batch_size=BATCH_SIZE):
+    """قفل یک دسته؛ باید داخل transaction.atomic صدا زده شود."""
+    return list(Todo.objects
+                .filter(PENDING, due_date__lte=now + lead_time())
+                .select_related('profile__user')
+                .select_for_update(skip_locked=True, of=('self',))
+                .order_by('due_date')[:batch_size])
+
+
+def build_messages(todos):
+    """یک ایمیل برای هر پروفایل با همهٔ تسک‌های آن در این دسته: {profile_id: EmailMessage}"""
+    by_profile = {}
+    for todo in todos:
+        by_profile.setdefault(todo.profile_id, []).append(todo)
+
+    site_url = getattr(settings, 'SITE_URL', '').rstrip('/')
+    messages = {}
+    for profile_id, items in by_profile.items():
+        profile = items[0].profile
+        body = render_to_string('todos/email/reminder.txt', {
+            'profile': profile,
+            'todos': items,
+            'site_url': site_url,
+        })
+        subject = (f'[ToDoApp] سررسید «{items[0].title}»' if len(items) == 1
+                   else f'[ToDoApp] سررسید {len(items)} تسک')
+        messages[profile_id] = EmailMessage(subject, body, None, [profile.user.email])
+    return messages
+
+
+@retry_on_serialization_failure
+def run_batch(batch_size=BATCH_SIZE, now=None, connection=None):
+    """
+    یک دسته: برداشتن، ارسال، علامت‌گذاری. خروجی: (تعداد برداشته‌شده، تعداد ایمیل ارسال‌شده)
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        todos = claim(now, batch_size)
+        if not todos:
+            return 0, 0
+        stale = now - max_age()
+        due = [t for t in todos if t.due_date >= stale and t.profile.user.is_active]
+        messages = build_messages(due)
+        failed = set()
+        if messages:
+            # یک اتصال SMTP برای کل دسته؛ خطای open() کل دسته را برمی‌گرداند
+            with (connection or get_connection()) as conn:
+                for profile_id, message in messages.items():
+                    try:
+                        conn.send_messages([message])
+                    except Exception:
+                        logger.exception('reminder email failed for profile %s', profile_id)
+                        failed.add(profile_id)
+
+        # بدون تغییر updated_at: کش ردیف‌ها (fragments) معتبر می‌ماند
+        retry = [t.pk for t in due if t.profile_id in failed]
+        Todo.objects.filter(pk__in=[t.pk for t in todos if t.pk not in retry]).update(reminded_at=now)
+        if retry:
+            failing = Todo.objects.filter(pk__in=retry)
+            failing.update(reminder_attempts=F('reminder_attempts') + 1)
+            failing.filter(reminder_attempts__gte=max_attempts()).update(reminded_at=now)
+    return len(todos), len(messages) - len(failed)
@@ -0,0 +1,39 @@
+"""
+تکرار تراکنش بعد از serialization failure (SQLSTATE 40001).
+
+روی PostgreSQL جدول تسک‌ها بر اساس archived پارتیشن شده است (مایگریشن 0011) و UPDATE این ستون
+ردیف را به پارتیشن دیگر منتقل می‌کند. تراکنش همزمانی که همان ردیف را قفل یا ویرایش می‌کند
+به‌جای نسخهٔ جدید ردیف خطای «tuple to be locked was already moved to another partition due to
+concurrent update» می‌گیرد. خطا گذراست: تکرار کل تراکنش ردیف را در پارتیشن جدید می‌بیند.
+
+فقط بیرونی‌ترین تراکنش تکرار می‌شود؛ داخل transaction.atomic دیگر خطا بالا می‌رود تا همان
+تراکنش بیرونی تصمیم بگیرد. پس دکوریتور روی تابعی می‌نشیند که تراکنش را باز می‌کند: Todo.save،
+TodoForm.save، سرویس‌های todos/services.py، TodoBulkApi._apply، archive_batch، purge_batch و
+reminders.run_batch.
+"""
+import functools
+import time
+
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections
+
+ATTEMPTS = 3
+BACKOFF = 0.02  # ثانیه؛ دو برابر در هر تلاش
+
+
+def is_serialization_failure(exc):
+    return getattr(exc.__cause__, 'sqlstate', None) == '40001'
+
+
+def retry_on_serialization_failure(func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return func(*args, **kwargs)
+        for attempt in range(ATTEMPTS):
+            try:
+                return func(*args, **kwargs)
+            except OperationalError as e:
+                if attempt == ATTEMPTS - 1 or not is_serialization_failure(e):
+                    raise
+                time.sleep(BACKOFF * 2 ** attempt)
+    return wrapper
@@ -0,0 +1,97 @@
+"""
+جست‌وجوی متنی تسک‌ها (PostgreSQL full-text + fallback فازی با pg_trgm).
+
+ستون Todo.search_vector توسط تریگر دیتابیس (مایگریشن 0003) پر می‌شود؛ همان
+نرمال‌سازی فارسی پایین در SQL هم تکرار شده، پس هر تغییری اینجا باید آنجا هم
+اعمال شود.
+"""
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramWordSimilarity
+from django.db import connections
+from django.db.models import F, FloatField, Func, Q, TextField, Value
+from django.db.models.functions import Cast, Coalesce
+
+# ي ى -> ی ، ك -> ک ، ارقام فارسی/عربی -> لاتین ، حذف ZWNJ/کشیده/اعراب
+PERSIAN_CHAR_MAP = {
+    'ي': 'ی', 'ى': 'ی', 'ك': 'ک', 'ۀ': 'ه', 'ة': 'ه',
+    **{chr(0x06F0 + i): str(i) for i in range(10)},
+    **{chr(0x0660 + i): str(i) for i in range(10)},
+}
+PERSIAN_STRIP_CHARS = '\u200c\u0640' + ''.join(chr(c) for c in range(0x064B, 0x0653))
+
+_TRANSLATION = str.maketrans({**PERSIAN_CHAR_MAP, **{c: None for c in PERSIAN_STRIP_CHARS}})
+_TOKEN_RE = re.compile(r'\w+')
+
+SEARCH_CONFIG = 'simple'
+
+_trigram_cache = {}
+
+
+class NormalizeFa(Func):
+    """todos_normalize_fa(...) در SQL (مایگریشن 0003)؛ ایندکس trigram عنوان روی همین عبارت است."""
+    function = 'todos_normalize_fa'
+    output_field = TextField()
+
+
+def normalize(text):
+    """نرمال‌سازی فارسی + lowercase؛ معادل تابع SQL todos_normalize_fa."""
+    return (text or '').translate(_TRANSLATION).lower()
+
+
+def build_query(text):
+    """
+    هر کلمه به‌صورت پیشوندی (prefix) جست‌وجو می‌شود: «پروژ» -> 'پروژ':*
+    """
+    tokens = _TOKEN_RE.findall(normalize(text))
+    if not tokens:
+        return None
+    raw = ' & '.join("'%s':*" % t for t in tokens)
+    return SearchQuery(raw, search_type='raw', config=SEARCH_CONFIG)
+
+
+def trigram_available(using='default'):
+    """آیا pg_trgm روی این دیتابیس نصب است؟ (یک‌بار برای هر پروسه بررسی می‌شود)"""
+    if using not in _trigram_cache:
+        connection = connections[using]
+        available = False
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+                available = cursor.fetchone() is not None
+        _trigram_cache[using] = available
+    return _trigram_cache[using]
+
+
+def search_todos(queryset, text):
+    """
+    فیلتر و رتبه‌بندی queryset بر اساس متن؛ خروجی annotate شده با `rank`
+    و مرتب بر اساس rank (و بعد ترتیب پیش‌فرض مدل).
+    """
+    text = (text or '').strip()
+    if not text:
+        return queryset
+
+    if connections[queryset.db].vendor != 'postgresql':
+        return queryset.filter(Q(title__icontains=text) | Q(description__icontains=text))
+
+    query = build_query(text)
+    if query is None:
+        return queryset.none()
+
+    condition = Q(search_vector=query)
+    rank = SearchRank(F('search_vector'), query)
+    if trigram_available(queryset.db):
+        # تطابق فازی روی عنوان نرمال‌شده (غلط تایپی و ...)، با ایندکس GIN todos_todo_title_norm_trgm؛
+        # همان نرمال‌سازی search_vector، پس «ي/ك» عربی در عنوان هم پیدا می‌شود
+        norm = normalize(text)
+        queryset = queryset.alias(title_norm=NormalizeFa('title'))
+        condition |= Q(title_norm__trigram_word_similar=norm)
+        rank = rank + Coalesce(TrigramWordSimilarity(Value(norm), 'title_norm'), Value(0.0))
+
+    ordering = queryset.query.order_by or queryset.model._meta.ordering
+    # ts_rank نوع real برمی‌گرداند؛ double تا مقدار rank در cursor دقیق برگردد
+    return (queryset
+            .annotate(rank=Cast(rank, FloatField()))
+            .filter(condition)
+            .order_by('-rank', *ordering))
@@ -0,0 +1,22 @@
+def tag_to_dict(tag):
+    return {'id': tag.pk, 'name': tag.name}
+
+
+def todo_to_dict(todo):
+    """
+    نمایش JSON یک تسک (برای endpointهای JSON).
+    """
+    return {
+        'id': todo.pk,
+        'title': todo.title,
+        'description': todo.description,
+        'priority': todo.priority,
+        'is_done': todo.is_done,
+        'archived': todo.archived,
+        'due_date': todo.due_date.isoformat() if todo.due_date else None,
+        'completed_at': todo.completed_at.isoformat() if todo.completed_at else None,
+        'is_overdue': todo.is_overdue,
+        'tags': [tag_to_dict(t) for t in todo.tags.all()],
+        'created_at': todo.created_at.isoformat(),
+        'updated_at': todo.updated_at.isoformat(),
+    }
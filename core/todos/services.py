@@ -0,0 +1,306 @@
+"""
+عملیات دسته‌ای روی تسک‌ها (bulk_create / bulk_update / سطل زباله و اکشن‌های لیست).
+
+save() مدل در این مسیرها صدا زده نمی‌شود، پس فیلدهای وابسته (set_derived_fields)،
+شمارنده‌های ProfileTodoStats و رویدادهای لحظه‌ای (todos/events.py) همین‌جا نگه داشته می‌شوند.
+"""
+from contextlib import contextmanager
+
+from django.db import transaction
+from django.db.models import Case, Value, When
+from django.db.models.functions import Lower
+from django.utils import timezone
+
+from . import events
+from .models import Tag, Todo, ProfileTodoStats
+from .retry import retry_on_serialization_failure
+
+TodoTag = Todo.tags.through
+
+BULK_UPDATE_FIELDS = ['title', 'description', 'priority', 'due_date', 'is_done', 'completed_at',
+                      'reminded_at', 'reminder_attempts', 'updated_at']
+
+
+def _set_tags(pairs, replace=False):
+    """pairs: [(todo, [tag, ...]), ...] — یک insert برای جدول واسط."""
+    if replace:
+        TodoTag.objects.filter(todo_id__in=[todo.pk for todo, _ in pairs]).delete()
+    TodoTag.objects.bulk_create(
+        [TodoTag(todo_id=todo.pk, tag_id=tag.pk) for todo, tags in pairs for tag in tags],
+        ignore_conflicts=True,
+    )
+    # bulk_create سیگنال m2m_changed نمی‌فرستد
+    Tag.objects.invalidate_usage(*{todo.profile_id for todo, _ in pairs})
+
+
+@contextmanager
+def explicit_timestamps(*fields):
+    """auto_now/auto_now_add را موقتاً خاموش کن تا created_at/updated_at ساختگی ذخیره شوند."""
+    saved = [(f, f.auto_now, f.auto_now_add) for f in (Todo._meta.get_field(name) for name in fields)]
+    for f, _, _ in saved:
+        f.auto_now = f.auto_now_add = False
+    try:
+        yield
+    finally:
+        for f, auto_now, auto_now_add in saved:
+            f.auto_now, f.auto_now_add = auto_now, auto_now_add
+
+
+# ---------- تگ‌ها ----------
+
+def normalize_tag_names(raw):
+    """
+    «کار, خرید ,  کار» -> ['کار', 'خرید'] ؛ فاصله‌های اضافه حذف و تکراری‌ها (بدون توجه به حروف) یکی می‌شوند.
+    """
+    names, seen = [], set()
+    for part in (raw or '').split(','):
+        name = ' '.join(part.split())
+        key = name.lower()
+        if name and key not in seen:
+            seen.add(key)
+            names.append(name)
+    return names
+
+
+def resolve_tags(profile, names):
+    """
+    نام‌ها -> Tagها؛ موجودها با یک کوئری (بدون توجه به حروف) پیدا و بقیه یکجا ساخته می‌شوند.
+    ساخت همزمان همان تگ در دو درخواست با ignore_conflicts روی ایندکس یکتای lower(name) بی‌خطر است.
+    """
+    keys = {}
+    for name in names:
+        keys.setdefault(name.lower(), name)
+    if not keys:
+        return []
+
+    def lookup():
+        qs = Tag.objects.filter(profile=profile).alias(lname=Lower('name')).filter(lname__in=list(keys))
+        return {tag.name.lower(): tag for tag in qs}
+
+    with transaction.atomic():
+        found = lookup()
+        missing = [Tag(profile=profile, name=name) for key, name in keys.items() if key not in found]
+        if missing:
+            Tag.objects.bulk_create(missing, ignore_conflicts=True)
+            found = lookup()
+    return [found[key] for key in keys if key in found]
+
+
+def attach_tags(todo, tags):
+    _set_tags([(todo, tags)])
+
+
+def _resolve_new_tags(forms):
+    """
+    تگ‌های جدید (new_tags) همهٔ فرم‌ها با یک resolve برای هر پروفایل.
+    خروجی: لیست تگ‌های هر فرم به ترتیب فرم‌ها.
+    """
+    by_profile = {}
+    for form in forms:
+        by_profile.setdefault(form.profile, []).extend(form.cleaned_data.get('new_tags') or [])
+    resolved = {}
+    for profile, names in by_profile.items():
+        resolved[profile] = {t.name.lower(): t for t in resolve_tags(profile, names)}
+    return [
+        [resolved[form.profile][n.lower()] for n in (form.cleaned_data.get('new_tags') or [])
+         if n.lower() in resolved[form.profile]]
+        for form in forms
+    ]
+
+
+# ---------- تسک‌ها ----------
+
+def bulk_create_todos(forms, batch_size=500):
+    """
+    ساخت دسته‌ای از روی TodoFormهای معتبر.
+    """
+    objs = [form.save(commit=False) for form in forms]
+    for obj in objs:
+        obj.set_derived_fields()
+
+    with transaction.atomic(), ProfileTodoStats.objects.batch():
+        Todo.objects.bulk_create(objs, batch_size=batch_size)
+        new_tags = _resolve_new_tags(forms)
+        _set_tags([(obj, list(form.cleaned_data.get('tags') or []) + extra)
+                   for obj, form, extra in zip(objs, forms, new_tags)])
+        for obj in objs:
+            ProfileTodoStats.objects.apply_delta(obj.profile_id, {ProfileTodoStats.bucket(obj.is_done, obj.archived): 1})
+            events.notify(obj.profile_id, 'created', [obj.pk])
+    return objs
+
+
+@retry_on_serialization_failure
+def bulk_update_todos(forms, batch_size=500):
+    """
+    به‌روزرسانی دسته‌ای از روی TodoFormهای معتبر (instanceها از دیتابیس خوانده شده‌اند).
+    """
+    objs = [form.save(commit=False) for form in forms]
+    now = timezone.now()
+    for obj in objs:
+        obj.set_derived_fields()
+        obj.updated_at = now
+
+    with transaction.atomic(), ProfileTodoStats.objects.batch():
+        old_buckets = Todo.objects.filter(pk__in=[obj.pk for obj in objs]).locked_buckets()
+        Todo.objects.bulk_update(objs, BULK_UPDATE_FIELDS, batch_size=batch_size)
+        new_tags = _resolve_new_tags(forms)
+        _set_tags([(obj, list(form.cleaned_data.get('tags') or []) + extra)
+                   for obj, form, extra in zip(objs, forms, new_tags)],
+                  replace=True)
+        for obj in objs:
+            old = old_buckets.get(obj.pk)
+            new = ProfileTodoStats.bucket(obj.is_done, obj.archived)
+            if old and old != new:
+                ProfileTodoStats.objects.apply_delta(obj.profile_id, {old: -1, new: 1})
+            events.notify(obj.profile_id, 'updated', [obj.pk])
+    return objs
+
+
+# ---------- سطل زباله (حذف نرم؛ حذف قطعی در todos/trash.py) ----------
+
+@retry_on_serialization_failure
+def trash_todo(todo):
+    """انتقال یک تسک به سطل زباله: یک UPDATE روی همان ردیف (+ شمارنده‌ها)."""
+    now = timezone.now()
+    with transaction.atomic():
+        old = Todo.objects.filter(pk=todo.pk).locked_buckets().get(todo.pk)
+        if old is None:
+            return False
+        Todo.objects.filter(pk=todo.pk).update(deleted_at=now, updated_at=now)
+        ProfileTodoStats.objects.apply_delta(todo.profile_id, {old: -1})
+        Tag.objects.invalidate_usage(todo.profile_id)
+        events.notify(todo.profile_id, 'deleted', [todo.pk])
+    todo.deleted_at = todo.updated_at = now
+    return True
+
+
+@retry_on_serialization_failure
+def trash_todos(profile, queryset):
+    """انتقال دسته‌ای به سطل زباله با یک UPDATE؛ خروجی: تعداد تسک‌ها."""
+    now = timezone.now()
+    with transaction.atomic():
+        rows = _lock(Todo.objects.filter(profile=profile, pk__in=queryset.order_by().values('pk')))
+        ids = [pk for pk, _, _ in rows]
+        c = _bucket_counts(rows)
+        n = Todo.objects.filter(pk__in=ids).update(deleted_at=now, updated_at=now)
+        ProfileTodoStats.objects.apply_delta(profile.pk, {name: -value for name, value in c.items()})
+        Tag.objects.invalidate_usage(profile.pk)
+        events.notify(profile.pk, 'deleted', ids)
+    return n
+
+
+@retry_on_serialization_failure
+def restore_todos(profile, ids):
+    """بازگرداندن از سطل زباله؛ خروجی: تعداد تسک‌ها."""
+    now = timezone.now()
+    with transaction.atomic():
+        rows = _lock(Todo.all_objects.trashed().filter(profile=profile, pk__in=ids))
+        ids = [pk for pk, _, _ in rows]
+        c = _bucket_counts(rows)
+        n = Todo.all_objects.filter(pk__in=ids).update(deleted_at=None, updated_at=now)
+        ProfileTodoStats.objects.apply_delta(profile.pk, c)
+        Tag.objects.invalidate_usage(profile.pk)
+        events.notify(profile.pk, 'created', ids)
+    return n
+
+
+# ---------- اکشن‌های دسته‌ای لیست (UPDATE/DELETE مجموعه‌ای) ----------
+
+BULK_ACTIONS = ('toggle', 'archive', 'unarchive', 'delete', 'add_tag', 'remove_tag')
+
+
+def _lock(queryset):
+    """
+    [(pk, is_done, archived), ...] با قفل ردیف‌ها (FOR UPDATE، به ترتیب pk). delta شمارنده‌ها از
+    همین ردیف‌های قفل‌شده حساب و UPDATE فقط روی همین شناسه‌ها اجرا می‌شود؛ شمارش بدون قفل قبل از
+    UPDATE با درخواست همزمان (toggle دوباره و ...) شمارنده‌ها را منحرف می‌کرد.
+    """
+    return list(queryset.order_by('pk').select_for_update().values_list('pk', 'is_done', 'archived'))
+
+
+def _bucket_counts(rows):
+    """تعداد هر دستهٔ آماری (بدون در نظر گرفتن سطل زباله) در ردیف‌های _lock."""
+    counts = {'open_count': 0, 'done_count': 0, 'archived_count': 0}
+    for _, is_done, archived in rows:
+        counts[ProfileTodoStats.bucket(is_done, archived)] += 1
+    return counts
+
+
+@retry_on_serialization_failure
+def bulk_action(profile, queryset, action, tag=None):
+    """
+    اعمال یک اکشن روی همهٔ تسک‌های queryset (فقط تسک‌های همین پروفایل).
+    خروجی: تعداد تسک‌های تغییرکرده.
+    """
+    if action not in BULK_ACTIONS:
+        raise ValueError(action)
+    if action in ('add_tag', 'remove_tag') and (tag is None or tag.profile_id != profile.pk):
+        raise ValueError('tag')
+
+    # هدف را از روی شناسه‌ها بساز تا annotate/distinct/ترتیبِ فیلترها وارد UPDATE نشود
+    target = Todo.objects.filter(profile=profile, pk__in=queryset.order_by().values('pk'))
+    now = timezone.now()
+    stats = ProfileTodoStats.objects
+
+    with transaction.atomic():
+        Tag.objects.invalidate_usage(profile.pk)
+        if action in ('toggle', 'archive', 'unarchive'):
+            # شناسه‌ها بدون کوئری اضافه معلوم نیستند؛ صفحه ردیف‌هایش را دوباره می‌خواند
+            events.notify(profile.pk, reset=True)
+
+        if action == 'toggle':
+            rows = _lock(target)
+            c = _bucket_counts(rows)
+            # هر دو عبارت مقدار قبلی is_done را می‌بینند؛ همان منطق completed_at در Todo.save
+            n = Todo.objects.filter(pk__in=[pk for pk, _, _ in rows]).update(
+                is_done=Case(When(is_done=True, then=Value(False)), default=Value(True)),
+                completed_at=Case(When(is_done=False, then=Value(now)), default=Value(None)),
+                updated_at=now,
+            )
+            stats.apply_delta(profile.pk, {
+                'open_count': c['done_count'] - c['open_count'],
+                'done_count': c['open_count'] - c['done_count'],
+            })
+            return n
+
+        if action == 'archive':
+            rows = _lock(target.filter(archived=False))
+            c = _bucket_counts(rows)
+            n = Todo.objects.filter(pk__in=[pk for pk, _, _ in rows]).update(archived=True, updated_at=now)
+            stats.apply_delta(profile.pk, {
+                'open_count': -c['open_count'],
+                'done_count': -c['done_count'],
+                'archived_count': c['open_count'] + c['done_count'],
+            })
+            return n
+
+        if action == 'unarchive':
+            rows = _lock(target.filter(archived=True))
+            done = sum(1 for _, is_done, _ in rows if is_done)
+            n = Todo.objects.filter(pk__in=[pk for pk, _, _ in rows]).update(archived=False, updated_at=now)
+            stats.apply_delta(profile.pk, {
+                'open_count': n - done,
+                'done_count': done,
+                'archived_count': -n,
+            })
+            return n
+
+        if action == 'delete':
+            # حذف نرم؛ ردیف‌ها، تگ‌ها و ضمیمه‌ها تا purge_trash می‌مانند
+            return trash_todos(profile, target)
+
+        if action == 'add_tag':
+            ids = list(target.exclude(tags=tag).values_list('pk', flat=True))
+            TodoTag.objects.bulk_create([TodoTag(todo_id=pk, tag_id=tag.pk) for pk in ids],
+                                        ignore_conflicts=True, batch_size=1000)
+            Todo.objects.filter(pk__in=ids).update(updated_at=now)
+            events.notify(profile.pk, 'updated', ids)
+            return len(ids)
+
+        # remove_tag
+        links = TodoTag.objects.filter(tag_id=tag.pk, todo_id__in=target.values('pk'))
+        ids = list(links.values_list('todo_id', flat=True))
+        links.delete()
+        Todo.objects.filter(pk__in=ids).update(updated_at=now)
+        events.notify(profile.pk, 'updated', ids)
+        return len(ids)
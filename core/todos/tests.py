@@ -1,3 +1,869 @@
-from django.test import TestCase
+import hashlib
+import io
+import json
+import shutil
+import tempfile
+import threading
+import warnings
+from datetime import datetime, timedelta, timezone as dt_timezone
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.core import mail
+from django.core.management import call_command
+from django.core.mail.backends.locmem import EmailBackend
+from django.db import IntegrityError, OperationalError, connection, connections, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import User
+from core.pubsub import get_broker
+from . import archiving, attachments, events, export, importer, reminders, retry, search, trash
+from .models import Attachment, AttachmentUpload, ProfileTodoStats, Tag, Todo
+from .services import bulk_action, normalize_tag_names, resolve_tags, restore_todos, trash_todo
+
+COUNTERS = ('open_count', 'done_count', 'archived_count')
+
+
+class TodoTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('owner@example.com', 'pw-12345!')
+        cls.profile = cls.user.profile
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def counters(self):
+        stats = ProfileTodoStats.objects.for_profile(self.profile)
+        stats.refresh_from_db()
+        return {name: getattr(stats, name) for name in COUNTERS}
+
+    def assertCountersConsistent(self):
+        """شمارنده‌های ذخیره‌شده = شمارش واقعی از جدول تسک‌ها."""
+        actual = ProfileTodoStats.objects.compute([self.profile.pk])[self.profile.pk]
+        self.assertEqual(self.counters(), actual)
+
+
+class ImportTests(TodoTestCase):
+
+    def run_import(self, content, fmt='csv'):
+        return importer.import_todos(self.profile, importer.read_rows(io.BytesIO(content.encode()), fmt))
+
+    def test_invalid_rows_are_reported_and_valid_rows_counted(self):
+        Todo.objects.create(profile=self.profile, title='existing')
+        before = self.counters()
+
+        result = self.run_import(
+            'title,priority,is_done,archived,tags\n'
+            'open one,2,,,home\n'
+            ',2,,,\n'
+            'bad priority,9,,,\n'
+            'done one,1,true,,"home,work"\n'
+            'old one,3,true,true,\n'
+        )
+
+        self.assertEqual(result.created, 3)
+        self.assertEqual(result.error_count, 2)
+        self.assertEqual([line for line, _ in result.errors], [3, 4])
+        self.assertIn('title', result.errors[0][1])
+        self.assertIn('priority', result.errors[1][1])
+        self.assertEqual(self.counters(), {
+            'open_count': before['open_count'] + 1,
+            'done_count': before['done_count'] + 1,
+            'archived_count': before['archived_count'] + 1,
+        })
+        self.assertCountersConsistent()
+        done = Todo.objects.get(profile=self.profile, title='done one')
+        self.assertEqual(sorted(done.tags.values_list('name', flat=True)), ['home', 'work'])
+
+    def test_ndjson_bad_line_does_not_stop_import(self):
+        result = self.run_import('{"title": "a"}\nnot json\n{"title": "b", "is_done": true}\n', 'ndjson')
+
+        self.assertEqual(result.created, 2)
+        self.assertEqual([line for line, _ in result.errors], [2])
+        self.assertCountersConsistent()
+
+
+class CursorPaginationTests(TodoTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        Todo.objects.bulk_create([Todo(profile=cls.profile, title=f'todo {i}', priority=1 + i % 3)
+                                  for i in range(25)])
+
+    def fetch(self, **params):
+        response = self.client.get(reverse('todos:list_json'), params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_cursor_round_trip(self):
+        first = self.fetch()
+        seen = [t['id'] for t in first['results']]
+        page = first
+        while page['next_cursor']:
+            page = self.fetch(cursor=page['next_cursor'])
+            seen.extend(t['id'] for t in page['results'])
+
+        expected = list(Todo.objects.filter(profile=self.profile).values_list('pk', flat=True))
+        self.assertEqual(seen, expected)
+
+        second = self.fetch(cursor=first['next_cursor'])
+        back = self.fetch(cursor=second['previous_cursor'])
+        self.assertEqual(back['results'], first['results'])
+
+    def test_invalid_cursor_is_404(self):
+        response = self.client.get(reverse('todos:list_json'), {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 404)
+
+
+class ApiTests(TodoTestCase):
+
+    def test_page_size_is_clamped(self):
+        Todo.objects.bulk_create([Todo(profile=self.profile, title=f'todo {i}') for i in range(3)])
+        url = reverse('todos:api_todo_list')
+        for value, expected in (('0', 1), ('-1', 1), ('2', 2), ('100000', 3)):
+            with self.subTest(page_size=value):
+                response = self.client.get(url, {'page_size': value})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(response.json()['results']), expected)
+        self.assertEqual(self.client.get(url, {'page_size': 'ten'}).status_code, 400)
+
+    def test_put_replaces_and_patch_merges(self):
+        tag = Tag.objects.create(profile=self.profile, name='work')
+        todo = Todo.objects.create(profile=self.profile, title='old', description='keep me', priority=3)
+        todo.tags.add(tag)
+        url = reverse('todos:api_todo_detail', args=[todo.pk])
+
+        response = self.client.patch(url, {'title': 'patched'}, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        todo.refresh_from_db()
+        self.assertEqual((todo.title, todo.description, todo.priority), ('patched', 'keep me', 3))
+        self.assertEqual(list(todo.tags.all()), [tag])
+
+        response = self.client.put(url, {'title': 'put'}, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('priority', response.json()['errors'])
+
+        response = self.client.put(url, {'title': 'put', 'priority': 1}, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        todo.refresh_from_db()
+        self.assertEqual((todo.title, todo.description, todo.priority), ('put', '', 1))
+        self.assertEqual(list(todo.tags.all()), [])
+
+
+class ExportTests(TodoTestCase):
+
+    def setUp(self):
+        super().setUp()
+        for i in range(5):
+            Todo.objects.create(profile=self.profile, title=f'todo {i}')
+
+    def test_ndjson_export(self):
+        response = self.client.get(reverse('todos:export'), {'format': 'ndjson'})
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([row['title'] for row in rows], [f'todo {i}' for i in range(5)])
+
+    async def test_asgi_export_is_streamed_in_chunks(self):
+        await self.async_client.aforce_login(self.user)
+        with mock.patch.object(export, 'SEND_BATCH', 2), warnings.catch_warnings():
+            warnings.filterwarnings('error', 'StreamingHttpResponse must consume')
+            response = await self.async_client.get(reverse('todos:export'), {'format': 'csv'})
+            chunks = [chunk async for chunk in response.streaming_content]
+        # سرستون + ۵ ردیف، دوتا دوتا
+        self.assertEqual(len(chunks), 3)
+        lines = b''.join(chunks).decode('utf-8-sig').splitlines()
+        self.assertEqual(lines[0].split(',')[:2], ['id', 'title'])
+        self.assertEqual(len(lines), 6)
+
+
+class UploadDownloadTests(TodoTestCase):
+    content = b'hello world'
+
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        settings = override_settings(MEDIA_ROOT=directory, ATTACHMENT_UPLOAD_TEMP_DIR=f'{directory}/tmp',
+                                     ATTACHMENT_SENDFILE_HEADER='')
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.todo = Todo.objects.create(profile=self.profile, title='with file')
+
+    def start(self, size=len(content)):
+        return self.client.post(
+            reverse('todos:api_upload_start', args=[self.todo.pk]),
+            json.dumps({'filename': 'note.txt', 'size': size, 'content_type': 'text/plain'}),
+            content_type='application/json',
+        )
+
+    def chunk(self, upload_id, offset, data):
+        return self.client.patch(reverse('todos:api_upload', args=[upload_id]), data,
+                                 content_type='application/octet-stream', HTTP_UPLOAD_OFFSET=str(offset))
+
+    def upload(self):
+        upload_id = self.start().json()['id']
+        self.chunk(upload_id, 0, self.content[:5])
+        return self.chunk(upload_id, 5, self.content[5:]).json()['attachment']
+
+    def test_boolean_size_is_rejected(self):
+        self.assertEqual(self.start(size=True).status_code, 400)
+
+    def test_chunk_retry_with_stale_offset_is_409(self):
+        upload_id = self.start().json()['id']
+
+        response = self.chunk(upload_id, 0, self.content[:5])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['offset'], 5)
+
+        # همان تکه دوباره (مثلاً پاسخ قبلی گم شده): 409 با offset فعلی
+        response = self.chunk(upload_id, 0, self.content[:5])
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['offset'], 5)
+
+        response = self.chunk(upload_id, 5, self.content[5:])
+        self.assertEqual(response.status_code, 201)
+        attachment = Attachment.objects.get(pk=response.json()['attachment']['id'])
+        self.assertEqual(attachment.sha256, hashlib.sha256(self.content).hexdigest())
+        with attachment.file.open('rb') as f:
+            self.assertEqual(f.read(), self.content)
+
+    def test_concurrent_chunk_for_same_offset_is_409(self):
+        upload = AttachmentUpload.objects.get(pk=self.start().json()['id'])
+
+        class Racing(io.BytesIO):
+            def read(stream, size=-1):
+                # درخواست دیگری با همین offset زودتر ثبت شد
+                AttachmentUpload.objects.filter(pk=upload.pk).update(received=5)
+                return super().read(size)
+
+        with self.assertRaises(attachments.UploadError) as ctx:
+            attachments.append_chunk(upload.pk, [self.todo.pk], 0, Racing(self.content[:5]), 5)
+        self.assertEqual((ctx.exception.status, ctx.exception.extra), (409, {'offset': 5}))
+
+    def download(self, url, **headers):
+        response = self.client.get(url, headers=headers)
+        body = b''.join(response.streaming_content) if response.streaming else response.content
+        return response, body
+
+    def test_range_requests(self):
+        url = self.upload()['url']
+
+        response, body = self.download(url)
+        self.assertEqual((response.status_code, body), (200, self.content))
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+
+        response, body = self.download(url, Range='bytes=0-4')
+        self.assertEqual((response.status_code, body), (206, b'hello'))
+        self.assertEqual(response['Content-Range'], 'bytes 0-4/11')
+
+        response, body = self.download(url, Range='bytes=-5')
+        self.assertEqual((response.status_code, body), (206, b'world'))
+
+        response, _ = self.download(url, Range='bytes=20-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */11')
+
+    async def test_asgi_download_is_streamed_in_chunks(self):
+        url = (await sync_to_async(self.upload)())['url']
+        await self.async_client.aforce_login(self.user)
+
+        with mock.patch.object(attachments, 'COPY_BUFFER', 4), warnings.catch_warnings():
+            # iterator همگام زیر ASGI فقط با هشدار (و یکجا) خوانده می‌شود
+            warnings.filterwarnings('error', 'StreamingHttpResponse must consume')
+            response = await self.async_client.get(url)
+            chunks = [chunk async for chunk in response.streaming_content]
+            self.assertEqual((response.status_code, response['Content-Length']), (200, '11'))
+            self.assertEqual(chunks, [b'hell', b'o wo', b'rld'])
+
+            response = await self.async_client.get(url, headers={'Range': 'bytes=2-7'})
+            chunks = [chunk async for chunk in response.streaming_content]
+            self.assertEqual((response.status_code, response['Content-Range']), (206, 'bytes 2-7/11'))
+            self.assertEqual(chunks, [b'llo ', b'wo'])
+
+    def test_if_range(self):
+        url = self.upload()['url']
+        etag = f'"{hashlib.sha256(self.content).hexdigest()}"'
+
+        response, body = self.download(url, Range='bytes=6-', If_Range=etag)
+        self.assertEqual((response.status_code, body), (206, b'world'))
+
+        # فایل عوض شده: کل فایل
+        response, body = self.download(url, Range='bytes=6-', If_Range='"stale"')
+        self.assertEqual((response.status_code, body), (200, self.content))
+
+
+class FilterTests(TodoTestCase):
+
+    def test_unknown_tag_id_matches_nothing(self):
+        tag = Tag.objects.create(profile=self.profile, name='home')
+        Todo.objects.create(profile=self.profile, title='tagged').tags.add(tag)
+        Todo.objects.create(profile=self.profile, title='plain')
+
+        def titles(**params):
+            return [t['title'] for t in self.client.get(reverse('todos:list_json'), params).json()['results']]
+
+        self.assertEqual(titles(tag=[tag.pk]), ['tagged'])
+        self.assertEqual(titles(tag=[999999]), [])
+        self.assertEqual(titles(tag=[tag.pk, 999999], tag_mode='all'), [])
+
+    def test_invalid_filter_is_rejected_for_bulk_and_export(self):
+        Todo.objects.create(profile=self.profile, title='open')
+
+        response = self.client.post(reverse('todos:bulk') + '?tag=abc', {'scope': 'all', 'action': 'toggle'})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Todo.objects.filter(profile=self.profile, is_done=True).exists())
+
+        response = self.client.get(reverse('todos:export'), {'format': 'csv', 'priority': 'x'})
+        self.assertEqual(response.status_code, 400)
+
+
+    def test_due_filters_match_due_status_labels(self):
+        now = datetime(2026, 10, 14, 12, 0, tzinfo=dt_timezone.utc)  # چهارشنبه؛ هفتهٔ en-us از یکشنبه
+        due = {
+            'last week': datetime(2026, 10, 10, 9, 0, tzinfo=dt_timezone.utc),
+            'this morning': datetime(2026, 10, 14, 9, 0, tzinfo=dt_timezone.utc),
+            'tonight': datetime(2026, 10, 14, 20, 0, tzinfo=dt_timezone.utc),
+            'friday': datetime(2026, 10, 16, 9, 0, tzinfo=dt_timezone.utc),
+            'next week': datetime(2026, 10, 20, 9, 0, tzinfo=dt_timezone.utc),
+        }
+        for title, due_date in due.items():
+            Todo.objects.create(profile=self.profile, title=title, due_date=due_date)
+        Todo.objects.create(profile=self.profile, title='done', due_date=due['tonight'], is_done=True)
+
+        qs = Todo.objects.filter(profile=self.profile)
+        labels = dict(qs.with_due_status(now).values_list('title', 'due_status'))
+        self.assertEqual(labels, {'last week': 'overdue', 'this morning': 'overdue', 'tonight': 'today',
+                                  'friday': 'week', 'next week': '', 'done': ''})
+
+        def titles(queryset):
+            return set(queryset.values_list('title', flat=True))
+        self.assertEqual(titles(qs.overdue(now)), {'last week', 'this morning'})
+        self.assertEqual(titles(qs.due_today(now)), {'tonight'})
+        self.assertEqual(titles(qs.due_this_week(now)), {'tonight', 'friday'})
+
+class ConditionalGetTests(TodoTestCase):
+
+    def setUp(self):
+        super().setUp()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.todo = Todo.objects.create(profile=self.profile, title='cached')
+
+    def get(self, url, **headers):
+        return self.client.get(url, headers=headers)
+
+    def assertRevalidates(self, url, change):
+        """304 با همان ETag، و 200 با ETag تازه بعد از change."""
+        etag = self.get(url)['ETag']
+        self.assertTrue(etag.startswith('W/"'))
+        response = self.get(url, If_None_Match=etag)
+        self.assertEqual((response.status_code, response.content), (304, b''))
+        self.assertEqual(response['ETag'], etag)
+        self.assertIn('no-cache', response['Cache-Control'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            change()
+        response = self.get(url, If_None_Match=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_list_changes_with_todos_and_tags(self):
+        url = reverse('todos:list')
+
+        def edit():
+            self.todo.title = 'edited'
+            self.todo.save()
+        self.assertRevalidates(url, edit)
+        self.assertRevalidates(url, lambda: trash_todo(self.todo))
+        self.assertRevalidates(url, lambda: Tag.objects.create(profile=self.profile, name='new'))
+
+    def test_detail_changes_with_todo_and_uses_last_modified(self):
+        url = reverse('todos:detail', args=[self.todo.pk])
+        response = self.get(url)
+        response = self.get(url, If_Modified_Since=response['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+        def toggle():
+            self.todo.is_done = True
+            self.todo.save()
+        self.assertRevalidates(url, toggle)
+
+    def test_flash_message_disables_304(self):
+        url = reverse('todos:list')
+        etag = self.get(url)['ETag']
+        # اکشن نامعتبر: بدون تغییر داده، فقط پیام خطا
+        self.client.post(reverse('todos:bulk'), {'action': 'nope', 'ids': [self.todo.pk]})
+        self.assertEqual(self.get(url, If_None_Match=etag).status_code, 200)
+        self.assertEqual(self.get(url, If_None_Match=etag).status_code, 304)
+
+
+class TagTests(TodoTestCase):
+
+    def test_normalize_tag_names(self):
+        self.assertEqual(normalize_tag_names(' کار , خرید ,کار,  Work  Home , work home,'),
+                         ['کار', 'خرید', 'Work Home'])
+
+    def test_resolve_reuses_existing_tags_case_insensitively(self):
+        work = Tag.objects.create(profile=self.profile, name='Work')
+        with self.assertNumQueries(5):  # savepoint، lookup، bulk_create، lookup دوباره، release
+            tags = resolve_tags(self.profile, ['work', 'home', 'HOME'])
+        self.assertEqual([t.name for t in tags], ['Work', 'home'])
+        self.assertEqual(tags[0], work)
+        self.assertEqual(Tag.objects.filter(profile=self.profile).count(), 2)
+
+        with self.assertNumQueries(3):  # همه موجودند: فقط یک lookup
+            self.assertEqual(resolve_tags(self.profile, ['WORK', 'Home']), tags)
+
+    def test_name_is_unique_per_profile_ignoring_case(self):
+        Tag.objects.create(profile=self.profile, name='Work')
+        other = User.objects.create_user('other@example.com', 'pw-12345!').profile
+        Tag.objects.create(profile=other, name='work')
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Tag.objects.create(profile=self.profile, name='WORK')
+
+    def test_form_new_tags_merge_with_existing(self):
+        Tag.objects.create(profile=self.profile, name='Work')
+        response = self.client.post(reverse('todos:create'), {
+            'title': 'tagged', 'priority': 2, 'new_tags': 'work, Errands, errands',
+        })
+        self.assertEqual(response.status_code, 302)
+        todo = Todo.objects.get(title='tagged')
+        self.assertEqual(sorted(todo.tags.values_list('name', flat=True)), ['Errands', 'Work'])
+
+
+class TrashTests(TodoTestCase):
+
+    def test_trash_restore_purge_keeps_counters_consistent(self):
+        tag = Tag.objects.create(profile=self.profile, name='home')
+        open_todo = Todo.objects.create(profile=self.profile, title='open')
+        done_todo = Todo.objects.create(profile=self.profile, title='done', is_done=True)
+        archived = Todo.objects.create(profile=self.profile, title='archived', archived=True)
+        open_todo.tags.add(tag)
+        self.assertEqual(self.counters(), {'open_count': 1, 'done_count': 1, 'archived_count': 1})
+
+        for todo in (open_todo, done_todo, archived):
+            self.assertTrue(trash_todo(todo))
+        self.assertFalse(trash_todo(open_todo))
+        self.assertEqual(self.counters(), {'open_count': 0, 'done_count': 0, 'archived_count': 0})
+        self.assertFalse(Todo.objects.filter(profile=self.profile).exists())
+
+        self.assertEqual(restore_todos(self.profile, [open_todo.pk, done_todo.pk]), 2)
+        self.assertEqual(restore_todos(self.profile, [open_todo.pk]), 0)
+        self.assertEqual(self.counters(), {'open_count': 1, 'done_count': 1, 'archived_count': 0})
+        self.assertCountersConsistent()
+
+        # فقط تسک منقضی سطل زباله حذف قطعی می‌شود
+        self.assertEqual(trash.purge(now=timezone.now() + timedelta(days=1), days=0), (1, 0))
+        self.assertFalse(Todo.all_objects.filter(pk=archived.pk).exists())
+        self.assertEqual(trash.purge(now=timezone.now() + timedelta(days=1), days=0), (0, 0))
+        self.assertEqual(self.counters(), {'open_count': 1, 'done_count': 1, 'archived_count': 0})
+        self.assertCountersConsistent()
+        self.assertEqual(list(open_todo.tags.all()), [tag])
+
+
+class EventBatchTests(TodoTestCase):
+
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.object(get_broker(), 'publish')
+        self.publish = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def published(self):
+        return {channel: message for (channel, message), _ in self.publish.call_args_list}
+
+    def test_one_message_per_profile_per_transaction(self):
+        other = User.objects.create_user('other@example.com', 'pw-12345!').profile
+        with self.captureOnCommitCallbacks(execute=True):
+            kept = Todo.objects.create(profile=self.profile, title='kept')
+        self.publish.reset_mock()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                born = Todo.objects.create(profile=self.profile, title='born')
+                short_lived = Todo.objects.create(profile=self.profile, title='short lived')
+                born.title = 'born and edited'
+                born.save()
+                kept.title = 'edited'
+                kept.save()
+                short_lived.delete()
+                Todo.objects.create(profile=other, title='theirs')
+            self.publish.assert_not_called()
+
+        self.assertEqual(self.publish.call_count, 2)
+        self.assertEqual(self.published()[events.channel(self.profile.pk)],
+                         {'created': [born.pk], 'updated': [kept.pk]})
+
+    def test_rollback_publishes_nothing(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(ZeroDivisionError), transaction.atomic():
+                Todo.objects.create(profile=self.profile, title='gone')
+                1 / 0
+            events.notify(self.profile.pk, tags=True)
+        self.assertEqual(self.published(), {events.channel(self.profile.pk): {'tags': True}})
+
+    def test_large_batches_become_reset(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            events.notify(self.profile.pk, 'updated', range(events.MAX_IDS + 1), tags=True)
+        self.assertEqual(self.published(), {events.channel(self.profile.pk): {'reset': True, 'tags': True}})
+
+        self.publish.reset_mock()
+        with self.captureOnCommitCallbacks(execute=True):
+            events.notify(self.profile.pk, 'deleted', [1])
+            events.notify(self.profile.pk, reset=True)
+        self.assertEqual(self.published(), {events.channel(self.profile.pk): {'reset': True}})
+
+
+class FailingBackend(EmailBackend):
+    """locmem که برای گیرنده‌های fail خطا می‌دهد."""
+
+    def __init__(self, fail=(), **kwargs):
+        super().__init__(**kwargs)
+        self.fail = set(fail)
+
+    def send_messages(self, messages):
+        if any(r in self.fail for m in messages for r in m.to):
+            raise OSError('mailbox unavailable')
+        return super().send_messages(messages)
+
+
+class ReminderTests(TodoTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.now = timezone.now()
+        self.other = User.objects.create_user('other@example.com', 'pw-12345!').profile
+
+    def todo(self, profile=None, due_in=timedelta(minutes=30), **kwargs):
+        return Todo.objects.create(profile=profile or self.profile, title='due', due_date=self.now + due_in, **kwargs)
+
+    def test_one_email_per_profile_and_claimed_once(self):
+        first, second = self.todo(), self.todo()
+        self.todo(profile=self.other)
+        later = self.todo(due_in=timedelta(hours=5))
+        stale = self.todo(due_in=-timedelta(days=3))
+
+        self.assertEqual(reminders.run_batch(now=self.now), (4, 2))
+        self.assertEqual(sorted(m.to[0] for m in mail.outbox), ['other@example.com', 'owner@example.com'])
+        self.assertEqual(Todo.objects.filter(reminded_at=self.now).count(), 4)
+        self.assertIsNone(Todo.objects.get(pk=later.pk).reminded_at)
+        self.assertEqual(Todo.objects.get(pk=stale.pk).reminded_at, self.now)
+        self.assertEqual(reminders.run_batch(now=self.now), (0, 0))
+
+        # سررسید جدید یادآوری را دوباره در صف می‌گذارد
+        first.due_date = self.now + timedelta(minutes=10)
+        first.save()
+        self.assertEqual(reminders.run_batch(now=self.now), (1, 1))
+        self.assertEqual(Todo.objects.get(pk=second.pk).reminded_at, self.now)
+
+    def test_failed_recipient_does_not_block_the_batch(self):
+        broken = self.todo(profile=self.other)
+        ok = self.todo()
+        backend = FailingBackend(fail=['other@example.com'])
+
+        with self.assertLogs('todos.reminders', 'ERROR'):
+            self.assertEqual(reminders.run_batch(now=self.now, connection=backend), (2, 1))
+        self.assertEqual([m.to for m in mail.outbox], [['owner@example.com']])
+        self.assertEqual(Todo.objects.get(pk=ok.pk).reminded_at, self.now)
+        broken.refresh_from_db()
+        self.assertEqual((broken.reminded_at, broken.reminder_attempts), (None, 1))
+
+        with self.assertLogs('todos.reminders', 'ERROR'), self.settings(TODO_REMINDER_MAX_ATTEMPTS=2):
+            self.assertEqual(reminders.run_batch(now=self.now, connection=backend), (1, 0))
+        broken.refresh_from_db()
+        self.assertEqual((broken.reminded_at, broken.reminder_attempts), (self.now, 2))
+
+        broken.due_date = self.now + timedelta(minutes=5)
+        broken.save()
+        broken.refresh_from_db()
+        self.assertEqual((broken.reminded_at, broken.reminder_attempts), (None, 0))
+
+    def test_connection_failure_rolls_back(self):
+        todo = self.todo()
+
+        class Down(EmailBackend):
+            def open(self):
+                raise OSError('connection refused')
+
+        with self.assertRaises(OSError):
+            reminders.run_batch(now=self.now, connection=Down())
+        self.assertIsNone(Todo.objects.get(pk=todo.pk).reminded_at)
+
+
+@skipUnless(connection.vendor == 'postgresql', 'full-text search needs PostgreSQL')
+class SearchTests(TodoTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        # عنوان با «ي/ك» عربی، ارقام فارسی و نیم‌فاصله
+        Todo.objects.create(profile=cls.profile, title='گزارش مالي فصل ۳', description='بررسي‌ها')
+        Todo.objects.create(profile=cls.profile, title='خريد كتاب')
+
+    def titles(self, text):
+        qs = search.search_todos(Todo.objects.filter(profile=self.profile), text)
+        return list(qs.values_list('title', flat=True))
+
+    def test_normalize(self):
+        self.assertEqual(search.normalize('كتاب‌هاي ۱۲ Ali'), 'کتابهای 12 ali')
+
+    def test_persian_query_matches_arabic_letters(self):
+        self.assertEqual(self.titles('مالی'), ['گزارش مالي فصل ۳'])
+        self.assertEqual(self.titles('كتاب'), ['خريد كتاب'])
+        self.assertEqual(self.titles('فصل 3'), ['گزارش مالي فصل ۳'])
+        self.assertEqual(self.titles('بررسیها'), ['گزارش مالي فصل ۳'])
+        # پیشوندی
+        self.assertEqual(self.titles('گزار'), ['گزارش مالي فصل ۳'])
+
+    def test_fuzzy_fallback_uses_normalized_title(self):
+        if not search.trigram_available():
+            self.skipTest('pg_trgm is not installed')
+        self.assertEqual(self.titles('كتابب'), ['خريد كتاب'])
+        self.assertEqual(self.titles('کتابب'), ['خريد كتاب'])
+
+
+class CounterTests(TodoTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        Todo.objects.create(profile=cls.profile, title='open 1')
+        Todo.objects.create(profile=cls.profile, title='open 2', priority=1)
+        Todo.objects.create(profile=cls.profile, title='done', is_done=True)
+        Todo.objects.create(profile=cls.profile, title='archived done', is_done=True, archived=True)
+        Todo.objects.create(profile=cls.profile, title='archived open', archived=True)
+
+    def todos(self, **filters):
+        return Todo.objects.filter(profile=self.profile, **filters)
+
+    def test_dashboard_counters_follow_save(self):
+        self.assertEqual(self.counters(), {'open_count': 2, 'done_count': 1, 'archived_count': 2})
+        todo = self.todos().get(title='open 1')
+        todo.is_done = True
+        todo.save()
+        todo.save()  # ذخیرهٔ دوباره بدون تغییر
+        self.assertEqual(self.counters(), {'open_count': 1, 'done_count': 2, 'archived_count': 2})
+        todo.delete()
+        self.assertEqual(self.counters(), {'open_count': 1, 'done_count': 1, 'archived_count': 2})
+
+    def test_bulk_actions_keep_counters_consistent(self):
+        self.counters()  # ردیف آمار ساخته شود
+        steps = [
+            ('toggle', self.todos()),
+            ('archive', self.todos(title__startswith='open')),
+            ('unarchive', self.todos(archived=True)),
+            ('toggle', self.todos(is_done=True)),
+            ('delete', self.todos(priority=1)),
+        ]
+        for action, queryset in steps:
+            with self.subTest(action=action):
+                bulk_action(self.profile, queryset, action)
+                self.assertCountersConsistent()
+        self.assertEqual(self.counters(), {'open_count': 4, 'done_count': 0, 'archived_count': 0})
+
+    def test_toggle_twice_restores_counters(self):
+        before = self.counters()
+        self.assertEqual(bulk_action(self.profile, self.todos(), 'toggle'), 5)
+        self.assertEqual(bulk_action(self.profile, self.todos(), 'toggle'), 5)
+        self.assertEqual(self.counters(), before)
+
+
+class ArchiveJobTests(TodoTestCase):
+
+    def setUp(self):
+        super().setUp()
+        now = timezone.now()
+        self.old = Todo.objects.create(profile=self.profile, title='old', is_done=True)
+        self.recent = Todo.objects.create(profile=self.profile, title='recent', is_done=True)
+        self.open = Todo.objects.create(profile=self.profile, title='open')
+        Todo.objects.filter(pk=self.old.pk).update(completed_at=now - timedelta(days=10))
+        Todo.objects.filter(pk=self.recent.pk).update(completed_at=now - timedelta(days=1))
+
+    def archived(self):
+        return set(Todo.objects.filter(archived=True).values_list('title', flat=True))
+
+    def test_archive_done_moves_only_old_done_todos(self):
+        self.assertEqual(archiving.archive_done(days=7, dry_run=True), 1)
+        self.assertEqual(self.archived(), set())
+
+        self.assertEqual(archiving.archive_done(days=7, batch_size=1), 1)
+        self.assertEqual(self.archived(), {'old'})
+        self.assertCountersConsistent()
+        self.assertEqual(archiving.archive_done(days=7), 0)
+
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT tableoid::regclass::text FROM todos_todo WHERE id = %s', [self.old.pk])
+                self.assertEqual(cursor.fetchone(), ('todos_todo_archived',))
+
+    def test_command(self):
+        out = io.StringIO()
+        with self.settings(TODO_AUTO_ARCHIVE_DAYS=0):
+            call_command('archive_todos', stdout=out)
+        self.assertIn('disabled', out.getvalue())
+        self.assertEqual(self.archived(), set())
+
+        out = io.StringIO()
+        with self.settings(TODO_AUTO_ARCHIVE_DAYS=7):
+            call_command('archive_todos', stdout=out)
+        self.assertIn('1 done todos archived.', out.getvalue())
+        self.assertEqual(self.archived(), {'old'})
+
+
+class BulkActionTests(TodoTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.high = Todo.objects.create(profile=self.profile, title='high', priority=3)
+        self.low = Todo.objects.create(profile=self.profile, title='low', priority=1)
+        other = User.objects.create_user('other@example.com', 'pw-12345!').profile
+        self.foreign = Todo.objects.create(profile=other, title='foreign', priority=3)
+        self.foreign_tag = Tag.objects.create(profile=other, name='x')
+
+    def post(self, query='', **data):
+        return self.client.post(reverse('todos:bulk') + query, data)
+
+    def test_selected_ids_stay_inside_profile(self):
+        self.post(action='toggle', ids=[self.high.pk, self.foreign.pk])
+        self.assertEqual(set(Todo.objects.filter(is_done=True).values_list('pk', flat=True)), {self.high.pk})
+        self.assertCountersConsistent()
+
+    def test_scope_all_uses_current_filter(self):
+        self.post('?priority=3', action='archive', scope='all')
+        self.assertEqual(set(Todo.objects.filter(archived=True).values_list('pk', flat=True)), {self.high.pk})
+        self.assertCountersConsistent()
+
+    def test_add_and_remove_tag(self):
+        tag = Tag.objects.create(profile=self.profile, name='work')
+        self.post(action='add_tag', tag=tag.pk, ids=[self.high.pk, self.low.pk])
+        self.post(action='add_tag', tag=tag.pk, ids=[self.high.pk])
+        self.assertEqual(set(tag.todos.values_list('pk', flat=True)), {self.high.pk, self.low.pk})
+
+        self.post(action='remove_tag', tag=tag.pk, ids=[self.low.pk])
+        self.assertEqual(list(tag.todos.values_list('pk', flat=True)), [self.high.pk])
+
+    def test_foreign_tag_is_rejected(self):
+        with self.assertRaises(ValueError):
+            bulk_action(self.profile, Todo.objects.all(), 'add_tag', tag=self.foreign_tag)
+        self.post(action='add_tag', tag=self.foreign_tag.pk, ids=[self.high.pk])
+        self.assertFalse(self.foreign_tag.todos.exists())
+
+    def test_delete_moves_to_trash(self):
+        self.post(action='delete', ids=[self.low.pk])
+        self.assertEqual(list(Todo.objects.filter(profile=self.profile).values_list('pk', flat=True)),
+                         [self.high.pk])
+        self.assertTrue(Todo.all_objects.filter(pk=self.low.pk, deleted_at__isnull=False).exists())
+        self.assertCountersConsistent()
+
+
+@skipUnless(connection.vendor == 'postgresql', 'row locks need PostgreSQL')
+class ConcurrencyTests(TransactionTestCase):
+
+    def setUp(self):
+        self.profile = User.objects.create_user('race@example.com', 'pw-12345!').profile
+        self.todo = Todo.objects.create(profile=self.profile, title='raced')
+        ProfileTodoStats.objects.for_profile(self.profile)
+
+    def in_other_transaction(self, change):
+        """change داخل تراکنش یک thread دیگر؛ تا commit آن ردیف قفل می‌ماند."""
+        locked, done = threading.Event(), threading.Event()
+
+        def run():
+            try:
+                with transaction.atomic():
+                    change()
+                    locked.set()
+                    done.wait(5)
+            finally:
+                connections.close_all()
+
+        thread = threading.Thread(target=run)
+        thread.start()
+        locked.wait(5)
+        return thread, done
+
+    def test_bulk_toggle_counts_the_row_it_locked(self):
+        def toggle():
+            todo = Todo.objects.get(pk=self.todo.pk)
+            todo.is_done = True
+            todo.save()
+
+        thread, done = self.in_other_transaction(toggle)
+        # toggle همزمان منتظر قفل می‌ماند و بعد از commit ردیف انجام‌شده را برمی‌گرداند
+        threading.Timer(0.3, done.set).start()
+        bulk_action(self.profile, Todo.objects.filter(pk=self.todo.pk), 'toggle')
+        thread.join()
+
+        stats = ProfileTodoStats.objects.get(profile=self.profile)
+        self.assertFalse(Todo.objects.get(pk=self.todo.pk).is_done)
+        self.assertEqual((stats.open_count, stats.done_count), (1, 0))
+
+    def test_reminder_claim_skips_locked_rows(self):
+        now = timezone.now()
+        other = Todo.objects.create(profile=self.profile, title='free', due_date=now)
+        Todo.objects.filter(pk=self.todo.pk).update(due_date=now)
+        claimed = []
+
+        thread, done = self.in_other_transaction(lambda: claimed.extend(reminders.claim(now, batch_size=1)))
+        try:
+            with transaction.atomic():
+                mine = reminders.claim(now)
+        finally:
+            done.set()
+            thread.join()
+        self.assertEqual(len(claimed), 1)
+        self.assertEqual({t.pk for t in claimed + mine}, {self.todo.pk, other.pk})
+
+    def archived_meanwhile(self, operation, todo=None):
+        """
+        operation منتظر قفل تراکنشی می‌ماند که همان تسک را آرشیو (به پارتیشن دیگر منتقل) می‌کند؛
+        بعد از commit آن، قفل/UPDATE روی ردیف قدیمی خطای 40001 می‌گیرد.
+        """
+        todo = todo or Todo.objects.create(profile=self.profile, title='moving')
+
+        def archive():
+            other = Todo.all_objects.get(pk=todo.pk)
+            other.archived = True
+            other.save()
+        thread, done = self.in_other_transaction(archive)
+        threading.Timer(0.3, done.set).start()
+        try:
+            return operation(todo)
+        finally:
+            done.set()
+            thread.join()
+
+    def assertCountersConsistent(self):
+        stats = ProfileTodoStats.objects.get(profile=self.profile)
+        actual = ProfileTodoStats.objects.compute([self.profile.pk])[self.profile.pk]
+        self.assertEqual({name: getattr(stats, name) for name in COUNTERS}, actual)
+
+    def test_partition_move_conflict_is_retried(self):
+        with mock.patch.object(retry, 'ATTEMPTS', 1), self.assertRaises(OperationalError) as ctx:
+            self.archived_meanwhile(trash_todo)
+        self.assertTrue(retry.is_serialization_failure(ctx.exception))
+
+        self.assertTrue(self.archived_meanwhile(trash_todo))
+
+        trashed = Todo.objects.create(profile=self.profile, title='trashed')
+        trash_todo(trashed)
+        self.assertEqual(self.archived_meanwhile(lambda t: restore_todos(self.profile, [t.pk]), trashed), 1)
+        self.assertCountersConsistent()
+
+    def test_form_and_bulk_api_survive_partition_move(self):
+        self.client.force_login(self.profile.user)
+
+        response = self.archived_meanwhile(lambda t: self.client.post(
+            reverse('todos:edit', args=[t.pk]), {'title': 'edited', 'priority': 2}))
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(Todo.objects.filter(title='edited').exists())
+
+        response = self.archived_meanwhile(lambda t: self.client.post(
+            reverse('todos:api_todo_bulk'), {'update': [{'id': t.pk, 'title': 'bulk edited'}]},
+            content_type='application/json'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(Todo.objects.filter(title='bulk edited').exists())
+        self.assertCountersConsistent()
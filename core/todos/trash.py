@@ -0,0 +1,120 @@
+"""
+سطل زباله و پاک‌سازی آن (`manage.py purge_trash`).
+
+حذف از سمت کاربر فقط deleted_at را پر می‌کند (services.trash_todo / trash_todos)؛ Todo.objects
+این ردیف‌ها را نمی‌بیند و Todo.all_objects.trashed() سطل زباله است. بعد از TODO_TRASH_RETENTION_DAYS
+روز، purge_trash تسک‌ها را دسته‌دسته (SELECT ... FOR UPDATE SKIP LOCKED روی ایندکس جزئی
+todo_trash_purge_idx) برای همیشه حذف می‌کند؛ حذف آبشاری تگ‌ها و ضمیمه‌ها در همان تراکنش دسته است
+و فایل‌هایی که دیگر هیچ ضمیمه‌ای به آن‌ها اشاره نمی‌کند بعد از commit پاک می‌شوند
+(delete_unreferenced_attachment_file).
+
+همین دستور آپلودهای نیمه‌کارهٔ رهاشده (TODO_UPLOAD_EXPIRY_HOURS) و، با --sweep، فایل‌های یتیم
+زیر todo_attachments/ را هم پاک می‌کند.
+"""
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import attachments
+from .models import Attachment, AttachmentUpload, ProfileTodoStats, Todo
+from .retry import retry_on_serialization_failure
+
+BATCH_SIZE = 500
+
+ATTACHMENTS_DIR = 'todo_attachments'
+
+
+def retention_days():
+    return getattr(settings, 'TODO_TRASH_RETENTION_DAYS', 30)
+
+
+def upload_max_age():
+    return timedelta(hours=getattr(settings, 'TODO_UPLOAD_EXPIRY_HOURS', 24))
+
+
+def claim(cutoff, batch_size=BATCH_SIZE):
+    """شناسهٔ یک دسته از تسک‌های منقضی؛ باید داخل transaction.atomic صدا زده شود."""
+    return list(Todo.all_objects
+                .filter(deleted_at__lt=cutoff)
+                .select_for_update(skip_locked=True)
+                .order_by('deleted_at')
+                .values_list('pk', flat=True)[:batch_size])
+
+
+@retry_on_serialization_failure
+def purge_batch(cutoff, batch_size=BATCH_SIZE):
+    """حذف قطعی یک دسته. خروجی: (تعداد تسک، تعداد ضمیمه)"""
+    with transaction.atomic():
+        ids = claim(cutoff, batch_size)
+        if not ids:
+            return 0, 0
+        attachment_count = Attachment.objects.filter(todo_id__in=ids).count()
+        # فایل موقت آپلودهای نیمه‌کاره با ردیفشان (CASCADE) از بین نمی‌رود
+        parts = [attachments.temp_path(u) for u in AttachmentUpload.objects.filter(todo_id__in=ids).only('pk')]
+        # تسک‌های سطل زباله در شمارنده‌ها نیستند؛ batch فقط از UPDATEهای تک‌تک جلوگیری می‌کند
+        with ProfileTodoStats.objects.batch():
+            Todo.all_objects.filter(pk__in=ids).delete()
+        transaction.on_commit(lambda: [p.unlink(missing_ok=True) for p in parts])
+    return len(ids), attachment_count
+
+
+def purge(now=None, batch_size=BATCH_SIZE, dry_run=False, days=None):
+    """همهٔ تسک‌های منقضی، دسته به دسته. خروجی: (تعداد تسک، تعداد ضمیمه)"""
+    now = now or timezone.now()
+    cutoff = now - timedelta(days=retention_days() if days is None else days)
+    if dry_run:
+        expired = Todo.all_objects.filter(deleted_at__lt=cutoff)
+        return expired.count(), Attachment.objects.filter(todo__in=expired).count()
+    todos = files = 0
+    while True:
+        n, a = purge_batch(cutoff, batch_size)
+        todos += n
+        files += a
+        if n < batch_size:
+            return todos, files
+
+
+def expire_uploads(now=None, dry_run=False):
+    """آپلودهای نیمه‌کاره‌ای که مدتی تکه‌ای نگرفته‌اند (ردیف + فایل موقت)."""
+    now = now or timezone.now()
+    stale = AttachmentUpload.objects.filter(updated_at__lt=now - upload_max_age())
+    if dry_run:
+        return stale.count()
+    count = 0
+    for upload in stale.iterator():
+        attachments.abort_upload(upload)
+        count += 1
+    return count
+
+
+def sweep_orphans(now=None, grace=timedelta(days=1), dry_run=False):
+    """
+    فایل‌های زیر todo_attachments/ که هیچ ضمیمه‌ای به آن‌ها اشاره نمی‌کند (مثلاً از حذف‌های قبل
+    از سطل زباله یا خطای بین ذخیرهٔ فایل و ردیف). فایل‌های تازه‌تر از grace دست نمی‌خورند تا
+    آپلود در حال اتمام پاک نشود.
+    """
+    now = now or timezone.now()
+    storage = Attachment._meta.get_field('file').storage
+    if not storage.exists(ATTACHMENTS_DIR):
+        return 0
+    count = 0
+    for name in _walk(storage, ATTACHMENTS_DIR):
+        if storage.get_modified_time(name) > now - grace:
+            continue
+        if Attachment.objects.filter(file=name).exists():
+            continue
+        if not dry_run:
+            storage.delete(name)
+        count += 1
+    return count
+
+
+def _walk(storage, path):
+    directories, files = storage.listdir(path)
+    for name in files:
+        yield os.path.join(path, name).replace(os.sep, '/')
+    for directory in directories:
+        yield from _walk(storage, os.path.join(path, directory))
@@ -1,19 +1,32 @@
-from django.urls import path
+from django.urls import include, path
 from .views import (
-    TodoListView, TodoDetailView, TodoCreateView, TodoUpdateView, TodoDeleteView,
-    ToggleDoneView, ArchiveView, TagListCreateView, TagDeleteView
+    TodoListView, TodoListJsonView, TodoRowsView, TodoDetailView, TodoCreateView, TodoUpdateView, TodoDeleteView,
+    ToggleDoneView, ArchiveView, BulkActionView, TodoExportView, TodoImportView, AttachmentDownloadView,
+    SavedFilterCreateView, SavedFilterDeleteView, TagListCreateView, TagDeleteView, TrashView, RestoreView
 )
 
 app_name = 'todos'
 urlpatterns = [
     path('', TodoListView.as_view(), name='list'),
+    path('json/', TodoListJsonView.as_view(), name='list_json'),
+    path('rows/', TodoRowsView.as_view(), name='rows'),
     path('create/', TodoCreateView.as_view(), name='create'),
     path('<int:pk>/', TodoDetailView.as_view(), name='detail'),
     path('<int:pk>/edit/', TodoUpdateView.as_view(), name='edit'),
     path('<int:pk>/delete/', TodoDeleteView.as_view(), name='delete'),
     path('<int:pk>/toggle/', ToggleDoneView.as_view(), name='toggle'),
     path('<int:pk>/archive/', ArchiveView.as_view(), name='archive'),
+    path('bulk/', BulkActionView.as_view(), name='bulk'),
+    path('trash/', TrashView.as_view(), name='trash'),
+    path('trash/restore/', RestoreView.as_view(), name='restore'),
+    path('export/', TodoExportView.as_view(), name='export'),
+    path('import/', TodoImportView.as_view(), name='import'),
+    path('attachments/<int:pk>/download/', AttachmentDownloadView.as_view(), name='attachment_download'),
+    path('filters/save/', SavedFilterCreateView.as_view(), name='filter_save'),
+    path('filters/<int:pk>/delete/', SavedFilterDeleteView.as_view(), name='filter_delete'),
 
     path('tags/', TagListCreateView.as_view(), name='tags'),
     path('tags/<int:pk>/delete/', TagDeleteView.as_view(), name='tag_delete'),
+
+    path('api/v1/', include('todos.urls_api')),
 ]
@@ -0,0 +1,17 @@
+# todos/urls_api.py — JSON API نسخهٔ ۱ (زیر /todos/api/v1/)
+from django.urls import path
+from .api import (
+    TodoCollectionApi, TodoItemApi, TodoToggleApi, TodoArchiveApi, TodoBulkApi, UploadStartApi, UploadApi,
+    EventStreamApi
+)
+
+urlpatterns = [
+    path('todos/', TodoCollectionApi.as_view(), name='api_todo_list'),
+    path('todos/bulk/', TodoBulkApi.as_view(), name='api_todo_bulk'),
+    path('todos/<int:pk>/', TodoItemApi.as_view(), name='api_todo_detail'),
+    path('todos/<int:pk>/toggle/', TodoToggleApi.as_view(), name='api_todo_toggle'),
+    path('todos/<int:pk>/archive/', TodoArchiveApi.as_view(), name='api_todo_archive'),
+    path('todos/<int:pk>/uploads/', UploadStartApi.as_view(), name='api_upload_start'),
+    path('uploads/<uuid:upload_id>/', UploadApi.as_view(), name='api_upload'),
+    path('events/', EventStreamApi.as_view(), name='api_events'),
+]
@@ -1,14 +1,32 @@
-from django.shortcuts import redirect
+import mimetypes
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.shortcuts import get_object_or_404, redirect
 from django.contrib import messages
-from django.contrib.auth.mixins import LoginRequiredMixin
-from django.db.models import Q
+from django.contrib.auth.mixins import AccessMixin, LoginRequiredMixin
+from django.http import (
+    FileResponse, Http404, HttpResponse, HttpResponseBadRequest, HttpResponseNotModified, JsonResponse,
+)
+from django.template.loader import render_to_string
 from django.urls import reverse, reverse_lazy
 from django.utils import timezone
+from django.utils.http import content_disposition_header
 from django.views import View
-from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
+from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView, FormView
 
-from .models import Todo, Tag
-from .forms import TodoForm, TagForm
+from accounts.auth import aget_profile, get_profile
+from core.streaming import streaming_response
+from . import attachments, conditional, export, importer, trash
+from .models import Attachment, SavedFilter, Todo, Tag
+from .forms import ImportUploadForm, SavedFilterForm, TodoForm, TagForm
+from .fragments import fragment_timeout, tag_version
+from .pagination import InvalidCursor, KeysetPaginator, approximate_count
+from .filters import TodoFilterSet
+from .serializers import todo_to_dict
+from .services import bulk_action, restore_todos, trash_todo
 
 
 # ---------- Mixins ----------
@@ -18,7 +36,7 @@ class ProfileScopedQuerysetMixin:
     for scoped queryset
     """
     def get_profile(self):
-        return self.request.user.profile
+        return get_profile(self.request)
 
     def base_queryset(self):
         return (Todo.objects
@@ -30,6 +48,75 @@ class ProfileScopedQuerysetMixin:
         return self.base_queryset()
 
 
+class AsyncLoginRequiredMixin(AccessMixin):
+    """
+    LoginRequiredMixin برای viewهای async: کاربر و پروفایل با request.auser() بار می‌شوند
+    (هیچ کوئری sync داخل event loop اجرا نمی‌شود).
+    """
+    async def dispatch(self, request, *args, **kwargs):
+        self.profile = await aget_profile(request)
+        if self.profile is None:
+            return self.handle_no_permission()
+        return await super().dispatch(request, *args, **kwargs)
+
+    def get_profile(self):
+        return self.profile
+
+
+class CursorPaginationMixin:
+    """
+    صفحه‌بندی keyset به‌جای OFFSET + COUNT(*).
+    لینک‌های قدیمی ?page=N همچنان با صفحه‌بندی معمولی جنگو کار می‌کنند.
+
+    viewهای async صفحه را با apaginate_queryset از قبل می‌سازند و paginate_queryset
+    (از داخل get_context_data) همان نتیجه را برمی‌گرداند.
+    """
+    cursor_kwarg = 'cursor'
+
+    def use_page_number(self):
+        return self.page_kwarg in self.request.GET and self.cursor_kwarg not in self.request.GET
+
+    def paginate_queryset(self, queryset, page_size):
+        if getattr(self, '_paginated', None) is not None:
+            return self._paginated
+        if self.use_page_number():
+            return super().paginate_queryset(queryset, page_size)
+
+        paginator = KeysetPaginator(queryset, page_size)
+        try:
+            page = paginator.page(self.request.GET.get(self.cursor_kwarg))
+        except InvalidCursor:
+            raise Http404('cursor نامعتبر است.')
+        return paginator, page, page.object_list, page.has_other_pages()
+
+    async def apaginate_queryset(self, queryset, page_size):
+        if self.use_page_number():
+            def by_page_number():
+                paginator, page, object_list, is_paginated = super(CursorPaginationMixin, self).paginate_queryset(
+                    queryset, page_size)
+                page.object_list = list(object_list)
+                return paginator, page, page.object_list, is_paginated
+            self._paginated = await sync_to_async(by_page_number)()
+            return self._paginated
+
+        paginator = KeysetPaginator(queryset, page_size)
+        try:
+            page = await paginator.apage(self.request.GET.get(self.cursor_kwarg))
+        except InvalidCursor:
+            raise Http404('cursor نامعتبر است.')
+        self._paginated = paginator, page, page.object_list, page.has_other_pages()
+        return self._paginated
+
+    def get_context_data(self, **kwargs):
+        ctx = super().get_context_data(**kwargs)
+        # پارامترهای فعلی (بدون cursor/page) برای ساخت لینک صفحه‌های بعد/قبل
+        params = self.request.GET.copy()
+        params.pop(self.cursor_kwarg, None)
+        params.pop(self.page_kwarg, None)
+        ctx['querystring'] = params.urlencode()
+        return ctx
+
+
 class SuccessUrlToListMixin:
     success_url = None
 
@@ -44,68 +131,117 @@ class SuccessUrlToListMixin:
 
 # ---------- Todos ----------
 
-class TodoListView(LoginRequiredMixin, ProfileScopedQuerysetMixin, ListView):
+class TodoListView(AsyncLoginRequiredMixin, ProfileScopedQuerysetMixin, CursorPaginationMixin, ListView):
     template_name = 'todos/list.html'
     paginate_by = 10
 
+    async def get(self, request, *args, **kwargs):
+        # تگ‌ها قبل از queryset: فرم فیلتر گزینه‌هایش را از همین لیست می‌گیرد
+        self.tags = await Tag.objects.ausage_for(self.profile.pk)
+        self.saved_filters = await SavedFilter.objects.afor_profile(self.profile.pk)
+        # 304 قبل از ساخت و اجرای queryset اصلی (todos/conditional.py)
+        etag = None
+        if conditional.is_cacheable(request):
+            etag = await conditional.list_etag(request, self.profile, self.tags, self.saved_filters)
+            if response := conditional.not_modified(request, etag):
+                return response
+        # ساخت queryset ممکن است کوئری داشته باشد (مثلاً بررسی pg_trgm در search.py)
+        self.object_list = await sync_to_async(self.get_queryset)()
+        await self.apaginate_queryset(self.object_list, self.get_paginate_by(self.object_list))
+        context = self.get_context_data(**await self.get_extra_context())
+        return conditional.set_headers(self.render_to_response(context), etag)
+
+    async def get_extra_context(self):
+        return {
+            'saved_filters': self.saved_filters,
+            'approx_count': await sync_to_async(approximate_count)(self.object_list),
+        }
+
     def get_queryset(self):
-        qs = super().get_queryset()
-
-        # --- فیلتر/جست‌وجوی ساده از طریق GET ---
-        q = (self.request.GET.get('q') or '').strip()
-        if q:
-            qs = qs.filter(Q(title__icontains=q) | Q(description__icontains=q))
-
-        status = (self.request.GET.get('status') or '').strip()  # open | done | archived
-        if status == 'open':
-            qs = qs.filter(is_done=False, archived=False)
-        elif status == 'done':
-            qs = qs.filter(is_done=True, archived=False)
-        elif status == 'archived':
-            qs = qs.filter(archived=True)
-
-        priority = (self.request.GET.get('priority') or '').strip()
-        if priority.isdigit():
-            qs = qs.filter(priority=int(priority))
-
-        tag_id = (self.request.GET.get('tag') or '').strip()
-        if tag_id.isdigit():
-            qs = qs.filter(tags__id=int(tag_id), tags__profile=self.get_profile()).distinct()
-
-        # due_after / due_before به فرمت YYYY-MM-DDTHH:MM (datetime-local)
-        due_after = self.request.GET.get('due_after')
-        due_before = self.request.GET.get('due_before')
-        def _parse(dt):
-            if not dt:
-                return None
-            # 2025-08-13T17:45
-            try:
-                from datetime import datetime
-                naive = datetime.strptime(dt, '%Y-%m-%dT%H:%M')
-                from django.utils import timezone
-                return timezone.make_aware(naive, timezone.get_current_timezone())
-            except Exception:
-                return None
-
-        da = _parse(due_after)
-        db = _parse(due_before)
-        if da:
-            qs = qs.filter(due_date__gte=da)
-        if db:
-            qs = qs.filter(due_date__lte=db)
-
-        return qs
+        self.filterset = TodoFilterSet(self.request.GET, queryset=super().get_queryset().with_due_status(),
+                                       profile=self.get_profile())
+        return self.filterset.qs
 
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
         # برای ساخت فیلتر تگ‌ها در تمپلیت
-        ctx['tags'] = Tag.objects.filter(profile=self.get_profile()).order_by('name')
+        ctx['tags'] = sorted(self.tags, key=lambda t: t.name)
+        ctx['selected_tags'] = self.request.GET.getlist('tag')
+        ctx['active_filters'] = self.filterset.active_params().urlencode()
+        ctx['tag_version'] = tag_version(ctx['tags'])
+        ctx['fragment_timeout'] = fragment_timeout()
         return ctx
 
 
-class TodoDetailView(LoginRequiredMixin, ProfileScopedQuerysetMixin, DetailView):
+class TodoListJsonView(TodoListView):
+    """
+    همان فیلترها و صفحه‌بندی cursor لیست، به‌صورت JSON.
+    تعداد تقریبی فقط با ?count=1 محاسبه می‌شود.
+    """
+    async def get_extra_context(self):
+        if self.request.GET.get('count') == '1':
+            return {'approx_count': await sync_to_async(approximate_count)(self.object_list)}
+        return {}
+
+    def get_context_data(self, **kwargs):
+        paginator, page, object_list, _ = self.paginate_queryset(self.object_list, self.paginate_by)
+        return {'page': page, 'object_list': object_list, **kwargs}
+
+    def render_to_response(self, context, **response_kwargs):
+        page = context['page']
+        data = {
+            'results': [todo_to_dict(t) for t in context['object_list']],
+            'next_cursor': getattr(page, 'next_cursor', None),
+            'previous_cursor': getattr(page, 'previous_cursor', None),
+        }
+        if 'approx_count' in context:
+            data['approx_count'] = context['approx_count']
+        return JsonResponse(data, json_dumps_params={'ensure_ascii': False})
+
+
+class TodoRowsView(LoginRequiredMixin, ProfileScopedQuerysetMixin, View):
+    """
+    ردیف جدول و کارت موبایل چند تسک (?ids=1,2,3 به‌علاوهٔ فیلترهای صفحه) برای به‌روزرسانی
+    زندهٔ صفحهٔ لیست. تسکی که پیدا نشود (حذف‌شده، بیرون از فیلتر یا مال پروفایل دیگر) null است.
+    """
+    max_ids = 100
+
+    def get(self, request, *args, **kwargs):
+        ids = [int(v) for v in request.GET.get('ids', '').split(',') if v.isdigit()][:self.max_ids]
+        # همان فیلترهای صفحه: ردیفی که دیگر با فیلتر جور نیست null می‌شود و از صفحه حذف می‌شود
+        qs = TodoFilterSet(request.GET, queryset=self.get_queryset().with_due_status(),
+                           profile=self.get_profile()).qs
+        todos = {t.pk: t for t in qs.filter(pk__in=ids)}
+        rows = {}
+        for pk in ids:
+            t = todos.get(pk)
+            rows[pk] = t and {
+                'row': render_to_string('todos/_row.html', {'t': t}),
+                'card': render_to_string('todos/_card.html', {'t': t}),
+            }
+        return JsonResponse({'rows': rows}, json_dumps_params={'ensure_ascii': False})
+
+
+class TodoDetailView(AsyncLoginRequiredMixin, ProfileScopedQuerysetMixin, DetailView):
     template_name = 'todos/detail.html'
 
+    async def get(self, request, *args, **kwargs):
+        etag = last_modified = None
+        if conditional.is_cacheable(request):
+            tags = await Tag.objects.ausage_for(self.profile.pk)
+            validators = await conditional.detail_validators(request, self.profile, self.kwargs['pk'], tags)
+            if validators is None:
+                raise Http404('تسک پیدا نشد.')
+            etag, last_modified = validators
+            if response := conditional.not_modified(request, etag, last_modified):
+                return response
+        try:
+            self.object = await self.get_queryset().aget(pk=self.kwargs['pk'])
+        except Todo.DoesNotExist:
+            raise Http404('تسک پیدا نشد.')
+        response = self.render_to_response(self.get_context_data(object=self.object))
+        return conditional.set_headers(response, etag, last_modified)
+
 
 class TodoCreateView(LoginRequiredMixin, SuccessUrlToListMixin, CreateView):
     template_name = 'todos/form.html'
@@ -114,7 +250,7 @@ class TodoCreateView(LoginRequiredMixin, SuccessUrlToListMixin, CreateView):
 
     def get_form_kwargs(self):
         kwargs = super().get_form_kwargs()
-        kwargs['profile'] = self.request.user.profile
+        kwargs['profile'] = get_profile(self.request)
         return kwargs
 
     def form_valid(self, form):
@@ -130,7 +266,7 @@ class TodoUpdateView(LoginRequiredMixin, ProfileScopedQuerysetMixin, SuccessUrlT
 
     def get_form_kwargs(self):
         kwargs = super().get_form_kwargs()
-        kwargs['profile'] = self.request.user.profile
+        kwargs['profile'] = get_profile(self.request)
         return kwargs
 
     def form_valid(self, form):
@@ -140,12 +276,47 @@ class TodoUpdateView(LoginRequiredMixin, ProfileScopedQuerysetMixin, SuccessUrlT
 
 
 class TodoDeleteView(LoginRequiredMixin, ProfileScopedQuerysetMixin, SuccessUrlToListMixin, DeleteView):
+    """حذف نرم: تسک به سطل زباله می‌رود (یک UPDATE) و purge_trash بعداً حذف قطعی می‌کند."""
     template_name = 'todos/confirm_delete.html'
     success_url = reverse_lazy('todos:list')
 
-    def delete(self, request, *args, **kwargs):
-        messages.info(self.request, 'تسک حذف شد.')
-        return super().delete(request, *args, **kwargs)
+    def get_context_data(self, **kwargs):
+        ctx = super().get_context_data(**kwargs)
+        ctx['retention_days'] = trash.retention_days()
+        return ctx
+
+    def form_valid(self, form):
+        trash_todo(self.object)
+        messages.info(self.request, 'تسک به سطل زباله منتقل شد.')
+        return redirect(self.get_success_url())
+
+
+class TrashView(LoginRequiredMixin, ListView):
+    template_name = 'todos/trash.html'
+    paginate_by = 20
+
+    def get_queryset(self):
+        return (Todo.all_objects.trashed()
+                .filter(profile=get_profile(self.request))
+                .order_by('-deleted_at', '-pk'))
+
+    def get_context_data(self, **kwargs):
+        ctx = super().get_context_data(**kwargs)
+        days = trash.retention_days()
+        ctx['retention_days'] = days
+        for t in ctx['object_list']:
+            t.purge_at = t.deleted_at + timedelta(days=days)
+        return ctx
+
+
+class RestoreView(LoginRequiredMixin, View):
+    """بازگرداندن تسک‌های انتخاب‌شده از سطل زباله (POST ids)."""
+    def post(self, request, *args, **kwargs):
+        ids = [int(v) for v in request.POST.getlist('ids') if v.isdigit()]
+        count = restore_todos(get_profile(request), ids) if ids else 0
+        if count:
+            messages.success(request, f'{count} تسک بازگردانده شد.')
+        return redirect('todos:trash')
 
 
 class ToggleDoneView(LoginRequiredMixin, ProfileScopedQuerysetMixin, View):
@@ -179,12 +350,177 @@ class ArchiveView(LoginRequiredMixin, ProfileScopedQuerysetMixin, View):
             return redirect('accounts:profile_edit')
 
 
+class BulkActionView(LoginRequiredMixin, ProfileScopedQuerysetMixin, View):
+    """
+    اکشن دسته‌ای (انجام/آرشیو/حذف/تگ) روی تسک‌های انتخاب‌شده یا همهٔ نتایج فیلتر فعلی.
+    فیلترها همان querystring صفحهٔ لیست‌اند.
+    """
+    def post(self, request, *args, **kwargs):
+        profile = self.get_profile()
+        if request.POST.get('scope') == 'all':
+            # فیلتر نامعتبر نباید بی‌صدا کنار گذاشته شود و اکشن به همهٔ تسک‌ها برسد
+            filterset = TodoFilterSet(request.GET, queryset=Todo.objects.filter(profile=profile), profile=profile)
+            if not filterset.is_valid():
+                return HttpResponseBadRequest('فیلتر نامعتبر است.')
+            qs = filterset.qs
+        else:
+            ids = [int(i) for i in request.POST.getlist('ids') if i.isdigit()]
+            qs = Todo.objects.filter(profile=profile, pk__in=ids)
+
+        tag = None
+        tag_id = (request.POST.get('tag') or '').strip()
+        if tag_id.isdigit():
+            tag = Tag.objects.filter(profile=profile, pk=int(tag_id)).first()
+
+        try:
+            count = bulk_action(profile, qs, request.POST.get('action'), tag=tag)
+        except ValueError:
+            messages.error(request, 'اکشن یا تگ انتخاب‌شده معتبر نیست.')
+        else:
+            messages.success(request, f'{count} تسک به‌روزرسانی شد.')
+
+        url = reverse('todos:list')
+        if request.GET:
+            url += '?' + request.GET.urlencode()
+        return redirect(url)
+
+
+class TodoExportView(LoginRequiredMixin, ProfileScopedQuerysetMixin, View):
+    """
+    دانلود همهٔ تسک‌ها (یا نتایج فیلتر فعلی) به‌صورت CSV یا NDJSON؛ ?format=csv|ndjson
+    """
+    def get(self, request, *args, **kwargs):
+        fmt = request.GET.get('format', 'csv')
+        if fmt not in export.FORMATS:
+            raise Http404('فرمت نامعتبر است.')
+        filterset = TodoFilterSet(request.GET, queryset=Todo.objects.filter(profile=self.get_profile()),
+                                  profile=self.get_profile())
+        if not filterset.is_valid():
+            return HttpResponseBadRequest('فیلتر نامعتبر است.')
+        response = streaming_response(
+            request, export.stream(fmt, filterset.qs, build_url=request.build_absolute_uri),
+            batch=export.SEND_BATCH, content_type=export.FORMATS[fmt],
+        )
+        filename = f"todos-{timezone.localdate():%Y%m%d}.{fmt}"
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+
+class TodoImportView(LoginRequiredMixin, ProfileScopedQuerysetMixin, FormView):
+    """
+    ورود دسته‌ای تسک‌ها از CSV / NDJSON (همان ستون‌های خروجی)؛ ردیف‌های نامعتبر گزارش می‌شوند.
+    """
+    template_name = 'todos/import.html'
+    form_class = ImportUploadForm
+
+    def form_valid(self, form):
+        upload = form.cleaned_data['file']
+        fmt = form.cleaned_data['format'] or importer.guess_format(upload.name)
+        try:
+            result = importer.import_todos(self.get_profile(), importer.read_rows(upload.file, fmt))
+        except importer.ImportFileError as e:
+            form.add_error('file', str(e))
+            return self.form_invalid(form)
+
+        if result.created:
+            messages.success(self.request, f'{result.created} تسک وارد شد.')
+        if result.error_count:
+            messages.error(self.request, f'{result.error_count} ردیف نامعتبر بود و وارد نشد.')
+            return self.render_to_response(self.get_context_data(form=self.form_class(), result=result))
+        return redirect('todos:list')
+
+
+class AttachmentDownloadView(LoginRequiredMixin, View):
+    """
+    دانلود ضمیمه فقط برای صاحب تسک؛ جریانی و با پشتیبانی Range (ادامهٔ دانلود / seek در pdf).
+    با ATTACHMENT_SENDFILE_HEADER ارسال فایل به وب‌سرور سپرده می‌شود.
+    """
+    def get(self, request, pk, *args, **kwargs):
+        attachment = get_object_or_404(
+            Attachment, pk=pk, todo__profile=get_profile(request), todo__deleted_at__isnull=True)
+        name = attachment.file.name
+        storage = attachment.file.storage
+        if not name or not storage.exists(name):
+            raise Http404('فایل پیدا نشد.')
+
+        etag = f'"{attachment.sha256}"' if attachment.sha256 else None
+        if etag and request.headers.get('If-None-Match') == etag:
+            return HttpResponseNotModified(headers={'ETag': etag})
+
+        content_type = (attachment.content_type
+                        or mimetypes.guess_type(name)[0] or 'application/octet-stream')
+        as_attachment = request.GET.get('inline') != '1'
+        headers = {
+            'Accept-Ranges': 'bytes',
+            'Cache-Control': 'private, max-age=3600',
+            'Content-Disposition': content_disposition_header(as_attachment, attachment.display_name),
+            'X-Content-Type-Options': 'nosniff',
+        }
+        if etag:
+            headers['ETag'] = etag
+
+        sendfile = settings.ATTACHMENT_SENDFILE_HEADER
+        if sendfile:
+            # Range و Content-Length را خود وب‌سرور می‌سازد
+            headers[sendfile] = settings.ATTACHMENT_SENDFILE_PREFIX + name
+            return HttpResponse(content_type=content_type, headers=headers)
+
+        size = storage.size(name)
+        range_header = request.headers.get('Range')
+        if_range = request.headers.get('If-Range')
+        if if_range and if_range != etag:
+            range_header = None  # فایل عوض شده: کل فایل
+        try:
+            byte_range = attachments.parse_range(range_header, size)
+        except ValueError:
+            return HttpResponse(status=416, headers={'Content-Range': f'bytes */{size}'})
+
+        if byte_range is None and not isinstance(request, ASGIRequest):
+            response = FileResponse(attachment.file.open('rb'), content_type=content_type)
+        else:
+            # زیر ASGI فایل کامل هم با iter_range؛ FileResponse آنجا یکجا در حافظه خوانده می‌شد
+            start, end = byte_range or (0, size - 1)
+            response = streaming_response(
+                request, attachments.iter_range(attachment.file.open('rb'), start, end),
+                status=200 if byte_range is None else 206, content_type=content_type,
+            )
+            if byte_range is not None:
+                response['Content-Range'] = f'bytes {start}-{end}/{size}'
+            response['Content-Length'] = str(end - start + 1)
+        for key, value in headers.items():
+            response[key] = value
+        return response
+
+
+class SavedFilterCreateView(LoginRequiredMixin, ProfileScopedQuerysetMixin, View):
+    """ذخیرهٔ فیلتر فعلی لیست با یک نام (POST name, query)."""
+    def post(self, request, *args, **kwargs):
+        form = SavedFilterForm(request.POST, profile=self.get_profile())
+        if form.is_valid():
+            obj = form.save()
+            messages.success(request, f'فیلتر «{obj.name}» ذخیره شد.')
+            return redirect(reverse('todos:list') + '?' + obj.query)
+        for errors in form.errors.values():
+            for error in errors:
+                messages.error(request, error)
+        query = request.POST.get('query') or ''
+        return redirect(reverse('todos:list') + (f'?{query}' if query else ''))
+
+
+class SavedFilterDeleteView(LoginRequiredMixin, ProfileScopedQuerysetMixin, View):
+    def post(self, request, *args, **kwargs):
+        obj = get_object_or_404(SavedFilter, pk=kwargs['pk'], profile=self.get_profile())
+        obj.delete()
+        messages.info(request, f'فیلتر «{obj.name}» حذف شد.')
+        return redirect('todos:list')
+
+
 # ---------- (اختیاری) مدیریت تگ‌ها ----------
 
 class TagListCreateView(LoginRequiredMixin, ListView, CreateView):
     """
     یک صفحهٔ ساده برای:
-      - نمایش تگ‌های پروفایل
+      - نمایش تگ‌های پروفایل (مرتب بر اساس تعداد استفاده) و ابر تگ‌ها
       - ساخت تگ جدید
     """
     template_name = 'todos/tags.html'
@@ -192,19 +528,42 @@ class TagListCreateView(LoginRequiredMixin, ListView, CreateView):
     model = Tag
     form_class = TagForm
     success_url = reverse_lazy('todos:tags')
+    cloud_size = 40
+    cloud_classes = ('text-xs', 'text-sm', 'text-base', 'text-lg', 'text-xl')
 
     def get_queryset(self):
-        return Tag.objects.filter(profile=self.request.user.profile).order_by('name')
+        # لیست کش‌شده با شمارش‌ها (Tag.objects.usage_for)؛ تعداد کوئری به تعداد تگ‌ها وابسته نیست
+        return Tag.objects.usage_for(get_profile(self.request).pk)
+
+    def get(self, request, *args, **kwargs):
+        self.object = None
+        return super().get(request, *args, **kwargs)
+
+    def post(self, request, *args, **kwargs):
+        # در form_invalid، get_context_data لیست را لازم دارد
+        self.object_list = self.get_queryset()
+        return super().post(request, *args, **kwargs)
+
+    def get_cloud(self, tags):
+        used = [t for t in tags[:self.cloud_size] if t.usage]
+        if not used:
+            return []
+        top = used[0].usage
+        steps = len(self.cloud_classes) - 1
+        for t in used:
+            t.cloud_class = self.cloud_classes[round(steps * t.usage / top)]
+        return sorted(used, key=lambda t: t.name)
 
     def get_form_kwargs(self):
         kwargs = super().get_form_kwargs()
-        kwargs['profile'] = self.request.user.profile
+        kwargs['profile'] = get_profile(self.request)
         return kwargs
 
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
         if 'form' not in ctx:
             ctx['form'] = self.get_form()
+        ctx['cloud'] = self.get_cloud(self.object_list)
         return ctx
 
     def form_valid(self, form):
@@ -220,7 +579,7 @@ class TagDeleteView(LoginRequiredMixin, DeleteView):
 
     def get_queryset(self):
         # فقط تگ‌های همین پروفایل
-        return Tag.objects.filter(profile=self.request.user.profile)
+        return Tag.objects.filter(profile=get_profile(self.request))
 
     def delete(self, request, *args, **kwargs):
         messages.info(self.request, 'تگ حذف شد.')
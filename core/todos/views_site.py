@@ -1,10 +1,16 @@
 # todos/views_site.py
+from asgiref.sync import sync_to_async
 from django.contrib import messages
-from django.contrib.auth.mixins import LoginRequiredMixin
+from django.core.mail import send_mail
+from django.http import HttpResponseRedirect
 from django.urls import reverse_lazy
 from django.views.generic import TemplateView, FormView
 from django import forms
 
+from .fragments import fragment_timeout
+from .models import ProfileTodoStats
+from .views import AsyncLoginRequiredMixin
+
 class HomeView(TemplateView):
     template_name = "site/home.html"
 
@@ -20,24 +26,38 @@ class ContactView(FormView):
     template_name = "site/contact.html"
     form_class = ContactForm
     success_url = reverse_lazy("site:contact")
+    # put همگام ProcessFormView کنار گذاشته می‌شود (همهٔ handlerها باید async باشند)
+    http_method_names = ["get", "post", "head", "options"]
+
+    # async: زیر ASGI انتظار برای سرور ایمیل worker را قفل نمی‌کند
+    async def get(self, request, *args, **kwargs):
+        return self.render_to_response(self.get_context_data())
 
-    def form_valid(self, form):
+    async def post(self, request, *args, **kwargs):
+        form = self.get_form()
+        if not form.is_valid():
+            return self.form_invalid(form)
         # فعلاً به کنسول—بعداً SMTP می‌تونی بذاری
-        from django.core.mail import send_mail
         body = f"From: {form.cleaned_data['name']} <{form.cleaned_data['email']}>\n\n{form.cleaned_data['message']}"
-        send_mail("[ToDoApp] پیام جدید", body, None, ["admin@example.com"], fail_silently=True)
-        messages.success(self.request, "پیام شما ارسال شد. 🙏")
-        return super().form_valid(form)
+        await sync_to_async(send_mail, thread_sensitive=False)(
+            "[ToDoApp] پیام جدید", body, None, ["admin@example.com"], fail_silently=True,
+        )
+        messages.success(request, "پیام شما ارسال شد. 🙏")
+        return HttpResponseRedirect(self.get_success_url())
 
-class DashboardView(LoginRequiredMixin, TemplateView):
+class DashboardView(AsyncLoginRequiredMixin, TemplateView):
     template_name = "site/dashboard.html"
 
-    def get_context_data(self, **kwargs):
-        ctx = super().get_context_data(**kwargs)
-        p = self.request.user.profile
-        todos = p.todos.select_related("profile").prefetch_related("tags")
-        ctx["open_count"] = todos.filter(is_done=False, archived=False).count()
-        ctx["done_count"] = todos.filter(is_done=True, archived=False).count()
-        ctx["archived_count"] = todos.filter(archived=True).count()
-        ctx["recent"] = todos.order_by("-created_at")[:5]
-        return ctx
+    async def get(self, request, *args, **kwargs):
+        p = self.profile
+        # شمارنده‌ها از جدول آمار (یک ردیف) به‌جای سه COUNT
+        stats = await ProfileTodoStats.objects.afor_profile(p)
+        recent = [t async for t in p.todos.order_by("-created_at")[:5]]
+        return self.render_to_response(self.get_context_data(
+            open_count=stats.open_count,
+            done_count=stats.done_count,
+            archived_count=stats.archived_count,
+            recent=recent,
+            fragment_timeout=fragment_timeout(),
+            **kwargs,
+        ))
@@ -8,6 +8,7 @@ set -Eeuo pipefail
 : "${DJANGO_COLLECTSTATIC:=0}"    # 0 | 1
 : "${RUN_MIGRATIONS:=1}"          # فقط در prod لحاظ می‌شود
 : "${WEB_CONCURRENCY:=3}"         # تعداد ورکرهای Gunicorn
+: "${SERVER_MODE:=wsgi}"          # wsgi | asgi (ورکرهای uvicorn؛ لازم برای SSE و viewهای async)
 : "${WAIT_FOR_DB_TIMEOUT:=60}"    # ثانیه
 
 echo "Waiting for PostgreSQL at ${POSTGRES_HOST}:${POSTGRES_PORT} (timeout: ${WAIT_FOR_DB_TIMEOUT}s)..."
@@ -38,6 +39,18 @@ if [ "${DJANGO_ENV}" = "prod" ]; then
     python manage.py collectstatic --noinput
   fi
 
+  # فرمان صریح غیر از runserver (مثلاً worker یادآوری) همان اجرا می‌شود
+  if [ "$#" -gt 0 ] && [ "${3:-}" != "runserver" ]; then
+    echo "Starting: $*"
+    exec "$@"
+  fi
+
+  if [ "${SERVER_MODE}" = "asgi" ]; then
+    echo "Starting Gunicorn + Uvicorn workers (prod, ASGI, workers=${WEB_CONCURRENCY})..."
+    exec gunicorn core.asgi:application --bind 0.0.0.0:8000 --workers "${WEB_CONCURRENCY}" \
+      --worker-class uvicorn_worker.UvicornWorker
+  fi
+
   echo "Starting Gunicorn (prod, workers=${WEB_CONCURRENCY})..."
   exec gunicorn core.wsgi:application --bind 0.0.0.0:8000 --workers "${WEB_CONCURRENCY}"
 else
@@ -0,0 +1,25 @@
+// فقط کلاس‌هایی که در این فایل‌ها آمده‌اند در core/static/css/app.css می‌مانند.
+// کلاسی که در پایتون ساخته می‌شود (مثل TailwindFormMixin.base_input_classes) باید کامل و
+// به‌صورت رشتهٔ ثابت در یکی از همین فایل‌ها باشد، نه با چسباندن تکه‌ها.
+// اسکریپت‌های داخل تمپلیت‌ها (classList.add(...)) با glob تمپلیت‌ها پوشش داده می‌شوند؛ فایل JS جدا نداریم.
+/** @type {import('tailwindcss').Config} */
+module.exports = {
+  content: [
+    './core/templates/**/*.html',
+    './core/*/forms*.py',
+    './core/*/views*.py',
+    './core/*/templatetags/*.py',
+  ],
+  darkMode: ['class', '[data-theme="dark"]'],
+  theme: {
+    container: { center: true, padding: { DEFAULT: '1rem', md: '1.5rem' } },
+    extend: {
+      fontFamily: { sans: ['Vazirmatn', 'ui-sans-serif', 'system-ui'] },
+      colors: { brand: { 900: '#0f172a', 800: '#1e293b' } },
+      boxShadow: {
+        soft: '0 1px 2px rgba(0,0,0,0.05), 0 8px 24px rgba(15,23,42,0.06)'
+      }
+    }
+  },
+  plugins: [require('@tailwindcss/typography')],
+}